@@ -1,30 +1,112 @@
+import argparse
+import copy
+import functools
 import sys
+from typing import Callable, List, Optional, Sequence, TextIO, Type
+from plox.ast.stmt_interface import Stmt
+from plox import caches
+from plox.cache import ASTCache
+from plox.eliminator import DeadCodeEliminator
+from plox.engines import ENGINES
+from plox.hoister import LoopInvariantHoister
 from plox.exceptions import ParserError, ScannerError
 from plox.interpreter import Interpreter
-from plox.parser import Parser
+from plox.jit import CALL_THRESHOLD, LOOP_THRESHOLD, JITInterpreter
+from plox.optimizer import Optimizer
+from plox.parser import PARSERS, Parser
 
-from plox.resolver import Resolver
-from plox.scanner import Scanner
+from plox.resolver import RESOLVERS, Resolver
+from plox.scanner import SCANNERS, Scanner, StreamScanner
+from plox.transpiler import TranspilingInterpreter
+from plox.token import Token
 from plox.utils import display_error
+from tools.pretty_printer import ASTPrettyPrinter
 
 
-def run_repl():
-    interpretor = Interpreter()
+class Options:
+
+    def __init__(
+        self,
+        scanner: Type[Scanner] = Scanner,
+        parser: Type[Parser] = Parser,
+        cache_directory: Optional[str] = None,
+        lazy_functions: bool = False,
+        resolver: Type[Resolver] = Resolver,
+        elide_scopes: bool = True,
+        interpreter: Callable[[], Interpreter] = Interpreter,
+        jit_stats: bool = False,
+        optimize: bool = False,
+        eliminate: bool = False,
+        report_eliminated: bool = False,
+        hoist: bool = False,
+        cache_stats: bool = False,
+    ):
+        self.scanner = scanner
+        self.parser = parser
+        self.cache_directory = cache_directory
+        self.lazy_functions = lazy_functions
+        self.resolver = resolver
+        self.elide_scopes = elide_scopes
+        self.interpreter = interpreter
+        self.jit_stats = jit_stats
+        self.optimize = optimize
+        self.eliminate = eliminate
+        self.report_eliminated = report_eliminated
+        self.hoist = hoist
+        self.cache_stats = cache_stats
+
+    def create_interpreter(self) -> Interpreter:
+        interpreter = self.interpreter()
+        if self.cache_stats:
+            interpreter.caches = []
+        return interpreter
+
+    # Everything besides the source that decides the compiled tree, so that
+    # a cached tree is only reused under the same settings
+    def compile_settings(self) -> str:
+        return repr(
+            (
+                self.parser.__name__,
+                self.optimize,
+                self.eliminate,
+                self.resolver.__name__,
+                self.elide_scopes,
+                self.hoist,
+            )
+        )
+
+
+def run_repl(options: Options = Options()):
+    interpretor = options.create_interpreter()
+    # Later lines may use or assign any global, so none of them is unused
+    # and no loop is known to leave one alone
+    options = copy.copy(options)
+    options.eliminate = False
+    options.hoist = False
 
     while True:
         contents = input("> ").strip()
         if contents == "quit":
             break
-        run(interpretor, contents)
+        run(interpretor, options.scanner(contents), options)
 
 
-def run_file(file_path: str):
-    interpretor = Interpreter()
+def run_file(file_path: str, options: Options = Options()):
+    interpretor = options.create_interpreter()
 
     try:
         with open(file_path, "r") as file:
-            contents = file.read()
-            run(interpretor, contents)
+            # Lazily parsed bodies keep their tokens and resolver scopes
+            # around, which cannot be stored in the cache. What was eliminated
+            # is only known while compiling, so reports of it skip the cache.
+            if (
+                options.cache_directory is None
+                or options.lazy_functions
+                or options.report_eliminated
+            ):
+                run(interpretor, options.scanner.from_stream(file), options)
+            else:
+                run_cached(interpretor, file, options, ASTCache(options.cache_directory))
     except FileNotFoundError:
         print("The file does not exist.")
     except PermissionError:
@@ -35,23 +117,42 @@ def run_file(file_path: str):
         print("An unexpected error occurred:", e)
 
 
-def run(interpreter: Interpreter, source: str):
-    try:
-        scanner = Scanner(source)
-        tokens = scanner.scan_tokens()
+def emit_python(file_path: str, options: Options = Options()):
+    interpretor = TranspilingInterpreter()
 
-        parser = Parser(tokens)
-        statements = parser.parse()
+    with open(file_path, "r") as file:
+        statements = compile_source(
+            interpretor, options.scanner.from_stream(file), options
+        )
+    if statements is not None:
+        print(interpretor.transpile(statements), end="")
 
-        resolver = Resolver(interpreter)
-        resolver.resolve(statements)
 
-        interpreter.interpret(statements)
+def dump_ast(file_path: str, options: Options = Options()):
+    with open(file_path, "r") as file:
+        statements = compile_source(
+            Interpreter(), options.scanner.from_stream(file), options
+        )
+    if statements is not None:
+        print(ASTPrettyPrinter().print_statements(statements))
+
 
-        if scanner.had_error:
-            exit(65)
-        if interpreter.had_runtime_error:
-            exit(70)
+def run(
+    interpreter: Interpreter,
+    scanner: Scanner,
+    options: Options = Options(),
+    cache: Optional[ASTCache] = None,
+    cache_key: str = "",
+):
+    try:
+        statements = compile_source(interpreter, scanner, options)
+        if statements is None:
+            return
+
+        if cache is not None:
+            cache.store(cache_key, statements)
+
+        execute(interpreter, statements, scanner.had_error, options)
 
     except ScannerError as e:
         display_error(e.line, e.location, e.type.value)
@@ -60,13 +161,208 @@ def run(interpreter: Interpreter, source: str):
         display_error(e.line, e.location, e.type.value)
 
 
+def run_cached(
+    interpreter: Interpreter, file: TextIO, options: Options, cache: ASTCache
+):
+    key = cache.key(file, options.compile_settings())
+    statements = cache.load(key)
+    if statements is None:
+        file.seek(0)
+        run(interpreter, options.scanner.from_stream(file), options, cache, key)
+        return
+
+    execute(interpreter, statements, options=options)
+
+
+def compile_source(
+    interpreter: Interpreter, scanner: Scanner, options: Options
+) -> Optional[List[Stmt]]:
+    # Streamed input goes into a compact token stream rather than a list of
+    # Token objects, one per token
+    if isinstance(scanner, StreamScanner):
+        tokens: Sequence[Token] = scanner.scan_token_stream()
+    else:
+        tokens = scanner.scan_tokens()
+
+    parser = options.parser(tokens, options.lazy_functions)
+    statements = parser.parse()
+
+    if parser.errors:
+        for error in parser.errors:
+            display_error(error.line, error.location, error.type.value)
+        return None
+
+    if options.optimize:
+        statements = Optimizer().optimize(statements)
+
+    eliminator = DeadCodeEliminator()
+    if options.eliminate:
+        eliminator.remove_unreachable(statements)
+
+    resolver = options.resolver(interpreter, options.elide_scopes)
+    resolver.resolve(statements)
+
+    while options.eliminate and eliminator.remove_unused(statements, resolver):
+        resolver = options.resolver(interpreter, options.elide_scopes)
+        resolver.resolve(statements)
+
+    if options.report_eliminated:
+        for removal in eliminator.removed:
+            print(f"eliminated {removal}", file=sys.stderr)
+
+    if options.hoist and LoopInvariantHoister().hoist(statements, resolver):
+        resolver = options.resolver(interpreter, options.elide_scopes)
+        resolver.resolve(statements)
+
+    return statements
+
+
+def execute(
+    interpreter: Interpreter,
+    statements: List[Stmt],
+    had_error: bool = False,
+    options: Options = Options(),
+):
+    interpreter.interpret(statements)
+
+    if options.jit_stats and interpreter.jit is not None:
+        print(interpreter.jit.report(), file=sys.stderr)
+
+    if interpreter.caches is not None:
+        print(caches.report(interpreter.caches), file=sys.stderr)
+
+    if had_error:
+        exit(65)
+    if interpreter.had_runtime_error:
+        exit(70)
+
+
 def main():
-    if len(sys.argv) == 1:
-        run_repl()
-    elif len(sys.argv) == 2:
-        run_file(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(prog="plox")
+    arg_parser.add_argument("script", nargs="?", help="path to script")
+    arg_parser.add_argument(
+        "--scanner",
+        choices=SCANNERS.keys(),
+        default="default",
+        help="scanning engine used to tokenize the source",
+    )
+    arg_parser.add_argument(
+        "--parser",
+        choices=PARSERS.keys(),
+        default="recursive",
+        help="expression parsing strategy",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="cache compiled scripts in DIR and reuse them while the source is unchanged",
+    )
+    arg_parser.add_argument(
+        "--lazy-functions",
+        action="store_true",
+        help="parse and resolve function bodies on their first call",
+    )
+    arg_parser.add_argument(
+        "--resolver",
+        choices=RESOLVERS.keys(),
+        default="recursive",
+        help="variable resolution strategy",
+    )
+    arg_parser.add_argument(
+        "--no-scope-elision",
+        action="store_true",
+        help="allocate an environment for every block, even when no closure captures it",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=ENGINES.keys(),
+        default="tree",
+        help="execution engine that runs the resolved program",
+    )
+    arg_parser.add_argument(
+        "--jit-call-threshold",
+        type=int,
+        default=CALL_THRESHOLD,
+        metavar="N",
+        help="with --engine jit, compile a function once it has been called N times",
+    )
+    arg_parser.add_argument(
+        "--jit-loop-threshold",
+        type=int,
+        default=LOOP_THRESHOLD,
+        metavar="N",
+        help="with --engine jit, compile a function once its loops have run N iterations",
+    )
+    arg_parser.add_argument(
+        "--jit-stats",
+        action="store_true",
+        help="report the functions the jit promoted on stderr",
+    )
+    arg_parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="report the hits and misses of each property access cache on stderr",
+    )
+    arg_parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="fold constants and simplify expressions before resolving",
+    )
+    arg_parser.add_argument(
+        "--eliminate",
+        action="store_true",
+        help="remove unreachable code and unused declarations before running",
+    )
+    arg_parser.add_argument(
+        "--report-eliminated",
+        action="store_true",
+        help="with --eliminate, list what was removed on stderr",
+    )
+    arg_parser.add_argument(
+        "--hoist",
+        action="store_true",
+        help="move expressions that do not change while a loop runs out of it",
+    )
+    arg_parser.add_argument(
+        "--dump-ast",
+        action="store_true",
+        help="print the tree that would run, after --optimize, --eliminate and --hoist, instead of running it",
+    )
+    arg_parser.add_argument(
+        "--emit-python",
+        action="store_true",
+        help="print the Python code the script translates to instead of running it",
+    )
+    args = arg_parser.parse_args()
+
+    interpreter = ENGINES[args.engine]
+    if interpreter is JITInterpreter:
+        interpreter = functools.partial(
+            JITInterpreter, args.jit_call_threshold, args.jit_loop_threshold
+        )
+    options = Options(
+        SCANNERS[args.scanner],
+        PARSERS[args.parser],
+        args.cache_dir,
+        args.lazy_functions,
+        RESOLVERS[args.resolver],
+        not args.no_scope_elision,
+        interpreter,
+        args.jit_stats,
+        args.optimize,
+        args.eliminate,
+        args.report_eliminated,
+        args.hoist,
+        args.cache_stats,
+    )
+    if args.script is None:
+        run_repl(options)
+    elif args.dump_ast:
+        dump_ast(args.script, options)
+    elif args.emit_python:
+        emit_python(args.script, options)
     else:
-        print("Usage: plox [path to script]")
+        run_file(args.script, options)
 
 
 if __name__ == "__main__":
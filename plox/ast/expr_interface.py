@@ -1,9 +1,12 @@
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Tuple
 if TYPE_CHECKING:
     from plox.ast.expr_visitor import ExprVisitor
 
 
 class Expr:
 
+    __slots__ = ()
+    __match_args__: Tuple[str, ...] = ()
+
     def accept(self, visitor: 'ExprVisitor') -> Any:
         raise Exception('accept(visitor: ExprVisitor) is not implemented')
\ No newline at end of file
@@ -1,16 +1,24 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from plox.token import Token
 from plox.ast.expr_interface import Expr
 
 if TYPE_CHECKING:
     from plox.ast.expr_visitor import ExprVisitor
+    from plox.caches import InlineCache
 
 
 class Assign(Expr):
 
-    def __init__(self, name: Token, value: Expr):      
+    __slots__ = ('name', 'value', 'depth', 'slot', 'upvalue', 'boxed')
+    __match_args__ = ('name', 'value')
+
+    def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        self.depth: Optional[int] = None
+        self.slot: int = 0
+        self.upvalue: Optional[int] = None
+        self.boxed: bool = False
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_assign_expr(self)
@@ -18,7 +26,10 @@ class Assign(Expr):
 
 class Binary(Expr):
 
-    def __init__(self, left: Expr, operator: Token, right: Expr):      
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
         self.right = right
@@ -29,7 +40,10 @@ class Binary(Expr):
 
 class Call(Expr):
 
-    def __init__(self, callee: Expr, paren: Token, params: List[Expr]):      
+    __slots__ = ('callee', 'paren', 'params')
+    __match_args__ = ('callee', 'paren', 'params')
+
+    def __init__(self, callee: Expr, paren: Token, params: List[Expr]):
         self.callee = callee
         self.paren = paren
         self.params = params
@@ -40,9 +54,13 @@ class Call(Expr):
 
 class Get(Expr):
 
-    def __init__(self, object: Expr, name: Token):      
+    __slots__ = ('object', 'name', 'cache')
+    __match_args__ = ('object', 'name')
+
+    def __init__(self, object: Expr, name: Token):
         self.object = object
         self.name = name
+        self.cache: Optional['InlineCache'] = None
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_get_expr(self)
@@ -50,7 +68,10 @@ class Get(Expr):
 
 class Grouping(Expr):
 
-    def __init__(self, expression: Expr):      
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+
+    def __init__(self, expression: Expr):
         self.expression = expression
 
     def accept(self, visitor: 'ExprVisitor'):
@@ -59,7 +80,10 @@ class Grouping(Expr):
 
 class Literal(Expr):
 
-    def __init__(self, value: object):      
+    __slots__ = ('value',)
+    __match_args__ = ('value',)
+
+    def __init__(self, value: object):
         self.value = value
 
     def accept(self, visitor: 'ExprVisitor'):
@@ -68,7 +92,10 @@ class Literal(Expr):
 
 class Logical(Expr):
 
-    def __init__(self, left: Expr, operator: Token, right: Expr):      
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
         self.right = right
@@ -79,10 +106,14 @@ class Logical(Expr):
 
 class Set(Expr):
 
-    def __init__(self, object: Expr, name: Token, value: Expr):      
+    __slots__ = ('object', 'name', 'value', 'cache')
+    __match_args__ = ('object', 'name', 'value')
+
+    def __init__(self, object: Expr, name: Token, value: Expr):
         self.object = object
         self.name = name
         self.value = value
+        self.cache: Optional['InlineCache'] = None
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_set_expr(self)
@@ -90,9 +121,18 @@ class Set(Expr):
 
 class Super(Expr):
 
-    def __init__(self, keyword: Token, method: Token):      
+    __slots__ = ('keyword', 'method', 'depth', 'slot', 'upvalue', 'boxed', 'receiver', 'cache')
+    __match_args__ = ('keyword', 'method')
+
+    def __init__(self, keyword: Token, method: Token):
         self.keyword = keyword
         self.method = method
+        self.depth: Optional[int] = None
+        self.slot: int = 0
+        self.upvalue: Optional[int] = None
+        self.boxed: bool = False
+        self.receiver: Optional['This'] = None
+        self.cache: Optional['InlineCache'] = None
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_super_expr(self)
@@ -100,8 +140,15 @@ class Super(Expr):
 
 class This(Expr):
 
-    def __init__(self, keyword: Token):      
+    __slots__ = ('keyword', 'depth', 'slot', 'upvalue', 'boxed')
+    __match_args__ = ('keyword',)
+
+    def __init__(self, keyword: Token):
         self.keyword = keyword
+        self.depth: Optional[int] = None
+        self.slot: int = 0
+        self.upvalue: Optional[int] = None
+        self.boxed: bool = False
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_this_expr(self)
@@ -109,7 +156,10 @@ class This(Expr):
 
 class Unary(Expr):
 
-    def __init__(self, operator: Token, right: Expr):      
+    __slots__ = ('operator', 'right')
+    __match_args__ = ('operator', 'right')
+
+    def __init__(self, operator: Token, right: Expr):
         self.operator = operator
         self.right = right
 
@@ -119,8 +169,15 @@ class Unary(Expr):
 
 class Variable(Expr):
 
-    def __init__(self, name: Token):      
+    __slots__ = ('name', 'depth', 'slot', 'upvalue', 'boxed')
+    __match_args__ = ('name',)
+
+    def __init__(self, name: Token):
         self.name = name
+        self.depth: Optional[int] = None
+        self.slot: int = 0
+        self.upvalue: Optional[int] = None
+        self.boxed: bool = False
 
     def accept(self, visitor: 'ExprVisitor'):
         return visitor.visit_variable_expr(self)
@@ -1,9 +1,12 @@
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Tuple
 if TYPE_CHECKING:
     from plox.ast.stmt_visitor import StmtVisitor
 
 
 class Stmt:
 
+    __slots__ = ()
+    __match_args__: Tuple[str, ...] = ()
+
     def accept(self, visitor: 'StmtVisitor') -> Any:
         raise Exception('accept(visitor: StmtVisitor) is not implemented')
\ No newline at end of file
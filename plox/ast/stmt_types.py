@@ -1,98 +1,138 @@
-from typing import TYPE_CHECKING, List, Optional
-from plox.ast.expr_types import Variable
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from plox.token import Token
 from plox.ast.expr_interface import Expr
 
 if TYPE_CHECKING:
     from plox.ast.stmt_visitor import StmtVisitor
 from plox.ast.stmt_interface import Stmt
+from plox.ast.expr_types import Variable
 
 
 class Block(Stmt):
 
+    __slots__ = ('statements', 'scoped', 'size')
+    __match_args__ = ('statements',)
+
     def __init__(self, statements: List[Stmt]):
         self.statements = statements
+        self.scoped: bool = True
+        self.size: int = 0
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_block_stmt(self)
 
 
 class Function(Stmt):
 
+    __slots__ = ('name', 'params', 'body', 'slot', 'boxed', 'size', 'reusable', 'cells', 'captures')
+    __match_args__ = ('name', 'params', 'body')
+
     def __init__(self, name: Token, params: List[Token], body: List[Stmt]):
         self.name = name
         self.params = params
         self.body = body
-
-    def accept(self, visitor: "StmtVisitor"):
+        self.slot: Optional[int] = None
+        self.boxed: bool = False
+        self.size: int = 0
+        self.reusable: bool = False
+        self.cells: Tuple[int, ...] = ()
+        self.captures: Tuple[Tuple[Optional[int], int], ...] = ()
+
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_function_stmt(self)
 
 
 class Class(Stmt):
 
-    def __init__(self, name: Token, superclass: Optional[ Variable ], methods: List[Function]):
+    __slots__ = ('name', 'superclass', 'methods', 'slot', 'boxed')
+    __match_args__ = ('name', 'superclass', 'methods')
+
+    def __init__(self, name: Token, superclass: Optional[Variable], methods: List[Function]):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        self.slot: Optional[int] = None
+        self.boxed: bool = False
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_class_stmt(self)
 
 
 class Expression(Stmt):
 
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_expression_stmt(self)
 
 
 class If(Stmt):
 
-    def __init__(self, condition: Expr, thenBranch: Stmt, elseBranch: Stmt | None):
+    __slots__ = ('condition', 'thenBranch', 'elseBranch')
+    __match_args__ = ('condition', 'thenBranch', 'elseBranch')
+
+    def __init__(self, condition: Expr, thenBranch: Stmt, elseBranch: Optional[Stmt]):
         self.condition = condition
         self.thenBranch = thenBranch
         self.elseBranch = elseBranch
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_if_stmt(self)
 
 
 class Print(Stmt):
 
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_print_stmt(self)
 
 
 class Return(Stmt):
 
-    def __init__(self, keyword: Token, expr: Expr | None):
+    __slots__ = ('keyword', 'expr')
+    __match_args__ = ('keyword', 'expr')
+
+    def __init__(self, keyword: Token, expr: Optional[Expr]):
         self.keyword = keyword
         self.expr = expr
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_return_stmt(self)
 
 
 class VariableDeclaration(Stmt):
 
-    def __init__(self, name: Token, initializer: Expr | None):
+    __slots__ = ('name', 'initializer', 'slot', 'boxed')
+    __match_args__ = ('name', 'initializer')
+
+    def __init__(self, name: Token, initializer: Optional[Expr]):
         self.name = name
         self.initializer = initializer
+        self.slot: Optional[int] = None
+        self.boxed: bool = False
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_variabledeclaration_stmt(self)
 
 
 class While(Stmt):
 
+    __slots__ = ('condition', 'body')
+    __match_args__ = ('condition', 'body')
+
     def __init__(self, condition: Expr, body: Stmt):
         self.condition = condition
         self.body = body
 
-    def accept(self, visitor: "StmtVisitor"):
+    def accept(self, visitor: 'StmtVisitor'):
         return visitor.visit_while_stmt(self)
+
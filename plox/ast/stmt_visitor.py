@@ -13,7 +13,7 @@ class StmtVisitor:
 
 
     def visit_class_stmt(self, stmt: Class) -> Any:
-        raise Exception('visit_class_stmt(name: Token, superclass: Variable, method: List[Function]) not implemented')
+        raise Exception('visit_class_stmt(name: Token, superclass: Optional[Variable], methods: List[Function]) not implemented')
 
 
     def visit_expression_stmt(self, stmt: Expression) -> Any:
@@ -21,7 +21,7 @@ class StmtVisitor:
 
 
     def visit_if_stmt(self, stmt: If) -> Any:
-        raise Exception('visit_if_stmt(condition: Expr, thenBranch: Stmt, elseBranch: Stmt) not implemented')
+        raise Exception('visit_if_stmt(condition: Expr, thenBranch: Stmt, elseBranch: Optional[Stmt]) not implemented')
 
 
     def visit_print_stmt(self, stmt: Print) -> Any:
@@ -29,11 +29,11 @@ class StmtVisitor:
 
 
     def visit_return_stmt(self, stmt: Return) -> Any:
-        raise Exception('visit_return_stmt(keyword: Token, expr: Expr) not implemented')
+        raise Exception('visit_return_stmt(keyword: Token, expr: Optional[Expr]) not implemented')
 
 
     def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
-        raise Exception('visit_variabledeclaration_stmt(name: Token, initializer: Expr) not implemented')
+        raise Exception('visit_variabledeclaration_stmt(name: Token, initializer: Optional[Expr]) not implemented')
 
 
     def visit_while_stmt(self, stmt: While) -> Any:
@@ -0,0 +1,422 @@
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import (
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    This,
+    Unary,
+    Variable,
+    Super,
+)
+from plox.ast.expr_visitor import ExprVisitor
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.ast.stmt_visitor import StmtVisitor
+from plox.exceptions import InterpreterError, InterpreterErrorType
+from plox.token import Token, TokenType
+
+
+class OpCode(IntEnum):
+
+    CONSTANT = 0
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    DUP = 5
+    GET_LOCAL = 6
+    SET_LOCAL = 7
+    DEFINE_LOCAL = 8
+    GET_OUTER = 9
+    SET_OUTER = 10
+    GET_UPVALUE = 11
+    SET_UPVALUE = 12
+    SET_LOCAL_CELL = 13
+    SET_OUTER_CELL = 14
+    BOX = 15
+    UNBOX = 16
+    GET_GLOBAL = 17
+    SET_GLOBAL = 18
+    DEFINE_GLOBAL = 19
+    GET_PROPERTY = 20
+    SET_PROPERTY = 21
+    GET_SUPER = 22
+    EQUAL = 23
+    NOT_EQUAL = 24
+    GREATER = 25
+    GREATER_EQUAL = 26
+    LESS = 27
+    LESS_EQUAL = 28
+    ADD = 29
+    SUBTRACT = 30
+    MULTIPLY = 31
+    DIVIDE = 32
+    NOT = 33
+    NEGATE = 34
+    PRINT = 35
+    JUMP = 36
+    JUMP_IF_FALSE = 37
+    JUMP_IF_TRUE = 38
+    POP_JUMP_IF_FALSE = 39
+    LOOP = 40
+    CALL = 41
+    CLOSURE = 42
+    CAPTURE = 43
+    CLASS = 44
+    CAPTURE_METHODS = 45
+    RETURN = 46
+    PUSH_SCOPE = 47
+    POP_SCOPE = 48
+
+
+OPERAND_COUNTS: Dict[OpCode, int] = {
+    OpCode.CONSTANT: 1,
+    OpCode.GET_LOCAL: 1,
+    OpCode.SET_LOCAL: 1,
+    OpCode.DEFINE_LOCAL: 1,
+    OpCode.GET_OUTER: 2,
+    OpCode.SET_OUTER: 2,
+    OpCode.GET_UPVALUE: 1,
+    OpCode.SET_UPVALUE: 1,
+    OpCode.SET_LOCAL_CELL: 1,
+    OpCode.SET_OUTER_CELL: 2,
+    OpCode.GET_GLOBAL: 1,
+    OpCode.SET_GLOBAL: 1,
+    OpCode.DEFINE_GLOBAL: 1,
+    OpCode.GET_PROPERTY: 1,
+    OpCode.SET_PROPERTY: 1,
+    OpCode.GET_SUPER: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.JUMP_IF_TRUE: 1,
+    OpCode.POP_JUMP_IF_FALSE: 1,
+    OpCode.LOOP: 1,
+    OpCode.CALL: 1,
+    OpCode.CLOSURE: 1,
+    OpCode.CLASS: 1,
+    OpCode.PUSH_SCOPE: 1,
+}
+
+BINARY_OPCODES = {
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+}
+
+
+# Instructions are an opcode followed by its operands, all plain ints.
+# `tokens` runs parallel to `code` and gives the token every instruction
+# was compiled from, for runtime errors.
+class Chunk:
+
+    __slots__ = ("code", "constants", "tokens", "indices")
+
+    def __init__(self):
+        self.code: List[int] = []
+        self.constants: List[Any] = []
+        self.tokens: List[Optional[Token]] = []
+        self.indices: Dict[Tuple[type, Any], int] = {}
+
+    def emit(self, token: Optional[Token], op: OpCode, *operands: int) -> int:
+        self.code.append(op)
+        self.code.extend(operands)
+        self.tokens.extend([token] * (1 + len(operands)))
+        return len(self.code)
+
+    def add_constant(self, value: Any) -> int:
+        # Names and numbers repeat a lot; 1.0 and True must stay apart, and so
+        # must 0.0 and -0.0, which are equal but print differently
+        if isinstance(value, float):
+            key = (float, repr(value))
+        else:
+            key = (type(value), value if isinstance(value, str) else id(value))
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def disassemble(self) -> List[str]:
+        lines = []
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            count = OPERAND_COUNTS.get(op, 0)
+            operands = self.code[offset + 1 : offset + 1 + count]
+            line = f"{offset:04d} {op.name}"
+            if operands:
+                line += " " + " ".join(str(operand) for operand in operands)
+            if op in (OpCode.CONSTANT, OpCode.GET_GLOBAL, OpCode.SET_GLOBAL):
+                line += f" ({self.constants[operands[0]]!r})"
+            lines.append(line)
+            offset += 1 + count
+        return lines
+
+
+# A function declaration whose body is compiled on the first call, so that
+# lazily parsed bodies stay unparsed until then
+class FunctionProto:
+
+    __slots__ = ("declaration", "chunk")
+
+    def __init__(self, declaration: Function):
+        self.declaration = declaration
+        self.chunk: Optional[Chunk] = None
+
+    def get(self) -> Chunk:
+        if self.chunk is None:
+            self.chunk = BytecodeCompiler().compile_function(self.declaration)
+        return self.chunk
+
+
+class ClassProto:
+
+    __slots__ = ("name", "superclass", "methods")
+
+    def __init__(self, stmt: Class):
+        self.name = stmt.name.lexeme
+        self.superclass = stmt.superclass.name if stmt.superclass else None
+        self.methods = [FunctionProto(method) for method in stmt.methods]
+
+
+# Compiles resolved statements to bytecode for the VM in plox.vm. Locals
+# keep the slots the resolver gave them; blocks that still need their own
+# environment push a scope, which deeper references reach by depth.
+class BytecodeCompiler(ExprVisitor, StmtVisitor):
+
+    def __init__(self):
+        self.chunk = Chunk()
+
+    def compile(self, statements: List[Stmt]) -> Chunk:
+        for statement in statements:
+            statement.accept(self)
+        self.chunk.emit(None, OpCode.NIL)
+        self.chunk.emit(None, OpCode.RETURN)
+        return self.chunk
+
+    def compile_function(self, function: Function) -> Chunk:
+        return self.compile(function.body)
+
+    def emit(self, token: Optional[Token], op: OpCode, *operands: int) -> int:
+        return self.chunk.emit(token, op, *operands)
+
+    def emit_jump(self, token: Optional[Token], op: OpCode) -> int:
+        return self.emit(token, op, 0)
+
+    # Jump offsets count from the end of the jump instruction
+    def patch_jump(self, end: int):
+        self.chunk.code[end - 1] = len(self.chunk.code) - end
+
+    def emit_loop(self, token: Optional[Token], start: int):
+        end = self.emit(token, OpCode.LOOP, 0)
+        self.chunk.code[end - 1] = end - start
+
+    def compile_expr(self, expr: Expr):
+        expr.accept(self)
+
+    def load(self, name: Token, expr: Super | This | Variable):
+        if expr.upvalue is not None:
+            self.emit(name, OpCode.GET_UPVALUE, expr.upvalue)
+        elif expr.depth is None:
+            self.emit(name, OpCode.GET_GLOBAL, self.chunk.add_constant(name.lexeme))
+            return
+        elif expr.depth == 0:
+            self.emit(name, OpCode.GET_LOCAL, expr.slot)
+        else:
+            self.emit(name, OpCode.GET_OUTER, expr.depth, expr.slot)
+
+        if expr.boxed:
+            self.emit(name, OpCode.UNBOX)
+
+    def store(self, expr: Assign):
+        name = expr.name
+        if expr.upvalue is not None:
+            self.emit(name, OpCode.SET_UPVALUE, expr.upvalue)
+        elif expr.depth is None:
+            self.emit(name, OpCode.SET_GLOBAL, self.chunk.add_constant(name.lexeme))
+        elif expr.boxed and expr.depth == 0:
+            self.emit(name, OpCode.SET_LOCAL_CELL, expr.slot)
+        elif expr.boxed:
+            self.emit(name, OpCode.SET_OUTER_CELL, expr.depth, expr.slot)
+        elif expr.depth == 0:
+            self.emit(name, OpCode.SET_LOCAL, expr.slot)
+        else:
+            self.emit(name, OpCode.SET_OUTER, expr.depth, expr.slot)
+
+    # Declarations without a slot were made at the top level
+    def define(self, slot: Optional[int], boxed: bool, name: Token):
+        if boxed:
+            self.emit(name, OpCode.BOX)
+        if slot is None:
+            self.emit(name, OpCode.DEFINE_GLOBAL, self.chunk.add_constant(name.lexeme))
+        else:
+            self.emit(name, OpCode.DEFINE_LOCAL, slot)
+
+    def visit_block_stmt(self, stmt: Block) -> Any:
+        if stmt.scoped:
+            self.emit(None, OpCode.PUSH_SCOPE, stmt.size)
+        for statement in stmt.statements:
+            statement.accept(self)
+        if stmt.scoped:
+            self.emit(None, OpCode.POP_SCOPE)
+
+    def visit_class_stmt(self, stmt: Class) -> Any:
+        if stmt.superclass is not None:
+            self.compile_expr(stmt.superclass)
+        else:
+            self.emit(stmt.name, OpCode.NIL)
+
+        self.emit(stmt.name, OpCode.CLASS, self.chunk.add_constant(ClassProto(stmt)))
+        self.emit(stmt.name, OpCode.DUP)
+        self.define(stmt.slot, stmt.boxed, stmt.name)
+        self.emit(stmt.name, OpCode.CAPTURE_METHODS)
+
+    def visit_expression_stmt(self, stmt: Expression) -> Any:
+        self.compile_expr(stmt.expression)
+        self.emit(None, OpCode.POP)
+
+    # Captures follow the definition so that recursive functions see
+    # themselves
+    def visit_function_stmt(self, stmt: Function) -> Any:
+        proto = self.chunk.add_constant(FunctionProto(stmt))
+        self.emit(stmt.name, OpCode.CLOSURE, proto)
+        self.emit(stmt.name, OpCode.DUP)
+        self.define(stmt.slot, stmt.boxed, stmt.name)
+        self.emit(stmt.name, OpCode.CAPTURE)
+
+    def visit_if_stmt(self, stmt: If) -> Any:
+        self.compile_expr(stmt.condition)
+        else_jump = self.emit_jump(None, OpCode.POP_JUMP_IF_FALSE)
+        stmt.thenBranch.accept(self)
+
+        if stmt.elseBranch is None:
+            self.patch_jump(else_jump)
+            return
+
+        end_jump = self.emit_jump(None, OpCode.JUMP)
+        self.patch_jump(else_jump)
+        stmt.elseBranch.accept(self)
+        self.patch_jump(end_jump)
+
+    def visit_print_stmt(self, stmt: Print) -> Any:
+        self.compile_expr(stmt.expression)
+        self.emit(None, OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt: Return) -> Any:
+        if stmt.expr is None:
+            self.emit(stmt.keyword, OpCode.NIL)
+        else:
+            self.compile_expr(stmt.expr)
+        self.emit(stmt.keyword, OpCode.RETURN)
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
+        if stmt.initializer is None:
+            self.emit(stmt.name, OpCode.NIL)
+        else:
+            self.compile_expr(stmt.initializer)
+        self.define(stmt.slot, stmt.boxed, stmt.name)
+
+    def visit_while_stmt(self, stmt: While) -> Any:
+        start = len(self.chunk.code)
+        self.compile_expr(stmt.condition)
+        exit_jump = self.emit_jump(None, OpCode.POP_JUMP_IF_FALSE)
+        stmt.body.accept(self)
+        self.emit_loop(None, start)
+        self.patch_jump(exit_jump)
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        self.compile_expr(expr.value)
+        self.store(expr)
+
+    def visit_binary_expr(self, expr: Binary) -> Any:
+        op = BINARY_OPCODES.get(expr.operator.token_type)
+        if op is None:
+            raise InterpreterError(InterpreterErrorType.INVALID_BINARY_OPERATOR)
+
+        self.compile_expr(expr.left)
+        self.compile_expr(expr.right)
+        self.emit(expr.operator, op)
+
+    def visit_call_expr(self, expr: Call) -> Any:
+        self.compile_expr(expr.callee)
+        for argument in expr.params:
+            self.compile_expr(argument)
+        self.emit(expr.paren, OpCode.CALL, len(expr.params))
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        self.compile_expr(expr.object)
+        self.emit(expr.name, OpCode.GET_PROPERTY, self.chunk.add_constant(expr.name))
+
+    def visit_grouping_expr(self, expr: Grouping) -> Any:
+        self.compile_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> Any:
+        if expr.value is None:
+            self.emit(None, OpCode.NIL)
+        elif expr.value is True:
+            self.emit(None, OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(None, OpCode.FALSE)
+        else:
+            self.emit(None, OpCode.CONSTANT, self.chunk.add_constant(expr.value))
+
+    def visit_logical_expr(self, expr: Logical) -> Any:
+        self.compile_expr(expr.left)
+        if expr.operator.token_type == TokenType.OR:
+            end_jump = self.emit_jump(expr.operator, OpCode.JUMP_IF_TRUE)
+        else:
+            end_jump = self.emit_jump(expr.operator, OpCode.JUMP_IF_FALSE)
+        self.emit(expr.operator, OpCode.POP)
+        self.compile_expr(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_set_expr(self, expr: Set) -> Any:
+        self.compile_expr(expr.object)
+        self.compile_expr(expr.value)
+        self.emit(expr.name, OpCode.SET_PROPERTY, self.chunk.add_constant(expr.name))
+
+    def visit_super_expr(self, expr: Super) -> Any:
+        assert expr.receiver is not None
+        self.load(expr.keyword, expr)
+        self.load(expr.receiver.keyword, expr.receiver)
+        self.emit(expr.method, OpCode.GET_SUPER, self.chunk.add_constant(expr.method))
+
+    def visit_this_expr(self, expr: This) -> Any:
+        self.load(expr.keyword, expr)
+
+    def visit_unary_expr(self, expr: Unary) -> Any:
+        self.compile_expr(expr.right)
+        match expr.operator.token_type:
+            case TokenType.MINUS:
+                self.emit(expr.operator, OpCode.NEGATE)
+            case TokenType.BANG:
+                self.emit(expr.operator, OpCode.NOT)
+            case _:
+                raise InterpreterError(InterpreterErrorType.INVALID_UNARY_OPERATOR)
+
+    def visit_variable_expr(self, expr: Variable) -> Any:
+        self.load(expr.name, expr)
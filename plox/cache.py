@@ -0,0 +1,108 @@
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO
+
+import plox
+from plox.ast.stmt_interface import Stmt
+
+CACHE_SUFFIX = ".ploxc"
+CHUNK_SIZE = 64 * 1024
+
+
+_interpreter_version: Optional[str] = None
+
+
+def interpreter_version() -> str:
+    # The release number alone is not enough to invalidate pickled ASTs when
+    # node classes change during development, so the package sources are
+    # hashed along with it.
+    global _interpreter_version
+
+    if _interpreter_version is None:
+        digest = hashlib.sha256(plox.__version__.encode())
+        package = os.path.dirname(plox.__file__)
+        for root, directories, files in sorted(os.walk(package)):
+            directories.sort()
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    with open(os.path.join(root, name), "rb") as file:
+                        digest.update(name.encode())
+                        digest.update(file.read())
+        _interpreter_version = digest.hexdigest()
+
+    return _interpreter_version
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    # (Un)pickling a large AST allocates millions of objects without creating
+    # any garbage; letting the cyclic collector run meanwhile costs several
+    # times the pickling itself.
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class ASTCache:
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    # `settings` names whatever else shaped the stored tree, such as the
+    # passes that rewrote it
+    def key(self, stream: TextIO, settings: str = "") -> str:
+        digest = hashlib.sha256(interpreter_version().encode())
+        digest.update(settings.encode())
+        while chunk := stream.read(CHUNK_SIZE):
+            digest.update(chunk.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, key: str) -> Optional[List[Stmt]]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file, paused_gc():
+                stored_key, statements = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.discard(path)
+            return None
+
+        if stored_key != key:
+            self.discard(path)
+            return None
+
+        return statements
+
+    def store(self, key: str, statements: List[Stmt]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(
+                dir=self.directory, suffix=".tmp"
+            )
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(descriptor, "wb") as file, paused_gc():
+                pickle.dump((key, statements), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.path(key))
+        except (OSError, pickle.PicklingError, RecursionError):
+            self.discard(temporary_path)
+
+    def discard(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+from plox.token import Token
+
+
+# Keys a site remembers before it gives up caching
+POLYMORPHIC_LIMIT = 4
+
+
+# What a lookup returns for keys not cached yet
+MISSING = object()
+
+
+# What a property name meant at one `Get`, `Set` or `Super` node, for each
+# instance shape (or superclass, for `Super`) seen there. Shapes and classes
+# never change once created, so the entries never go stale. A site holds one
+# key (monomorphic) until a second one shows up, then a few more in a dict
+# (polymorphic) and beyond POLYMORPHIC_LIMIT it stops caching (megamorphic)
+# and always looks up.
+class InlineCache:
+
+    __slots__ = ("name", "key", "target", "entries", "megamorphic", "hits", "misses")
+
+    def __init__(self, name: Token):
+        self.name = name
+        self.key: Any = None
+        self.target: Any = MISSING
+        self.entries: Optional[Dict[Any, Any]] = None
+        self.megamorphic = False
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Any) -> Any:
+        if key is self.key:
+            return self.target
+        if self.entries is not None:
+            return self.entries.get(key, MISSING)
+        return MISSING
+
+    def store(self, key: Any, target: Any):
+        if self.key is None or key is self.key:
+            self.key = key
+            self.target = target
+            return
+        if self.megamorphic:
+            return
+
+        entries = self.entries if self.entries is not None else {}
+        if key not in entries and len(entries) + 1 >= POLYMORPHIC_LIMIT:
+            self.entries = None
+            self.megamorphic = True
+        else:
+            entries[key] = target
+            self.entries = entries
+
+    @property
+    def state(self) -> str:
+        if self.megamorphic:
+            return "megamorphic"
+        if self.entries is not None:
+            return "polymorphic"
+        return "monomorphic"
+
+
+def report(caches: List[InlineCache]) -> str:
+    hits = sum(cache.hits for cache in caches)
+    lookups = hits + sum(cache.misses for cache in caches)
+    rate = f"{hits / lookups:.1%}" if lookups else "n/a"
+    lines = [f"inline caches: {len(caches)} sites, {hits} of {lookups} lookups hit ({rate})"]
+    for cache in sorted(caches, key=lambda cache: cache.name.line):
+        lines.append(
+            f"  .{cache.name.lexeme} (line {cache.name.line}): {cache.hits} hits, "
+            f"{cache.misses} misses, {cache.state}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,569 @@
+import operator
+import typing
+from typing import Any, Dict, List, Optional
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import (
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    This,
+    Unary,
+    Variable,
+    Super,
+)
+from plox.ast.expr_visitor import ExprVisitor
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.ast.stmt_visitor import StmtVisitor
+from plox.environment import Cell, LocalEnvironment
+from plox.exceptions import InterpreterError, InterpreterErrorType, PLoxRuntimeError
+from plox.functions import RETURN, Callable, PLoxFunction
+from plox.interpreter import Interpreter
+from plox.oop import PLoxClass, PLoxInstance
+from plox.token import Token, TokenType
+
+
+# Compiled node: takes the environment it runs in and returns the value of
+# an expression (statements return nothing)
+Code = typing.Callable[[Any], Any]
+
+NUMBER_OPERATORS = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.MINUS: operator.sub,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+}
+
+
+# The body of a function declaration, compiled on the first call so that
+# lazily parsed bodies stay unparsed until then
+class FunctionCode:
+
+    __slots__ = ("compiler", "declaration", "run")
+
+    def __init__(self, compiler: "ClosureCompiler", declaration: Function):
+        self.compiler = compiler
+        self.declaration = declaration
+        self.run: Optional[Code] = None
+
+    def get(self) -> Code:
+        if self.run is None:
+            self.run = self.compiler.compile_statements(self.declaration.body)
+        return self.run
+
+
+class CompiledFunction(PLoxFunction):
+
+    def __init__(
+        self,
+        code: FunctionCode,
+        upvalues: List[object],
+        is_initializer: bool,
+        receiver: Optional[PLoxInstance] = None,
+    ):
+        super().__init__(code.declaration, upvalues, is_initializer, receiver)
+        self.code = code
+
+    def call(self, interpreter: "Interpreter", arguments: List[object]):
+        run = self.code.get()
+        environment = self.enter(arguments)
+        try:
+            completion = run(environment)
+        finally:
+            self.release(environment)
+
+        if self.is_initializer: return self.receiver
+
+        return interpreter.take_return_value() if completion is RETURN else None
+
+    # Runs through `call`, which this engine replaces
+    def call_method(
+        self, interpreter: "Interpreter", receiver: PLoxInstance, arguments: List[object]
+    ):
+        return self.bind(receiver).call(interpreter, arguments)
+
+    def bind(self, instance: PLoxInstance):
+        method = CompiledFunction(
+            self.code, self.upvalues, self.is_initializer, instance
+        )
+        method.frames = self.frames
+        return method
+
+
+# Compiles the resolved AST once into a tree of Python closures, one per
+# node, with operators, slots and names bound when the closure is made.
+# Running a node is then a single call instead of `accept`, `visit_*` and a
+# `match` on the operator.
+class ClosureCompiler(ExprVisitor, StmtVisitor):
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals.values
+
+    def compile_statements(self, statements: List[Stmt]) -> Code:
+        codes = [statement.accept(self) for statement in statements]
+        if len(codes) == 1:
+            return codes[0]
+
+        def run(env):
+            for code in codes:
+                if code(env) is RETURN:
+                    return RETURN
+
+        return run
+
+    def compile(self, expr: Expr) -> Code:
+        return expr.accept(self)
+
+    def visit_block_stmt(self, stmt: Block) -> Code:
+        body = self.compile_statements(stmt.statements)
+        if not stmt.scoped:
+            return body
+
+        size = stmt.size
+
+        def block(env):
+            return body(LocalEnvironment(env, size, env.upvalues))
+
+        return block
+
+    def visit_class_stmt(self, stmt: Class) -> Code:
+        interpreter = self.interpreter
+        superclass_code = self.compile(stmt.superclass) if stmt.superclass else None
+        methods = [(method, FunctionCode(self, method)) for method in stmt.methods]
+        define = self.definition(stmt.slot, stmt.boxed, stmt.name)
+
+        def declare_class(env):
+            superclass = None
+            if superclass_code is not None:
+                superclass = superclass_code(env)
+                if not isinstance(superclass, PLoxClass):
+                    assert stmt.superclass is not None
+                    raise PLoxRuntimeError(
+                        stmt.superclass.name, "Superclass must be a class"
+                    )
+
+            functions: Dict[str, PLoxFunction] = {}
+            for method, code in methods:
+                is_initializer = method.name.lexeme == "init"
+                functions[method.name.lexeme] = CompiledFunction(
+                    code, [], is_initializer
+                )
+
+            define(env, PLoxClass(stmt.name.lexeme, superclass, functions))
+
+            creator = env
+            if superclass is not None:
+                creator = LocalEnvironment(env, 1, env.upvalues)
+                creator.values[0] = superclass
+
+            for function in functions.values():
+                function.upvalues = interpreter.capture(function.declaration, creator)
+
+        return declare_class
+
+    def visit_expression_stmt(self, stmt: Expression) -> Code:
+        return self.compile(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function) -> Code:
+        capture = self.interpreter.capture
+        code = FunctionCode(self, stmt)
+        define = self.definition(stmt.slot, stmt.boxed, stmt.name)
+
+        def declare_function(env):
+            function = CompiledFunction(code, [], False)
+            define(env, function)
+            function.upvalues = capture(stmt, env)
+
+        return declare_function
+
+    def visit_if_stmt(self, stmt: If) -> Code:
+        condition = self.compile(stmt.condition)
+        then_branch = stmt.thenBranch.accept(self)
+        if stmt.elseBranch is None:
+
+            def if_then(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+
+            return if_then
+
+        else_branch = stmt.elseBranch.accept(self)
+
+        def if_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return if_else
+
+    def visit_print_stmt(self, stmt: Print) -> Code:
+        expression = self.compile(stmt.expression)
+        stringify = self.interpreter.stringify
+
+        def print_value(env):
+            print(stringify(expression(env)))
+
+        return print_value
+
+    def visit_return_stmt(self, stmt: Return) -> Code:
+        interpreter = self.interpreter
+        if stmt.expr is None:
+
+            def return_nil(env):
+                interpreter.return_value = None
+                return RETURN
+
+            return return_nil
+
+        expression = self.compile(stmt.expr)
+
+        def return_value(env):
+            interpreter.return_value = expression(env)
+            return RETURN
+
+        return return_value
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Code:
+        define = self.definition(stmt.slot, stmt.boxed, stmt.name)
+        if stmt.initializer is None:
+            return lambda env: define(env, None)
+
+        initializer = self.compile(stmt.initializer)
+        slot = stmt.slot
+        if slot is not None and not stmt.boxed:
+
+            def declare_local(env):
+                env.values[slot] = initializer(env)
+
+            return declare_local
+
+        def declare(env):
+            define(env, initializer(env))
+
+        return declare
+
+    def visit_while_stmt(self, stmt: While) -> Code:
+        condition = self.compile(stmt.condition)
+        body = stmt.body.accept(self)
+
+        def loop(env):
+            value = condition(env)
+            while value is not None and value is not False:
+                if body(env) is RETURN:
+                    return RETURN
+                value = condition(env)
+
+        return loop
+
+    # Declarations without a slot were made at the top level
+    def definition(self, slot: Optional[int], boxed: bool, name: Token) -> Code:
+        values = self.globals
+        lexeme = name.lexeme
+
+        if slot is None:
+
+            def define_global(env, value):
+                values[lexeme] = Cell(value) if boxed else value
+
+            return define_global
+
+        def define_local(env, value):
+            env.values[slot] = Cell(value) if boxed else value
+
+        return define_local
+
+    def visit_assign_expr(self, expr: Assign) -> Code:
+        value_code = self.compile(expr.value)
+        slot = expr.slot
+
+        if expr.upvalue is not None:
+            upvalue = expr.upvalue
+
+            def assign_upvalue(env):
+                value = value_code(env)
+                env.upvalues[upvalue].value = value
+                return value
+
+            return assign_upvalue
+
+        if expr.depth is None:
+            assign = self.interpreter.globals.assign
+            name = expr.name
+
+            def assign_global(env):
+                value = value_code(env)
+                assign(name, value)
+                return value
+
+            return assign_global
+
+        index = -1 - expr.depth
+        if expr.boxed:
+
+            def assign_cell(env):
+                value = value_code(env)
+                env.display[index][slot].value = value
+                return value
+
+            return assign_cell
+
+        if index == -1:
+
+            def assign_local(env):
+                value = env.values[slot] = value_code(env)
+                return value
+
+            return assign_local
+
+        def assign_outer(env):
+            value = env.display[index][slot] = value_code(env)
+            return value
+
+        return assign_outer
+
+    def visit_binary_expr(self, expr: Binary) -> Code:
+        left = self.compile(expr.left)
+        right = self.compile(expr.right)
+        token = expr.operator
+
+        match token.token_type:
+            case TokenType.PLUS:
+                stringify = self.interpreter.stringify
+
+                def add(env):
+                    a = left(env)
+                    b = right(env)
+                    if a.__class__ is float and b.__class__ is float:
+                        return a + b
+                    if isinstance(a, str) or isinstance(b, str):
+                        return str(stringify(a)) + str(stringify(b))
+                    raise PLoxRuntimeError(
+                        token, "Operands must be two numbers or two strings"
+                    )
+
+                return add
+
+            case TokenType.BANG_EQUAL:
+                is_equal = self.interpreter.is_equal
+                return lambda env: not is_equal(left(env), right(env))
+
+            case TokenType.EQUAL_EQUAL:
+                is_equal = self.interpreter.is_equal
+                return lambda env: is_equal(left(env), right(env))
+
+            case token_type if token_type in NUMBER_OPERATORS:
+                operate = NUMBER_OPERATORS[token_type]
+
+                def arithmetic(env):
+                    a = left(env)
+                    b = right(env)
+                    if a.__class__ is float and b.__class__ is float:
+                        return operate(a, b)
+                    raise PLoxRuntimeError(token, "Operand must be a number")
+
+                return arithmetic
+
+            case _:
+                raise InterpreterError(InterpreterErrorType.INVALID_BINARY_OPERATOR)
+
+    def visit_call_expr(self, expr: Call) -> Code:
+        interpreter = self.interpreter
+        callee_code = self.compile(expr.callee)
+        argument_codes = [self.compile(argument) for argument in expr.params]
+        paren = expr.paren
+
+        def call(env):
+            callee = callee_code(env)
+
+            if not isinstance(callee, Callable):
+                raise PLoxRuntimeError(paren, "Can only call functions and classes.")
+
+            arguments = [argument(env) for argument in argument_codes]
+
+            if len(arguments) != callee.arity():
+                raise PLoxRuntimeError(
+                    paren,
+                    f"Expected {callee.arity()} arguments but got {len(arguments)}.",
+                )
+
+            return callee.call(interpreter, arguments)
+
+        return call
+
+    def visit_get_expr(self, expr: Get) -> Code:
+        object_code = self.compile(expr.object)
+        name = expr.name
+
+        def get(env):
+            object = object_code(env)
+
+            if isinstance(object, PLoxInstance):
+                return object.get(name)
+
+            raise PLoxRuntimeError(name, "Only instances have fields")
+
+        return get
+
+    def visit_grouping_expr(self, expr: Grouping) -> Code:
+        return self.compile(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> Code:
+        value = expr.value
+        return lambda env: value
+
+    def visit_logical_expr(self, expr: Logical) -> Code:
+        left = self.compile(expr.left)
+        right = self.compile(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+
+            def logical_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return logical_and
+
+    def visit_set_expr(self, expr: Set) -> Code:
+        object_code = self.compile(expr.object)
+        value_code = self.compile(expr.value)
+        name = expr.name
+
+        def set(env):
+            object = object_code(env)
+
+            if not isinstance(object, PLoxInstance):
+                raise PLoxRuntimeError(name, "Only instances have fields")
+
+            value = value_code(env)
+            object.set(name, value)
+            return value
+
+        return set
+
+    def visit_super_expr(self, expr: Super) -> Code:
+        assert expr.receiver is not None
+        superclass_code = self.reference(expr.keyword, expr)
+        receiver_code = self.compile(expr.receiver)
+        method_name = expr.method
+
+        def super_method(env):
+            superclass = superclass_code(env)
+            object = receiver_code(env)
+
+            assert isinstance(superclass, PLoxClass)
+            assert isinstance(object, PLoxInstance)
+
+            method = superclass.find_method(method_name.lexeme)
+
+            if method is None:
+                raise PLoxRuntimeError(
+                    method_name, f"Undefined property '{method_name.lexeme}'."
+                )
+
+            return method.bind(object)
+
+        return super_method
+
+    def visit_this_expr(self, expr: This) -> Code:
+        return self.reference(expr.keyword, expr)
+
+    def visit_unary_expr(self, expr: Unary) -> Code:
+        right = self.compile(expr.right)
+        token = expr.operator
+
+        match token.token_type:
+            case TokenType.MINUS:
+
+                def negate(env):
+                    value = right(env)
+                    if value.__class__ is float:
+                        return -value
+                    raise PLoxRuntimeError(token, "Operand must be a number")
+
+                return negate
+
+            case TokenType.BANG:
+
+                def bang(env):
+                    value = right(env)
+                    return value is None or value is False
+
+                return bang
+
+            case _:
+                raise InterpreterError(InterpreterErrorType.INVALID_UNARY_OPERATOR)
+
+    def visit_variable_expr(self, expr: Variable) -> Code:
+        return self.reference(expr.name, expr)
+
+    def reference(self, name: Token, expr: Super | This | Variable) -> Code:
+        slot = expr.slot
+
+        if expr.upvalue is not None:
+            upvalue = expr.upvalue
+            if expr.boxed:
+                return lambda env: env.upvalues[upvalue].value
+            return lambda env: env.upvalues[upvalue]
+
+        if expr.depth is None:
+            values = self.globals
+            lexeme = name.lexeme
+
+            def read_global(env):
+                try:
+                    return values[lexeme]
+                except KeyError:
+                    raise PLoxRuntimeError(name, f"Undefined variable {lexeme}.")
+
+            return read_global
+
+        index = -1 - expr.depth
+        if expr.boxed:
+            return lambda env: env.display[index][slot].value
+        if index == -1:
+            return lambda env: env.values[slot]
+        return lambda env: env.display[index][slot]
+
+
+class ClosureInterpreter(Interpreter):
+
+    def __init__(self):
+        super().__init__()
+        self.compiler = ClosureCompiler(self)
+
+    def interpret(self, statements: List[Stmt]):
+        try:
+            self.compiler.compile_statements(statements)(self.globals)
+        except PLoxRuntimeError as e:
+            return self.handle_runtime_error(e)
@@ -0,0 +1,219 @@
+from typing import Any, List, Optional
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import Grouping, Literal, Logical, Binary, This, Unary, Variable
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.lazy import LazyFunction
+from plox.resolver import Resolver
+from plox.token import Token, TokenType
+
+
+# Removes code that cannot run or whose result nothing uses, in two steps
+# around resolution:
+#
+# - before it, statements after a `return`, branches of `if` statements
+#   whose condition is a literal and loops whose condition is a false
+#   literal (combine with the optimizer to have conditions folded first);
+# - after it, declarations the resolver saw no reference to. Functions and
+#   classes without a superclass are dropped; variables are dropped when
+#   their initializer cannot fail or have effects, and otherwise replaced by
+#   the initializer alone.
+#
+# Statement lists are changed in place, so the annotations of the resolved
+# nodes that remain stay valid. Every removal is recorded in `removed`.
+class DeadCodeEliminator:
+
+    def __init__(self):
+        self.removed: List[str] = []
+        # Line of the last statement walked, for code without tokens
+        self.line = 0
+
+    def remove_unreachable(self, statements: List[Stmt]):
+        try:
+            self.reachable_statements(statements)
+        except RecursionError:
+            # Nested too deeply to walk; whatever was removed so far is gone
+            pass
+
+    # Removes declarations nothing refers to and returns how many there
+    # were. Removing one may leave others unreferenced, so callers resolve
+    # again and repeat until this returns 0.
+    def remove_unused(self, statements: List[Stmt], resolver: Resolver) -> int:
+        self.resolver = resolver
+        removed = len(self.removed)
+        try:
+            self.used_statements(statements, True)
+        except RecursionError:
+            pass
+        return len(self.removed) - removed
+
+    def record(self, node: Any, message: str):
+        found = line(node)
+        location = f"line {found}" if found else f"near line {self.line}"
+        self.removed.append(f"[{location}] {message}")
+
+    def reachable_statements(self, statements: List[Stmt]):
+        reachable: List[Stmt] = []
+        for index, statement in enumerate(statements):
+            self.line = line(statement) or self.line
+            replacement = self.reachable(statement)
+            if replacement is None:
+                continue
+
+            reachable.append(replacement)
+            if terminates(replacement):
+                for unreachable in statements[index + 1 :]:
+                    self.record(unreachable, "unreachable statement after return")
+                break
+        statements[:] = reachable
+
+    def reachable(self, stmt: Stmt) -> Optional[Stmt]:
+        if isinstance(stmt, If):
+            if isinstance(stmt.condition, Literal):
+                taken = stmt.thenBranch if truthy(stmt.condition) else stmt.elseBranch
+                skipped = stmt.elseBranch if truthy(stmt.condition) else stmt.thenBranch
+                if skipped is not None:
+                    self.record(skipped, "branch that is never taken")
+                return self.reachable(taken) if taken is not None else None
+
+            stmt.thenBranch = self.reachable(stmt.thenBranch) or Block([])
+            if stmt.elseBranch is not None:
+                stmt.elseBranch = self.reachable(stmt.elseBranch)
+
+        elif isinstance(stmt, While):
+            if isinstance(stmt.condition, Literal) and not truthy(stmt.condition):
+                self.record(stmt.body, "loop that never runs")
+                return None
+            stmt.body = self.reachable(stmt.body) or Block([])
+
+        elif isinstance(stmt, Block):
+            self.reachable_statements(stmt.statements)
+
+        elif isinstance(stmt, Function):
+            if not (isinstance(stmt, LazyFunction) and not stmt.is_parsed):
+                self.reachable_statements(stmt.body)
+
+        elif isinstance(stmt, Class):
+            for method in stmt.methods:
+                self.reachable(method)
+
+        return stmt
+
+    def used_statements(self, statements: List[Stmt], top_level: bool = False):
+        used: List[Stmt] = []
+        for statement in statements:
+            self.used_children(statement)
+            if self.is_referenced(statement, top_level):
+                used.append(statement)
+                continue
+
+            if isinstance(statement, Class):
+                message = f"unused class '{statement.name.lexeme}'"
+            elif isinstance(statement, Function):
+                message = f"unused function '{statement.name.lexeme}'"
+            else:
+                assert isinstance(statement, VariableDeclaration)
+                message = f"unused variable '{statement.name.lexeme}'"
+            if isinstance(statement, VariableDeclaration) and statement.initializer is not None:
+                if not is_pure(statement.initializer):
+                    used.append(Expression(statement.initializer))
+                    message += " (its initializer still runs)"
+            self.record(statement, message)
+        statements[:] = used
+
+    def used_children(self, stmt: Stmt):
+        if isinstance(stmt, Block):
+            self.used_statements(stmt.statements)
+        elif isinstance(stmt, If):
+            self.used_children(stmt.thenBranch)
+            if stmt.elseBranch is not None:
+                self.used_children(stmt.elseBranch)
+        elif isinstance(stmt, While):
+            self.used_children(stmt.body)
+        elif isinstance(stmt, Function):
+            if not (isinstance(stmt, LazyFunction) and not stmt.is_parsed):
+                self.used_statements(stmt.body)
+        elif isinstance(stmt, Class):
+            for method in stmt.methods:
+                self.used_children(method)
+
+    def is_referenced(self, stmt: Stmt, top_level: bool) -> bool:
+        if not isinstance(stmt, (Class, Function, VariableDeclaration)):
+            return True
+        if isinstance(stmt, Class) and stmt.superclass is not None:
+            # Evaluating the superclass can fail
+            return True
+
+        if top_level:
+            return (
+                self.resolver.deferred
+                or stmt.name.lexeme in self.resolver.referenced_globals
+            )
+        return stmt in self.resolver.referenced
+
+
+def truthy(expr: Literal) -> bool:
+    return expr.value is not None and expr.value is not False
+
+
+def terminates(stmt: Stmt) -> bool:
+    if isinstance(stmt, Return):
+        return True
+    if isinstance(stmt, Block):
+        return any(terminates(statement) for statement in stmt.statements)
+    if isinstance(stmt, If):
+        return (
+            stmt.elseBranch is not None
+            and terminates(stmt.thenBranch)
+            and terminates(stmt.elseBranch)
+        )
+    return False
+
+
+# Whether evaluating a resolved expression can neither fail nor have effects
+def is_pure(expr: Expr) -> bool:
+    if isinstance(expr, (Literal, This)):
+        return True
+    if isinstance(expr, Variable):
+        # Reading a global fails when it is not defined
+        return expr.depth is not None or expr.upvalue is not None
+    if isinstance(expr, Grouping):
+        return is_pure(expr.expression)
+    if isinstance(expr, Unary):
+        return expr.operator.token_type == TokenType.BANG and is_pure(expr.right)
+    if isinstance(expr, Logical):
+        return is_pure(expr.left) and is_pure(expr.right)
+    if isinstance(expr, Binary):
+        return (
+            expr.operator.token_type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL)
+            and is_pure(expr.left)
+            and is_pure(expr.right)
+        )
+    return False
+
+
+# Line of the first token in a node, for reports
+def line(node: Any) -> int:
+    if isinstance(node, Token):
+        return node.line
+    if isinstance(node, list):
+        children = node
+    elif isinstance(node, (Expr, Stmt)):
+        children = [getattr(node, name, None) for name in node.__match_args__]
+    else:
+        return 0
+
+    for child in children:
+        found = line(child)
+        if found:
+            return found
+    return 0
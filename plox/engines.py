@@ -0,0 +1,15 @@
+from typing import Dict, Type
+from plox.closure_compiler import ClosureInterpreter
+from plox.interpreter import Interpreter
+from plox.jit import JITInterpreter
+from plox.transpiler import TranspilingInterpreter
+from plox.vm import VM
+
+
+ENGINES: Dict[str, Type[Interpreter]] = {
+    "tree": Interpreter,
+    "closures": ClosureInterpreter,
+    "bytecode": VM,
+    "python": TranspilingInterpreter,
+    "jit": JITInterpreter,
+}
@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Dict, List, Optional, Set
 from plox.exceptions import PLoxRuntimeError
 from plox.token import Token
 
@@ -8,8 +8,16 @@ class Environment:
     def __init__(self, enclosing: Optional["Environment"] = None):
         self.enclosing = enclosing
         self.values: Dict[str, object] = {}
+        # Top-level code is not inside a closure
+        self.upvalues: List[object] = []
+        # Names that compiled code assumes keep their value. Rebinding one
+        # moves `version` on, which invalidates that code.
+        self.watched: Set[str] = set()
+        self.version = 0
 
     def define(self, name: str, value: object):
+        if name in self.watched:
+            self.version += 1
         self.values[name] = value
 
     def get(self, name: Token) -> object:
@@ -34,6 +42,8 @@ class Environment:
 
     def assign(self, name: Token, value: object):
         if name.lexeme in self.values:
+            if name.lexeme in self.watched:
+                self.version += 1
             self.values[name.lexeme] = value
             return
 
@@ -45,3 +55,53 @@ class Environment:
 
     def assign_at(self, distance: int, name: Token, value: object):
         self.ancestor(distance).values[name.lexeme] = value
+
+
+# A variable that closures capture and that is assigned after its
+# declaration. The frame and every closure share the cell so they all see
+# the assignment; other captured variables are copied by value.
+class Cell:
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: object):
+        self.value = value
+
+
+# Storage for a function call or a top-level block. The resolver gives every
+# local a slot in the frame that holds it (blocks inside a function share
+# its frame), so accesses index the list directly instead of looking names
+# up. Variables of enclosing functions are reached through `upvalues`, the
+# values (or cells) the running closure captured when it was created.
+#
+# Environments of one activation also keep a display: the slot lists of
+# every environment out to the function frame, innermost last. Any resolved
+# depth is then one index away instead of a walk along `enclosing`, for a
+# copy of the display when a nested environment is created.
+class LocalEnvironment:
+
+    def __init__(
+        self,
+        enclosing: "Environment | LocalEnvironment | None",
+        size: int,
+        upvalues: List[object],
+    ):
+        self.enclosing = enclosing
+        self.values: List[object] = [None] * size
+        self.upvalues = upvalues
+        self.display: List[List[object]] = (
+            enclosing.display + [self.values]
+            if isinstance(enclosing, LocalEnvironment)
+            else [self.values]
+        )
+
+    def get_at(self, distance: int, slot: int) -> object:
+        if distance == 0:
+            return self.values[slot]
+        return self.display[-1 - distance][slot]
+
+    def assign_at(self, distance: int, slot: int, value: object):
+        if distance == 0:
+            self.values[slot] = value
+        else:
+            self.display[-1 - distance][slot] = value
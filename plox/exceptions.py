@@ -35,6 +35,8 @@ class ParserErrorType(Enum):
     MISSING_IDENTIFIER = "Missing identifier"
     MISSING_DOT_AFTER_SUPER = "Missing dot after super"
     MISSING_SUPERCLASS_METHOD = "Missing superclass method"
+    TOO_MANY_PARAMETERS = "Can't have more than 255 parameters"
+    TOO_MANY_ARGUMENTS = "Can't have more than 255 arguments"
 
 
 class ParserError(Exception):
@@ -1,8 +1,8 @@
-from typing import TYPE_CHECKING, List, Any
+from typing import TYPE_CHECKING, Any, List, Optional
 import time
 
 from plox.ast.stmt_types import Function
-from plox.environment import Environment
+from plox.environment import Cell, LocalEnvironment
 
 if TYPE_CHECKING:
     from plox.oop import PLoxInstance
@@ -32,30 +32,100 @@ class Clock(Callable):
         return "<native clock fn>"
 
 
+# Finished frames kept per function; deep recursion would otherwise park one
+# frame per level for as long as the function lives
+FRAME_POOL_SIZE = 4
+
+
 class PLoxFunction(Callable):
 
-    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool):
+    def __init__(
+        self,
+        declaration: Function,
+        upvalues: List[object],
+        is_initializer: bool,
+        receiver: Optional["PLoxInstance"] = None,
+    ):
         self.declaration = declaration
-        self.closure = closure
+        # The captured variables listed by `declaration.captures`
+        self.upvalues = upvalues
         self.is_initializer = is_initializer
+        # `this` of a bound method, kept in slot 0 of its frames
+        self.receiver = receiver
+        # Frames of finished calls; closures copy what they capture, so no
+        # frame outlives its call
+        self.frames: List[LocalEnvironment] = []
 
     def call(self, interpreter: "Interpreter", arguments: List[object]):
-        environment = Environment(self.closure)
-        for i, params in enumerate(self.declaration.params):
-            environment.define(params.lexeme, arguments[i])
+        if interpreter.jit is not None:
+            return interpreter.jit.call(self, arguments)
+        return self.interpret(interpreter, arguments)
+
+    def interpret(
+        self,
+        interpreter: "Interpreter",
+        arguments: List[object],
+        receiver: Optional["PLoxInstance"] = None,
+    ):
+        if receiver is None:
+            receiver = self.receiver
+        body = self.declaration.body
+        environment = self.enter(arguments, receiver)
         try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnException as e:
-            return self.closure.get_at(0, "this") if self.is_initializer else e.value
-
-        if self.is_initializer: return self.closure.get_at(0, "this")
-
-        return None
+            completion = interpreter.execute_block(body, environment)
+        finally:
+            self.release(environment)
+
+        if self.is_initializer: return receiver
+
+        return interpreter.take_return_value() if completion is RETURN else None
+
+    # Calls a method on an instance without binding it first, for calls such
+    # as `object.method()` that would drop the bound method right away
+    def call_method(
+        self, interpreter: "Interpreter", receiver: "PLoxInstance", arguments: List[object]
+    ):
+        if interpreter.jit is not None:
+            # Compiled code reads `this` from the function it is called with
+            return interpreter.jit.call(self.bind(receiver), arguments)
+        return self.interpret(interpreter, arguments, receiver)
+
+    # A frame holding the receiver and the arguments. Lazily parsed bodies
+    # must have been read first, as that is when the frame size is known.
+    def enter(
+        self, arguments: List[object], receiver: Optional["PLoxInstance"] = None
+    ) -> LocalEnvironment:
+        if receiver is None:
+            receiver = self.receiver
+        declaration = self.declaration
+        if self.frames:
+            environment = self.frames.pop()
+        else:
+            environment = LocalEnvironment(None, declaration.size, self.upvalues)
+
+        values = environment.values
+        if receiver is None:
+            values[: len(arguments)] = arguments
+        else:
+            values[0] = receiver
+            values[1 : len(arguments) + 1] = arguments
+        for slot in declaration.cells:
+            values[slot] = Cell(values[slot])
+        return environment
+
+    # Keeps the frame of a finished call for the next one, emptied so that it
+    # holds on to none of the call's values
+    def release(self, environment: LocalEnvironment):
+        if self.declaration.reusable and len(self.frames) < FRAME_POOL_SIZE:
+            environment.values[:] = [None] * len(environment.values)
+            self.frames.append(environment)
 
     def bind(self, instance: "PLoxInstance"):
-        environment = Environment(self.closure)
-        environment.define("this", instance)
-        return PLoxFunction(self.declaration, environment, self.is_initializer)
+        method = PLoxFunction(
+            self.declaration, self.upvalues, self.is_initializer, instance
+        )
+        method.frames = self.frames
+        return method
 
     def arity(self) -> int:
         return len(self.declaration.params)
@@ -64,7 +134,7 @@ class PLoxFunction(Callable):
         return f"<fn {self.declaration.name.lexeme}>"
 
 
-class ReturnException(RuntimeError):
-
-    def __init__(self, value: object):
-        self.value = value
+# What running a `return` statement evaluates to, instead of None, so that
+# the blocks and loops around it stop and pass it on up to the call. The
+# value returned is left in `Interpreter.return_value` until the call takes it.
+RETURN = object()
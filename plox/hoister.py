@@ -0,0 +1,411 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import (
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.eliminator import is_pure, line
+from plox.lazy import LazyFunction
+from plox.resolver import Declaration, Resolver, Scope
+from plox.token import Token, TokenType
+
+
+Binding = Tuple[Scope, str]
+
+# Operations an invariant must contain to be worth a temporary: one in a
+# condition, two in a body, which also pays for the first-iteration check.
+# A call counts as several.
+CONDITION_COST = 1
+BODY_COST = 2
+CALL_COST = 10
+
+
+# What running a loop may change: the locals and globals it assigns, the
+# declarations it runs again on every iteration, whether it stores fields and
+# whether it calls functions that may do any of these.
+class LoopEffects:
+
+    def __init__(self):
+        self.assigned: Set[Binding] = set()
+        self.assigned_globals: Set[str] = set()
+        self.declared: Set[Declaration] = set()
+        self.stores = False
+        self.calls = False
+
+
+# Moves expressions whose value cannot change while a loop runs out of it,
+# using what the resolver found: where each variable is declared, which are
+# assigned and which are shared with closures. Calls are invariant when they
+# call a known function that only computes a value from its arguments.
+#
+# Hoisting must not change which error a program stops with, or what it
+# prints first, so an expression is only moved when everything the loop
+# evaluates before it can neither fail nor be observed. Invariants of the
+# condition are computed before the loop; those of the body once the
+# condition first holds:
+#
+#     { var invariant.0 = n * 2; var invariant.1; var first.2 = true;
+#       while (i < invariant.0) {
+#           if (first.2) { invariant.1 = f(n); first.2 = false; }
+#           ...
+#
+# Runs on resolved statements and changes them in place, so they must be
+# resolved again when `hoist` returns a count other than 0. Bodies of lazily
+# parsed functions are resolved separately and left as they are.
+class LoopInvariantHoister:
+
+    def __init__(self):
+        self.count = 0
+        # Whether everything evaluated since the hoisting point is unobservable
+        self.unfailing = True
+        self.temporaries: Set[Variable] = set()
+        self.purity: Dict[Function, bool] = {}
+        self.checking: List[Function] = []
+
+    def hoist(self, statements: List[Stmt], resolver: Resolver) -> int:
+        self.resolver = resolver
+        # Functions declared once at the top level, by name
+        self.globals: Dict[str, Optional[Declaration]] = {}
+        for statement in statements:
+            if isinstance(statement, (Class, Function, VariableDeclaration)):
+                name = statement.name.lexeme
+                self.globals[name] = None if name in self.globals else statement
+
+        hoisted = self.count
+        try:
+            self.statements(statements)
+        except RecursionError:
+            # Nested too deeply to walk; loops rewritten so far stay rewritten
+            pass
+        return self.count - hoisted
+
+    def statements(self, statements: List[Stmt]):
+        for index, statement in enumerate(statements):
+            statements[index] = self.statement(statement)
+
+    def statement(self, stmt: Stmt) -> Stmt:
+        if isinstance(stmt, Block):
+            self.statements(stmt.statements)
+        elif isinstance(stmt, If):
+            stmt.thenBranch = self.statement(stmt.thenBranch)
+            if stmt.elseBranch is not None:
+                stmt.elseBranch = self.statement(stmt.elseBranch)
+        elif isinstance(stmt, Function):
+            if not isinstance(stmt, LazyFunction):
+                self.statements(stmt.body)
+        elif isinstance(stmt, Class):
+            for method in stmt.methods:
+                self.statement(method)
+        elif isinstance(stmt, While):
+            # Inner loops first, so their invariants can move further out
+            stmt.body = self.statement(stmt.body)
+            return self.loop(stmt)
+        return stmt
+
+    def loop(self, loop: While) -> Stmt:
+        effects = self.effects(loop)
+
+        before: List[Tuple[Token, Expr]] = []
+        self.unfailing = True
+        loop.condition = self.extract(loop.condition, effects, CONDITION_COST, before)
+
+        first: List[Tuple[Token, Expr]] = []
+        self.unfailing = True
+        body = loop.body.statements if isinstance(loop.body, Block) else [loop.body]
+        self.extract_statements(body, effects, first)
+
+        if not before and not first:
+            return loop
+
+        declarations: List[Stmt] = [
+            VariableDeclaration(name, value) for name, value in before
+        ]
+        if first:
+            flag = self.name("first", loop)
+            declarations += [VariableDeclaration(name, None) for name, _ in first]
+            declarations.append(VariableDeclaration(flag, Literal(True)))
+            assignments: List[Stmt] = [
+                Expression(Assign(name, value)) for name, value in first
+            ]
+            assignments.append(Expression(Assign(flag, Literal(False))))
+            check = If(self.temporary(flag), Block(assignments), None)
+            if isinstance(loop.body, Block):
+                loop.body.statements.insert(0, check)
+            else:
+                loop.body = Block([check, loop.body])
+        return Block(declarations + [loop])
+
+    # Hoists from the statements a loop body runs first, up to the first one
+    # that may run other statements, skip some or leave the loop
+    def extract_statements(
+        self,
+        statements: List[Stmt],
+        effects: LoopEffects,
+        hoisted: List[Tuple[Token, Expr]],
+    ):
+        for stmt in statements:
+            if not self.unfailing:
+                return
+
+            if isinstance(stmt, Block):
+                self.extract_statements(stmt.statements, effects, hoisted)
+            elif isinstance(stmt, Expression):
+                stmt.expression = self.extract(stmt.expression, effects, BODY_COST, hoisted)
+            elif isinstance(stmt, VariableDeclaration):
+                if stmt.initializer is not None:
+                    stmt.initializer = self.extract(
+                        stmt.initializer, effects, BODY_COST, hoisted
+                    )
+            elif isinstance(stmt, Print):
+                stmt.expression = self.extract(stmt.expression, effects, BODY_COST, hoisted)
+                self.unfailing = False
+            elif isinstance(stmt, If):
+                stmt.condition = self.extract(stmt.condition, effects, BODY_COST, hoisted)
+                self.unfailing = False
+            elif isinstance(stmt, Return):
+                if stmt.expr is not None:
+                    stmt.expr = self.extract(stmt.expr, effects, BODY_COST, hoisted)
+                self.unfailing = False
+            elif isinstance(stmt, Function) or (
+                isinstance(stmt, Class) and stmt.superclass is None
+            ):
+                # Declaring them has no effect beyond the declared name
+                continue
+            else:
+                self.unfailing = False
+
+    # Replaces the invariants of an expression by temporaries, following the
+    # order the interpreter evaluates it in
+    def extract(
+        self,
+        expr: Expr,
+        effects: LoopEffects,
+        cost: int,
+        hoisted: List[Tuple[Token, Expr]],
+    ) -> Expr:
+        if not self.unfailing:
+            return expr
+
+        if self.cost(expr) >= cost and self.invariant(expr, effects):
+            name = self.name("invariant", expr)
+            hoisted.append((name, expr))
+            self.count += 1
+            return self.temporary(name)
+
+        if isinstance(expr, Grouping):
+            expr.expression = self.extract(expr.expression, effects, cost, hoisted)
+        elif isinstance(expr, Binary):
+            expr.left = self.extract(expr.left, effects, cost, hoisted)
+            expr.right = self.extract(expr.right, effects, cost, hoisted)
+        elif isinstance(expr, Unary):
+            expr.right = self.extract(expr.right, effects, cost, hoisted)
+        elif isinstance(expr, Logical):
+            # The right operand does not always run
+            expr.left = self.extract(expr.left, effects, cost, hoisted)
+        elif isinstance(expr, Call):
+            expr.callee = self.extract(expr.callee, effects, cost, hoisted)
+            expr.params = [
+                self.extract(argument, effects, cost, hoisted)
+                for argument in expr.params
+            ]
+        elif isinstance(expr, Get):
+            expr.object = self.extract(expr.object, effects, cost, hoisted)
+        elif isinstance(expr, Assign):
+            expr.value = self.extract(expr.value, effects, cost, hoisted)
+
+        if not is_pure(expr):
+            self.unfailing = False
+        return expr
+
+    def name(self, prefix: str, node: Expr | Stmt) -> Token:
+        return Token(TokenType.IDENTIFIER, f"{prefix}.{self.count}", line(node))
+
+    def temporary(self, name: Token) -> Variable:
+        variable = Variable(name)
+        # Reads like a local until the statements are resolved again
+        variable.depth = 0
+        self.temporaries.add(variable)
+        return variable
+
+    def cost(self, expr: Expr) -> int:
+        if isinstance(expr, Call):
+            return CALL_COST + sum(self.cost(argument) for argument in expr.params)
+        if isinstance(expr, (Binary, Logical)):
+            return 1 + self.cost(expr.left) + self.cost(expr.right)
+        if isinstance(expr, Unary):
+            return 1 + self.cost(expr.right)
+        if isinstance(expr, Get):
+            return 1 + self.cost(expr.object)
+        if isinstance(expr, Grouping):
+            return self.cost(expr.expression)
+        return 0
+
+    def effects(self, loop: While) -> LoopEffects:
+        effects = LoopEffects()
+        for node in walk(loop):
+            if isinstance(node, Assign):
+                binding = self.resolver.bindings.get(node)
+                if binding is None:
+                    effects.assigned_globals.add(node.name.lexeme)
+                else:
+                    effects.assigned.add(binding)
+            elif isinstance(node, (Class, Function, VariableDeclaration)):
+                effects.declared.add(node)
+            elif isinstance(node, Call):
+                function = self.callee(node.callee)
+                if function is None or not self.pure(function):
+                    effects.calls = True
+            elif isinstance(node, Set):
+                effects.stores = True
+        return effects
+
+    def invariant(self, expr: Expr, effects: LoopEffects) -> bool:
+        if isinstance(expr, (Literal, This)):
+            return True
+        if isinstance(expr, Variable):
+            return self.variable_invariant(expr, effects)
+        if isinstance(expr, Grouping):
+            return self.invariant(expr.expression, effects)
+        if isinstance(expr, Unary):
+            return self.invariant(expr.right, effects)
+        if isinstance(expr, (Binary, Logical)):
+            return self.invariant(expr.left, effects) and self.invariant(
+                expr.right, effects
+            )
+        if isinstance(expr, Get):
+            # Any field store may store to this object too
+            return (
+                not effects.stores
+                and not effects.calls
+                and self.invariant(expr.object, effects)
+            )
+        if isinstance(expr, Call):
+            function = self.callee(expr.callee)
+            return (
+                function is not None
+                and self.pure(function)
+                and self.invariant(expr.callee, effects)
+                and all(self.invariant(argument, effects) for argument in expr.params)
+            )
+        return False
+
+    def variable_invariant(self, expr: Variable, effects: LoopEffects) -> bool:
+        if expr in self.temporaries:
+            return False
+
+        binding = self.resolver.bindings.get(expr)
+        if binding is None:
+            name = expr.name.lexeme
+            if name in effects.assigned_globals:
+                return False
+            return not effects.calls or not self.global_assigned(name)
+
+        scope, name = binding
+        if scope.declarations.get(name) in effects.declared:
+            return False
+        if binding in effects.assigned:
+            return False
+        # Closures the loop calls may assign it
+        return not effects.calls or not scope.boxed(name)
+
+    def global_assigned(self, name: str) -> bool:
+        # Lazily parsed bodies may assign any global
+        return self.resolver.deferred or name in self.resolver.assigned_globals
+
+    # The function a callee always refers to, if it is known
+    def callee(self, expr: Expr) -> Optional[Function]:
+        if not isinstance(expr, Variable) or expr in self.temporaries:
+            return None
+
+        binding = self.resolver.bindings.get(expr)
+        if binding is None:
+            if self.global_assigned(expr.name.lexeme):
+                return None
+            declaration = self.globals.get(expr.name.lexeme)
+        else:
+            scope, name = binding
+            if name in scope.assigned:
+                return None
+            declaration = scope.declarations.get(name)
+
+        if isinstance(declaration, Function) and not isinstance(declaration, LazyFunction):
+            return declaration
+        return None
+
+    # Whether a function only computes a value from its arguments: it prints,
+    # stores and reads no fields, assigns only its own locals, reads only
+    # variables that never change and calls only functions like itself.
+    # Mutually recursive functions are not trusted to be.
+    def pure(self, function: Function) -> bool:
+        if function in self.purity:
+            return self.purity[function]
+        if function in self.checking:
+            return function is self.checking[-1]
+
+        self.checking.append(function)
+        try:
+            pure = all(self.pure_node(node) for node in walk_body(function))
+        finally:
+            self.checking.pop()
+        self.purity[function] = pure
+        return pure
+
+    def pure_node(self, node: Expr | Stmt) -> bool:
+        if isinstance(node, (Print, Class, Function, Get, Set, Super)):
+            return False
+        if isinstance(node, Assign):
+            return node.depth is not None
+        if isinstance(node, Variable):
+            if node.depth is not None:
+                return True
+            if node.upvalue is not None:
+                return not node.boxed
+            return not self.global_assigned(node.name.lexeme) and (
+                self.globals.get(node.name.lexeme) is not None
+            )
+        if isinstance(node, Call):
+            function = self.callee(node.callee)
+            return function is not None and self.pure(function)
+        return True
+
+
+# Every node of a statement, nested functions included
+def walk(node: Expr | Stmt) -> Iterator[Expr | Stmt]:
+    yield node
+    if isinstance(node, LazyFunction):
+        # Resolved separately, once parsed
+        return
+
+    for name in node.__match_args__:
+        child = getattr(node, name)
+        children = child if isinstance(child, list) else [child]
+        for child in children:
+            if isinstance(child, (Expr, Stmt)):
+                yield from walk(child)
+
+
+def walk_body(function: Function) -> Iterator[Expr | Stmt]:
+    for statement in function.body:
+        yield from walk(statement)
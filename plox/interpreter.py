@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from plox.ast.expr_interface import Expr
 from plox.ast.expr_types import (
     Assign,
@@ -28,28 +28,49 @@ from plox.ast.stmt_types import (
     While,
 )
 from plox.ast.stmt_visitor import StmtVisitor
-from plox.oop import PLoxClass, PLoxInstance
-from plox.functions import Callable, Clock, PLoxFunction, ReturnException
-from plox.environment import Environment
+from plox.caches import MISSING, InlineCache
+from plox.oop import PLoxClass, PLoxInstance, Shape
+from plox.functions import RETURN, Callable, Clock, PLoxFunction
+from plox.environment import Cell, Environment, LocalEnvironment
 from plox.exceptions import InterpreterError, InterpreterErrorType, PLoxRuntimeError
 from plox.token import Token, TokenType
 
+if TYPE_CHECKING:
+    from plox.jit import JIT
+
 
 class Interpreter(ExprVisitor, StmtVisitor):
 
     def __init__(self):
         self.had_runtime_error = False
         self.globals = Environment()
-        self.environment = self.globals
-        self.locals: Dict[Expr, int] = {}
+        self.environment: Environment | LocalEnvironment = self.globals
+        # Profiles calls and loops to promote hot functions, when enabled
+        self.jit: Optional["JIT"] = None
+        # The inline caches of the property accesses this interpreter ran,
+        # collected only when they are to be reported since each one keeps
+        # its names and targets alive
+        self.caches: Optional[List[InlineCache]] = None
+        # The value of the last `return` run, read by the call it ends
+        self.return_value: object = None
 
         self.initialize_globals()
 
     def initialize_globals(self):
         self.globals.define("clock", Clock())
 
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+    def resolve(
+        self,
+        expr: Assign | Super | This | Variable,
+        depth: Optional[int],
+        slot: int,
+        upvalue: Optional[int] = None,
+        boxed: bool = False,
+    ):
+        expr.depth = depth
+        expr.slot = slot
+        expr.upvalue = upvalue
+        expr.boxed = boxed
 
     def interpret(self, statements: List[Stmt]):
         try:
@@ -62,7 +83,15 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return stmt.accept(self)
 
     def visit_block_stmt(self, stmt: Block) -> Any:
-        self.execute_block(stmt.statements, Environment(self.environment))
+        if stmt.scoped:
+            environment = LocalEnvironment(
+                self.environment, stmt.size, self.environment.upvalues
+            )
+            return self.execute_block(stmt.statements, environment)
+
+        for statement in stmt.statements:
+            if self.execute(statement) is RETURN:
+                return RETURN
 
     def visit_class_stmt(self, stmt: Class) -> Any:
         superclass = None
@@ -73,38 +102,49 @@ class Interpreter(ExprVisitor, StmtVisitor):
                     stmt.superclass.name, "Superclass must be a class"
                 )
 
-        self.environment.define(stmt.name.lexeme, None)
-
-        if stmt.superclass is not None:
-            self.environment = Environment(self.environment)
-            self.environment.define("super", superclass)
-
         methods: Dict[str, PLoxFunction] = {}
         for method in stmt.methods:
-            function = PLoxFunction(
-                method, self.environment, method.name.lexeme == "init"
-            )
+            function = PLoxFunction(method, [], method.name.lexeme == "init")
             methods[method.name.lexeme] = function
 
         plox_class = PLoxClass(stmt.name.lexeme, superclass, methods)
+        self.define(stmt.slot, stmt.boxed, stmt.name, plox_class)
 
-        if superclass is not None:
-            self.environment = self.environment.enclosing
+        # Methods capture after the class is defined, so they can refer to it.
+        # `super` lives in an environment of its own around them.
+        creator = self.environment
+        if stmt.superclass is not None:
+            creator = LocalEnvironment(self.environment, 1, self.environment.upvalues)
+            creator.values[0] = superclass
 
-        self.environment.assign(stmt.name, plox_class)
+        for function in methods.values():
+            function.upvalues = self.capture(function.declaration, creator)
 
     def visit_expression_stmt(self, stmt: Expression):
         self.evaluate(stmt.expression)
 
     def visit_function_stmt(self, stmt: Function) -> Any:
-        function = PLoxFunction(stmt, self.environment, False)
-        self.environment.define(stmt.name.lexeme, function)
+        function = PLoxFunction(stmt, [], False)
+        self.define(stmt.slot, stmt.boxed, stmt.name, function)
+        # Captured after the definition so recursive functions see themselves
+        function.upvalues = self.capture(stmt, self.environment)
+
+    def capture(
+        self, function: Function, environment: Environment | LocalEnvironment
+    ) -> List[object]:
+        upvalues: List[object] = []
+        for depth, slot in function.captures:
+            if depth is None:
+                upvalues.append(environment.upvalues[slot])
+            else:
+                upvalues.append(environment.get_at(depth, slot))  # type: ignore
+        return upvalues
 
     def visit_if_stmt(self, stmt: If) -> Any:
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.thenBranch)
+            return self.execute(stmt.thenBranch)
         elif stmt.elseBranch is not None:
-            self.execute(stmt.elseBranch)
+            return self.execute(stmt.elseBranch)
 
     def visit_print_stmt(self, stmt: Print):
         value = self.stringify(self.evaluate(stmt.expression))
@@ -115,20 +155,46 @@ class Interpreter(ExprVisitor, StmtVisitor):
         if stmt.initializer is not None:
             value = self.evaluate(stmt.initializer)
 
-        self.environment.define(stmt.name.lexeme, value)
+        self.define(stmt.slot, stmt.boxed, stmt.name, value)
+
+    # Declarations without a slot were made at the top level
+    def define(self, slot: Optional[int], boxed: bool, name: Token, value: object):
+        if boxed:
+            value = Cell(value)
+        if slot is None:
+            self.globals.define(name.lexeme, value)
+        else:
+            self.environment.values[slot] = value  # type: ignore
 
     def visit_while_stmt(self, stmt: While) -> Any:
-        while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+        if self.jit is None:
+            while self.is_truthy(self.evaluate(stmt.condition)):
+                if self.execute(stmt.body) is RETURN:
+                    return RETURN
+            return
+
+        back_edges = 0
+        try:
+            while self.is_truthy(self.evaluate(stmt.condition)):
+                if self.execute(stmt.body) is RETURN:
+                    return RETURN
+                back_edges += 1
+        finally:
+            self.jit.count_back_edges(back_edges)
 
     def visit_assign_expr(self, expr: Assign) -> Any:
         value = self.evaluate(expr.value)
 
-        distance = self.locals.get(expr)
-        if distance is not None:
-            self.environment.assign_at(distance, expr.name, value)
-        else:
+        if expr.upvalue is not None:
+            cell = self.environment.upvalues[expr.upvalue]
+            assert isinstance(cell, Cell)
+            cell.value = value
+        elif expr.depth is None:
             self.globals.assign(expr.name, value)
+        elif expr.boxed:
+            self.environment.get_at(expr.depth, expr.slot).value = value  # type: ignore
+        else:
+            self.environment.assign_at(expr.depth, expr.slot, value)  # type: ignore
 
         return value
 
@@ -149,11 +215,37 @@ class Interpreter(ExprVisitor, StmtVisitor):
 
     def visit_get_expr(self, expr: Get) -> Any:
         object = self.evaluate(expr.object)
+        method, value = self.get_property(expr, object)
+        return value if method is None else method.bind(object)
 
-        if isinstance(object, PLoxInstance):
-            return object.get(expr.name)
+    # The method a property names on an instance, unbound, or None and the
+    # value of the field it names
+    def get_property(self, expr: Get, object: Any) -> Tuple[Optional[PLoxFunction], Any]:
+        if not isinstance(object, PLoxInstance):
+            raise PLoxRuntimeError(expr.name, "Only instances have fields")
 
-        raise PLoxRuntimeError(expr.name, "Only instances have fields")
+        # A shape settles both the fields an instance has and its class, so
+        # the slot or method found for it holds for every instance with it
+        cache = expr.cache or self.inline_cache(expr)
+        shape = object.shape
+        target = cache.lookup(shape)
+        if target is not MISSING:
+            cache.hits += 1
+            if isinstance(target, int):
+                return None, object.values[target]
+            return target, None
+
+        cache.misses += 1
+        index = shape.indices.get(expr.name.lexeme)
+        if index is not None:
+            cache.store(shape, index)
+            return None, object.values[index]
+
+        method = object.plox_class.find_method(expr.name.lexeme)
+        if method is None:
+            raise PLoxRuntimeError(expr.name, f"Undefined property {expr.name.lexeme}")
+        cache.store(shape, method)
+        return method, None
 
     def visit_set_expr(self, expr: Set) -> Any:
         object = self.evaluate(expr.object)
@@ -163,29 +255,57 @@ class Interpreter(ExprVisitor, StmtVisitor):
 
         value = self.evaluate(expr.value)
 
-        object.set(expr.name, value)
+        # The slot of an existing field, or the shape that adds it
+        cache = expr.cache or self.inline_cache(expr)
+        shape = object.shape
+        target = cache.lookup(shape)
+        if target is not MISSING:
+            cache.hits += 1
+        else:
+            cache.misses += 1
+            index = shape.indices.get(expr.name.lexeme)
+            target = shape.with_field(expr.name.lexeme) if index is None else index
+            cache.store(shape, target)
+
+        if isinstance(target, Shape):
+            object.shape = target
+            object.values.append(value)
+        else:
+            object.values[target] = value
         return value
 
     def visit_super_expr(self, expr: Super) -> Any:
-        distance = self.locals.get(expr)
+        assert expr.receiver is not None
 
-        assert isinstance(distance, int)
-
-        superclass = self.environment.get_at(distance, "super")
-        object = self.environment.get_at(distance - 1, "this")
+        superclass = self.lookup_variables(expr.keyword, expr)
+        object = self.evaluate(expr.receiver)
 
         assert isinstance(superclass, PLoxClass)
         assert isinstance(object, PLoxInstance)
 
+        cache = expr.cache or self.inline_cache(expr)
+        method = cache.lookup(superclass)
+        if method is not MISSING:
+            cache.hits += 1
+            return method.bind(object)
+
+        cache.misses += 1
         method = superclass.find_method(expr.method.lexeme)
 
         if method is None:
-            raise RuntimeError(
+            raise PLoxRuntimeError(
                 expr.method, f"Undefined property '{expr.method.lexeme}'."
             )
 
+        cache.store(superclass, method)
         return method.bind(object)
 
+    def inline_cache(self, expr: Get | Set | Super) -> InlineCache:
+        expr.cache = InlineCache(expr.method if isinstance(expr, Super) else expr.name)
+        if self.caches is not None:
+            self.caches.append(expr.cache)
+        return expr.cache
+
     def visit_this_expr(self, expr: This) -> Any:
         return self.lookup_variables(expr.keyword, expr)
 
@@ -244,7 +364,7 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 if isinstance(left, str) or isinstance(right, str):
                     return str(self.stringify(left)) + str(self.stringify(right))
 
-                raise RuntimeError(
+                raise PLoxRuntimeError(
                     expr.operator, "Operands must be two numbers or two strings"
                 )
 
@@ -260,11 +380,23 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 raise InterpreterError(InterpreterErrorType.INVALID_BINARY_OPERATOR)
 
     def visit_call_expr(self, expr: Call) -> Any:
-        callee: Any = self.evaluate(expr.callee)
+        if isinstance(expr.callee, Get):
+            # A method called where it is looked up runs with the instance as
+            # `this` directly; only methods used as values get bound
+            object = self.evaluate(expr.callee.object)
+            method, callee = self.get_property(expr.callee, object)
+            if method is not None:
+                arguments = self.arguments(expr, method)
+                return method.call_method(self, object, arguments)
+        else:
+            callee = self.evaluate(expr.callee)
 
         if not isinstance(callee, Callable):
             raise PLoxRuntimeError(expr.paren, "Can only call functions and classes.")
 
+        return callee.call(self, self.arguments(expr, callee))
+
+    def arguments(self, expr: Call, callee: Callable) -> List[Any]:
         arguments: List[Any] = []
         for argument in expr.params:
             arguments.append(self.evaluate(argument))
@@ -275,32 +407,42 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 f"Expected {callee.arity()} arguments but got {len(arguments)}.",
             )
 
-        return callee.call(self, arguments)
+        return arguments
 
     def visit_return_stmt(self, stmt: Return) -> Any:
-        value = self.evaluate(stmt.expr) if stmt.expr is not None else None
-        raise ReturnException(value)
+        self.return_value = self.evaluate(stmt.expr) if stmt.expr is not None else None
+        return RETURN
+
+    # Hands the value of the last `return` to the call it ends, so that the
+    # interpreter does not keep it alive after that call
+    def take_return_value(self) -> object:
+        value, self.return_value = self.return_value, None
+        return value
 
     def visit_variable_expr(self, expr: Variable) -> Any:
         return self.lookup_variables(expr.name, expr)
 
-    def lookup_variables(self, name: Token, expr: Expr) -> object:
-        distance = self.locals.get(expr)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
-        return self.globals.get(name)
+    def lookup_variables(self, name: Token, expr: Super | This | Variable) -> object:
+        if expr.upvalue is not None:
+            value = self.environment.upvalues[expr.upvalue]
+        elif expr.depth is not None:
+            value = self.environment.get_at(expr.depth, expr.slot)  # type: ignore
+        else:
+            return self.globals.get(name)
+        return value.value if expr.boxed else value  # type: ignore
 
     def evaluate(self, expr: Expr):
         return expr.accept(self)
 
-    def execute_block(self, statements: List[Stmt], environment: Environment):
+    def execute_block(self, statements: List[Stmt], environment: LocalEnvironment):
         previous_env = self.environment
 
         try:
             self.environment = environment
 
             for statement in statements:
-                self.execute(statement)
+                if self.execute(statement) is RETURN:
+                    return RETURN
 
         finally:
             self.environment = previous_env
@@ -0,0 +1,359 @@
+import typing
+from typing import Any, Dict, List, Optional
+from plox.ast.expr_types import Assign, Call, Get, Set, Super, Variable
+from plox.ast.stmt_types import Class, Expression, Function
+from plox.functions import Callable, PLoxFunction
+from plox.interpreter import Interpreter
+from plox.oop import PLoxClass, PLoxInstance
+from plox.token import Token
+from plox.transpiler import FunctionContext, PythonTranspiler, fail, runtime_helpers
+
+
+CALL_THRESHOLD = 100
+LOOP_THRESHOLD = 1000
+# Compiled code that keeps being invalidated is not worth compiling again
+MAX_DEOPTIMIZATIONS = 3
+
+
+class Uncompilable(Exception):
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+# What the JIT knows about one function declaration: how often it ran under
+# the tree-walker and the Python code it was promoted to, if any
+class Profile:
+
+    __slots__ = ("declaration", "calls", "back_edges", "code", "promotions", "deoptimizations", "failure")
+
+    def __init__(self, declaration: Function):
+        self.declaration = declaration
+        self.calls = 0
+        self.back_edges = 0
+        self.code: Optional[typing.Callable[..., Any]] = None
+        # Call and back edge counts at each promotion
+        self.promotions: List[typing.Tuple[int, int]] = []
+        self.deoptimizations = 0
+        self.failure: Optional[str] = None
+
+
+# Translates the body of one hot function into a Python function taking the
+# PLoxFunction being called and its arguments. The code works on the values
+# of the tree-walker (instances, classes, globals environment), so compiled
+# and interpreted functions call each other freely.
+#
+# Calls to a global holding a function are bound to that function directly.
+# That assumes the global is not rebound; the globals environment watches
+# such names and the code checks its version, falling back to a generic
+# call inside a running activation and to the tree-walker on the next one.
+class FunctionCompiler(PythonTranspiler):
+
+    def __init__(self, jit: "JIT", function: PLoxFunction, name: str):
+        super().__init__(jit.tokens)
+        self.jit = jit
+        self.function = function
+        self.name = name
+        self.globals = jit.interpreter.globals
+        self.speculated = False
+
+    def compile(self) -> str:
+        declaration = self.function.declaration
+        self.context = FunctionContext()
+        self.context.initializer = self.function.is_initializer
+        self.indent = 1
+
+        prologue: List[str] = []
+        parameters = ["function"]
+        slot = 0
+        if self.function.receiver is not None:
+            prologue.append("this_0 = function.receiver")
+            self.context.names[(0, 0)] = "this_0"
+            slot = 1
+        for param in declaration.params:
+            parameters.append(self.target(param, slot))
+            slot += 1
+        if declaration.captures:
+            upvalues = "".join(f"_u{index}, " for index in range(len(declaration.captures)))
+            prologue.append(f"{upvalues}= function.upvalues")
+        for cell in declaration.cells:
+            name = self.context.names[(0, cell)]
+            prologue.append(f"{name} = Cell({name})")
+
+        for statement in declaration.body:
+            statement.accept(self)
+        if self.context.initializer:
+            self.emit("return this_0")
+
+        arguments = ", ".join(parameters[1:])
+        lines = [f"def {self.name}({', '.join(parameters)}):"]
+        lines.append(f"    {declaration.name.lexeme!r}")
+        if self.speculated:
+            lines.append(
+                f"    if E.version != {self.globals.version}:"
+                f" return deoptimize({self.name}, function, [{arguments}])"
+            )
+        lines.extend("    " + line for line in prologue)
+        lines.extend("    " * indent + text for indent, text, _ in self.context.lines)
+        return "".join(line + "\n" for line in lines)
+
+    def constant(self, value: Any) -> str:
+        return self.jit.constant(value)
+
+    def global_value(self, name: Token) -> str:
+        self.line = name.line
+        if name.lexeme in self.globals.values:
+            # Globals are never removed, so a defined one needs no check
+            return f"V[{name.lexeme!r}]"
+        return f"E.get({self.token(name)})"
+
+    def visit_class_stmt(self, stmt: Class) -> Any:
+        raise Uncompilable("declares a class")
+
+    def visit_function_stmt(self, stmt: Function) -> Any:
+        raise Uncompilable("declares a function")
+
+    def visit_expression_stmt(self, stmt: Expression) -> Any:
+        if isinstance(stmt.expression, Assign):
+            self.assign_statement(stmt.expression)
+        else:
+            self.emit(self.expression(stmt.expression))
+
+    def assign_statement(self, expr: Assign):
+        if expr.depth is not None or expr.upvalue is not None:
+            return super().assign_statement(expr)
+
+        value = self.expression(expr.value)
+        self.emit(f"E.assign({self.token(expr.name)}, {value})")
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        if expr.depth is not None or expr.upvalue is not None:
+            return super().visit_assign_expr(expr)
+
+        value = self.expression(expr.value)
+        return f"set_global({self.token(expr.name)}, {value})"
+
+    def visit_variable_expr(self, expr: Variable) -> Any:
+        if expr.depth is None and expr.upvalue is None:
+            return self.global_value(expr.name)
+        return super().visit_variable_expr(expr)
+
+    def visit_call_expr(self, expr: Call) -> Any:
+        callee = self.expression(expr.callee)
+        arguments = ", ".join(self.expression(argument) for argument in expr.params)
+        error = self.token(expr.paren)
+        call = f"call({error}, {callee}, [{arguments}])"
+
+        target = self.call_target(expr)
+        if target is None:
+            return call
+
+        assert isinstance(expr.callee, Variable)
+        self.speculated = True
+        self.globals.watched.add(expr.callee.name.lexeme)
+        constant = self.constant(target)
+        profile = self.jit.profiles.get(target.declaration)
+        if target.declaration is self.function.declaration:
+            direct = f"{self.name}({constant}, {arguments})"
+        elif profile is not None and profile.code is not None:
+            direct = f"{self.constant(profile.code)}({constant}, {arguments})"
+        else:
+            direct = f"{constant}.call(I, [{arguments}])"
+
+        return f"({direct} if E.version == {self.globals.version} else {call})"
+
+    # The function a call will reach while its global is not rebound
+    def call_target(self, expr: Call) -> Optional[PLoxFunction]:
+        callee = expr.callee
+        if not isinstance(callee, Variable) or callee.depth is not None or callee.upvalue is not None:
+            return None
+
+        value = self.globals.values.get(callee.name.lexeme)
+        if (
+            type(value) is PLoxFunction
+            and value.receiver is None
+            and value.arity() == len(expr.params)
+        ):
+            return value
+        return None
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        object = self.expression(expr.object)
+        return f"get({object}, {self.token(expr.name)})"
+
+    def visit_set_expr(self, expr: Set) -> Any:
+        object = self.expression(expr.object)
+        temp = self.context.temp()
+        error = self.token(expr.name)
+        checked = f"({temp} if isinstance({temp} := {object}, PLoxInstance) else not_instance({error}))"
+        return f"set_field({checked}, {error}, {self.expression(expr.value)})"
+
+    def visit_super_expr(self, expr: Super) -> Any:
+        assert expr.receiver is not None
+        superclass = self.load(expr.keyword.lexeme, expr)
+        receiver = self.load(expr.receiver.keyword.lexeme, expr.receiver)
+        return f"super_method({superclass}, {receiver}, {self.token(expr.method)})"
+
+
+# Counts calls and loop back edges of functions run by the tree-walker and
+# promotes those that get hot to compiled Python code
+class JIT:
+
+    def __init__(
+        self,
+        interpreter: Interpreter,
+        call_threshold: int = CALL_THRESHOLD,
+        loop_threshold: int = LOOP_THRESHOLD,
+    ):
+        self.interpreter = interpreter
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        self.profiles: Dict[Function, Profile] = {}
+        # Profiles of the interpreted calls in progress, innermost last
+        self.active: List[Profile] = []
+        self.tokens: List[Token] = []
+        self.constants = 0
+        self.namespace = self.runtime()
+
+    def runtime(self) -> Dict[str, Any]:
+        interpreter = self.interpreter
+        globals = interpreter.globals
+
+        def call(token: Token, callee: Any, arguments: List[Any]) -> Any:
+            if not isinstance(callee, Callable):
+                fail(token, "Can only call functions and classes.")
+            if len(arguments) != callee.arity():
+                fail(token, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+            return callee.call(interpreter, arguments)
+
+        def get(object: Any, token: Token) -> Any:
+            if isinstance(object, PLoxInstance):
+                return object.get(token)
+            fail(token, "Only instances have fields")
+
+        def set_field(object: PLoxInstance, token: Token, value: Any) -> Any:
+            object.set(token, value)
+            return value
+
+        def set_global(token: Token, value: Any) -> Any:
+            globals.assign(token, value)
+            return value
+
+        def super_method(superclass: PLoxClass, receiver: PLoxInstance, token: Token) -> Any:
+            method = superclass.find_method(token.lexeme)
+            if method is None:
+                fail(token, f"Undefined property '{token.lexeme}'.")
+            return method.bind(receiver)
+
+        namespace = runtime_helpers(interpreter.stringify)
+        namespace.update(
+            I=interpreter,
+            E=globals,
+            V=globals.values,
+            T=self.tokens,
+            PLoxInstance=PLoxInstance,
+            call=call,
+            get=get,
+            set_field=set_field,
+            set_global=set_global,
+            super_method=super_method,
+            deoptimize=self.deoptimize,
+        )
+        return namespace
+
+    def constant(self, value: Any) -> str:
+        name = f"K{self.constants}"
+        self.constants += 1
+        self.namespace[name] = value
+        return name
+
+    def call(self, function: PLoxFunction, arguments: List[Any]) -> Any:
+        profile = self.profiles.get(function.declaration)
+        if profile is None:
+            profile = self.profiles[function.declaration] = Profile(function.declaration)
+
+        code = profile.code
+        if code is None:
+            profile.calls += 1
+            if profile.failure is None and (
+                profile.calls >= self.call_threshold
+                or profile.back_edges >= self.loop_threshold
+            ):
+                code = self.promote(profile, function)
+
+        if code is not None:
+            return code(function, *arguments)
+
+        self.active.append(profile)
+        try:
+            return function.interpret(self.interpreter, arguments)
+        finally:
+            self.active.pop()
+
+    def count_back_edges(self, back_edges: int):
+        if self.active:
+            self.active[-1].back_edges += back_edges
+
+    def promote(self, profile: Profile, function: PLoxFunction) -> Optional[typing.Callable[..., Any]]:
+        declaration = function.declaration
+        name = f"{declaration.name.lexeme}_jit{len(self.profiles)}_{len(profile.promotions)}"
+        try:
+            source = FunctionCompiler(self, function, name).compile()
+            exec(compile(source, f"<jit {declaration.name.lexeme}>", "exec"), self.namespace)
+        except Uncompilable as e:
+            profile.failure = e.reason
+            return None
+        except (RecursionError, SyntaxError) as e:
+            profile.failure = f"too complex to compile ({e.__class__.__name__})"
+            return None
+
+        profile.code = self.namespace[name]
+        profile.promotions.append((profile.calls, profile.back_edges))
+        return profile.code
+
+    # Entered by compiled code whose assumptions about globals no longer
+    # hold: the function goes back to the tree-walker and starts profiling
+    # afresh
+    def deoptimize(self, code: typing.Callable[..., Any], function: PLoxFunction, arguments: List[Any]) -> Any:
+        profile = self.profiles[function.declaration]
+        if profile.code is code:
+            profile.code = None
+            profile.calls = 0
+            profile.back_edges = 0
+            profile.deoptimizations += 1
+            if profile.deoptimizations >= MAX_DEOPTIMIZATIONS:
+                profile.failure = "deoptimized too often"
+        return self.call(function, arguments)
+
+    def report(self) -> str:
+        profiles = list(self.profiles.values())
+        promoted = sum(1 for profile in profiles if profile.promotions)
+        deoptimizations = sum(profile.deoptimizations for profile in profiles)
+        lines = [
+            f"jit: promoted {promoted} of {len(profiles)} functions, "
+            f"{deoptimizations} deoptimizations "
+            f"(thresholds: {self.call_threshold} calls, {self.loop_threshold} loop iterations)"
+        ]
+
+        for profile in profiles:
+            name = profile.declaration.name
+            location = f"  {name.lexeme} (line {name.line}):"
+            for calls, back_edges in profile.promotions:
+                lines.append(f"{location} promoted after {calls} calls, {back_edges} loop iterations")
+            if profile.deoptimizations:
+                lines.append(f"{location} deoptimized {profile.deoptimizations} times")
+            if profile.failure is not None:
+                lines.append(f"{location} not compiled: {profile.failure}")
+        return "\n".join(lines)
+
+
+class JITInterpreter(Interpreter):
+
+    def __init__(
+        self,
+        call_threshold: int = CALL_THRESHOLD,
+        loop_threshold: int = LOOP_THRESHOLD,
+    ):
+        super().__init__()
+        self.jit = JIT(self, call_threshold, loop_threshold)
@@ -0,0 +1,65 @@
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Type
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import Function
+from plox.exceptions import ParserError
+from plox.token import Token
+
+if TYPE_CHECKING:
+    from plox.parser import Parser
+
+
+# A function whose body has only been brace-matched by the parser. The body
+# is parsed from the recorded token range the first time it is read, after
+# which `on_parse` (installed by the resolver) resolves it in the scopes that
+# were visible at the declaration.
+class LazyFunction(Function):
+
+    def __init__(
+        self,
+        name: Token,
+        params: List[Token],
+        tokens: Sequence[Token],
+        start: int,
+        parser_class: Type["Parser"],
+    ):
+        self.tokens: Optional[Sequence[Token]] = tokens
+        self.start = start
+        self.parser_class = parser_class
+        self.parsed_body: Optional[List[Stmt]] = None
+        self.on_parse: Optional[Callable[[], None]] = None
+        super().__init__(name, params, None)  # type: ignore
+
+    @property
+    def body(self) -> List[Stmt]:
+        if self.parsed_body is None:
+            self.parse_body()
+        return self.parsed_body  # type: ignore
+
+    @body.setter
+    def body(self, body: Optional[List[Stmt]]):
+        self.parsed_body = body
+
+    @property
+    def is_parsed(self) -> bool:
+        return self.parsed_body is not None
+
+    def parse_body(self):
+        assert self.tokens is not None
+
+        parser = self.parser_class(self.tokens, lazy_functions=True)
+        parser.current = self.start
+        try:
+            body = parser.block()
+        except ParserError as error:
+            # Recovering from an error inside the body can run past its
+            # closing brace, so the error recorded first is the real one
+            raise parser.errors[0] if parser.errors else error
+        if parser.errors:
+            raise parser.errors[0]
+
+        self.parsed_body = body
+        self.tokens = None
+
+        if self.on_parse is not None:
+            on_parse, self.on_parse = self.on_parse, None
+            on_parse()
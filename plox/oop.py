@@ -7,12 +7,45 @@ if TYPE_CHECKING:
     from plox.interpreter import Interpreter
 
 
+# The layout shared by instances of a class that received the same fields in
+# the same order: the slot of `values` holding each field. Adding a field
+# moves an instance along a transition to the next shape, made once and then
+# shared by every instance that adds that field next.
+class Shape:
+
+    __slots__ = ("indices", "transitions")
+
+    def __init__(self, indices: Dict[str, int]):
+        self.indices = indices
+        self.transitions: Dict[str, Shape] = {}
+
+    def with_field(self, name: str) -> "Shape":
+        shape = self.transitions.get(name)
+        if shape is None:
+            shape = Shape({**self.indices, name: len(self.indices)})
+            self.transitions[name] = shape
+        return shape
+
+
+# Classes never change once created, so everything about their methods is
+# worked out up front: `methods` holds the class's own, `method_table` every
+# method its instances have, inherited ones included, so that finding one
+# is a single read however deep the hierarchy.
 class PLoxClass(Callable):
 
     def __init__(self, name: str, superclass: Optional["PLoxClass"], methods: Dict[str, PLoxFunction]) -> None:
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        self.method_table: Dict[str, PLoxFunction] = (
+            {**superclass.method_table, **methods} if superclass is not None else dict(methods)
+        )
+        self.initializer = self.method_table.get("init")
+        self.initializer_arity = (
+            self.initializer.arity() if self.initializer is not None else 0
+        )
+        # Shape of instances without fields
+        self.shape = Shape({})
 
     def __repr__(self) -> str:
         return self.name
@@ -20,35 +53,31 @@ class PLoxClass(Callable):
     def call(self, interpreter: "Interpreter", arguments: List[object]) -> Any:
         instance = PLoxInstance(self)
 
-        initializer = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer is not None:
+            self.initializer.call_method(interpreter, instance, arguments)
 
         return instance
 
     def arity(self) -> int:
-        if initializer := self.find_method("init"): 
-            return initializer.arity()
-
-        return 0
+        return self.initializer_arity
 
     def find_method(self, name: str) -> PLoxFunction | None:
-        if name in self.methods:
-            return self.methods[name]
-
-        if self.superclass is not None:
-            return self.superclass.methods.get(name)
+        return self.method_table.get(name)
 
 
 class PLoxInstance:
 
+    __slots__ = ("plox_class", "shape", "values")
+
     def __init__(self, plox_class: PLoxClass) -> None:
         self.plox_class = plox_class
-        self.fields: Dict[str, object] = {}
+        self.shape = plox_class.shape
+        self.values: List[object] = []
 
     def get(self, name: Token) -> object:
-        if name.lexeme in self.fields:
-            return self.fields.get(name.lexeme)
+        index = self.shape.indices.get(name.lexeme)
+        if index is not None:
+            return self.values[index]
 
         method = self.plox_class.find_method(name.lexeme)
         if method is not None:
@@ -57,7 +86,12 @@ class PLoxInstance:
         raise PLoxRuntimeError(name, f"Undefined property {name.lexeme}")
 
     def set(self, name: Token, value: object):
-        self.fields[name.lexeme] = value
+        index = self.shape.indices.get(name.lexeme)
+        if index is None:
+            self.shape = self.shape.with_field(name.lexeme)
+            self.values.append(value)
+        else:
+            self.values[index] = value
 
     def __repr__(self) -> str:
         return f"{self.plox_class.name} instance"
@@ -0,0 +1,251 @@
+import math
+from typing import Any, List
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import (
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    This,
+    Unary,
+    Variable,
+    Super,
+)
+from plox.ast.expr_visitor import ExprVisitor
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.ast.stmt_visitor import StmtVisitor
+from plox.exceptions import PLoxRuntimeError
+from plox.interpreter import Interpreter
+from plox.lazy import LazyFunction
+from plox.token import TokenType
+
+
+# Operators whose result is always a number (or a runtime error)
+NUMBER_OPERATORS = {TokenType.MINUS, TokenType.SLASH, TokenType.STAR}
+
+# Operators whose result is always a bool
+BOOLEAN_OPERATORS = {
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.BANG_EQUAL,
+    TokenType.EQUAL_EQUAL,
+}
+
+
+# Rewrites parsed statements before they are resolved: folds operations on
+# literals, drops groupings, settles logical operators and branches whose
+# condition is a literal and removes identity operations on numbers. Folding
+# evaluates with the interpreter itself, so the results follow Lox's rules
+# exactly, and operations that would fail at runtime are left in place to
+# fail there. Returns new statements rather than changing the parsed ones.
+#
+# Bodies of lazily parsed functions are not parsed yet, so they run as
+# written.
+class Optimizer(ExprVisitor, StmtVisitor):
+
+    def __init__(self):
+        self.evaluator = Interpreter()
+
+    def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+        try:
+            return self.statements(statements)
+        except RecursionError:
+            # Nested too deeply to rewrite; the program runs unoptimized
+            return statements
+
+    def statements(self, statements: List[Stmt]) -> List[Stmt]:
+        optimized = []
+        for statement in statements:
+            statement = statement.accept(self)
+            if statement is not None:
+                optimized.append(statement)
+        return optimized
+
+    def expression(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    # A condition only needs the truthiness of its value
+    def condition(self, expr: Expr) -> Expr:
+        expr = self.expression(expr)
+        while (
+            isinstance(expr, Unary)
+            and expr.operator.token_type == TokenType.BANG
+            and isinstance(expr.right, Unary)
+            and expr.right.operator.token_type == TokenType.BANG
+        ):
+            expr = expr.right.right
+        return expr
+
+    def fold(self, expr: Expr) -> Expr:
+        try:
+            return Literal(self.evaluator.evaluate(expr))
+        except (PLoxRuntimeError, ZeroDivisionError):
+            return expr
+
+    def is_number(self, expr: Expr) -> bool:
+        if isinstance(expr, Literal):
+            return isinstance(expr.value, float)
+        if isinstance(expr, Unary):
+            return expr.operator.token_type == TokenType.MINUS
+        if isinstance(expr, Binary):
+            return expr.operator.token_type in NUMBER_OPERATORS
+        return False
+
+    def is_boolean(self, expr: Expr) -> bool:
+        if isinstance(expr, Literal):
+            return isinstance(expr.value, bool)
+        if isinstance(expr, Unary):
+            return expr.operator.token_type == TokenType.BANG
+        if isinstance(expr, Binary):
+            return expr.operator.token_type in BOOLEAN_OPERATORS
+        return False
+
+    def is_literal(self, expr: Expr, value: float) -> bool:
+        return (
+            isinstance(expr, Literal)
+            and isinstance(expr.value, float)
+            and expr.value == value
+            and math.copysign(1.0, expr.value) == 1.0
+        )
+
+    def is_truthy(self, expr: Literal) -> bool:
+        return self.evaluator.is_truthy(expr.value)
+
+    def function(self, stmt: Function) -> Function:
+        if isinstance(stmt, LazyFunction):
+            return stmt
+        return Function(stmt.name, stmt.params, self.statements(stmt.body))
+
+    def visit_block_stmt(self, stmt: Block) -> Any:
+        return Block(self.statements(stmt.statements))
+
+    def visit_class_stmt(self, stmt: Class) -> Any:
+        methods = [self.function(method) for method in stmt.methods]
+        return Class(stmt.name, stmt.superclass, methods)
+
+    def visit_expression_stmt(self, stmt: Expression) -> Any:
+        return Expression(self.expression(stmt.expression))
+
+    def visit_function_stmt(self, stmt: Function) -> Any:
+        return self.function(stmt)
+
+    def visit_if_stmt(self, stmt: If) -> Any:
+        condition = self.condition(stmt.condition)
+        if isinstance(condition, Literal):
+            branch = stmt.thenBranch if self.is_truthy(condition) else stmt.elseBranch
+            return branch.accept(self) if branch is not None else None
+
+        then_branch = stmt.thenBranch.accept(self) or Block([])
+        else_branch = stmt.elseBranch.accept(self) if stmt.elseBranch is not None else None
+        return If(condition, then_branch, else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> Any:
+        return Print(self.expression(stmt.expression))
+
+    def visit_return_stmt(self, stmt: Return) -> Any:
+        expr = self.expression(stmt.expr) if stmt.expr is not None else None
+        return Return(stmt.keyword, expr)
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
+        initializer = None
+        if stmt.initializer is not None:
+            initializer = self.expression(stmt.initializer)
+        return VariableDeclaration(stmt.name, initializer)
+
+    def visit_while_stmt(self, stmt: While) -> Any:
+        condition = self.condition(stmt.condition)
+        if isinstance(condition, Literal) and not self.is_truthy(condition):
+            return None
+        return While(condition, stmt.body.accept(self) or Block([]))
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        return Assign(expr.name, self.expression(expr.value))
+
+    def visit_binary_expr(self, expr: Binary) -> Any:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        binary = Binary(left, expr.operator, right)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            return self.fold(binary)
+
+        # Identities that hold for every float, -0.0, infinities and NaN
+        # included, as long as the other operand is known to be a number
+        match expr.operator.token_type:
+            case TokenType.STAR if self.is_literal(right, 1.0) and self.is_number(left):
+                return left
+            case TokenType.STAR if self.is_literal(left, 1.0) and self.is_number(right):
+                return right
+            case TokenType.SLASH if self.is_literal(right, 1.0) and self.is_number(left):
+                return left
+            case TokenType.MINUS if self.is_literal(right, 0.0) and self.is_number(left):
+                return left
+        return binary
+
+    def visit_call_expr(self, expr: Call) -> Any:
+        arguments = [self.expression(argument) for argument in expr.params]
+        return Call(self.expression(expr.callee), expr.paren, arguments)
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        return Get(self.expression(expr.object), expr.name)
+
+    def visit_grouping_expr(self, expr: Grouping) -> Any:
+        return self.expression(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> Any:
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Any:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        if not isinstance(left, Literal):
+            return Logical(left, expr.operator, right)
+
+        if expr.operator.token_type == TokenType.OR:
+            return left if self.is_truthy(left) else right
+        return right if self.is_truthy(left) else left
+
+    def visit_set_expr(self, expr: Set) -> Any:
+        return Set(self.expression(expr.object), expr.name, self.expression(expr.value))
+
+    def visit_super_expr(self, expr: Super) -> Any:
+        return expr
+
+    def visit_this_expr(self, expr: This) -> Any:
+        return expr
+
+    def visit_unary_expr(self, expr: Unary) -> Any:
+        right = self.expression(expr.right)
+        unary = Unary(expr.operator, right)
+        if isinstance(right, Literal):
+            return self.fold(unary)
+
+        if (
+            isinstance(right, Unary)
+            and right.operator.token_type == expr.operator.token_type
+        ):
+            inner = right.right
+            if expr.operator.token_type == TokenType.MINUS and self.is_number(inner):
+                return inner
+            if expr.operator.token_type == TokenType.BANG and self.is_boolean(inner):
+                return inner
+        return unary
+
+    def visit_variable_expr(self, expr: Variable) -> Any:
+        return expr
@@ -51,7 +51,7 @@ block          → "{" declaration* "}"
 varDecl        → "var" IDENTIFIER ( "=" expression )? ";" ;
 """
 
-from typing import Literal as TypeLiteral, List, Optional
+from typing import Literal as TypeLiteral, Dict, Generator, List, Optional, Sequence, Tuple
 from plox.ast.expr_interface import Expr
 from plox.ast.expr_types import (
     Assign,
@@ -80,14 +80,18 @@ from plox.ast.stmt_types import (
     While,
 )
 from plox.exceptions import ParserError, ParserErrorType
+from plox.lazy import LazyFunction
 from plox.token import Token, TokenType
+from plox.utils import trampoline
 
 
 class Parser:
 
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Sequence[Token], lazy_functions: bool = False):
         self.tokens = tokens
         self.current = 0
+        self.lazy_functions = lazy_functions
+        self.errors: List[ParserError] = []
 
     def parse(self):
         statements: List[Stmt] = []
@@ -110,7 +114,8 @@ class Parser:
                 return self.var_declaration()
 
             return self.statement()
-        except ParserError:
+        except ParserError as error:
+            self.errors.append(error)
             self.synchronize()
             return None
 
@@ -195,6 +200,19 @@ class Parser:
         return Expression(expr)
 
     def function(self, kind: TypeLiteral["function", "method"]):
+        name, parameters = self.function_header(kind)
+        if self.lazy_functions:
+            start = self.current
+            self.skip_block()
+            return LazyFunction(name, parameters, self.tokens, start, type(self))
+
+        body = self.block()
+        return Function(name, parameters, body)
+
+    # Everything up to the opening brace of the body
+    def function_header(
+        self, kind: TypeLiteral["function", "method"]
+    ) -> Tuple[Token, List[Token]]:
         name = self.consume(
             TokenType.IDENTIFIER,
             (
@@ -208,8 +226,7 @@ class Parser:
         if not self.check(TokenType.RIGHT_PAREN):
             while True:
                 if len(parameters) >= 255:
-                    # TODO: Handle parser error
-                    raise Exception("Can't have more than 255 parameters")
+                    raise self.error(ParserErrorType.TOO_MANY_PARAMETERS)
                 parameters.append(
                     self.consume(
                         TokenType.IDENTIFIER, ParserErrorType.MISSING_IDENTIFIER
@@ -219,8 +236,20 @@ class Parser:
                     break
         self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
         self.consume(TokenType.LEFT_BRACE, ParserErrorType.MISSING_OPENING_BRACE)
-        body = self.block()
-        return Function(name, parameters, body)
+        return name, parameters
+
+    def skip_block(self):
+        depth = 1
+        while not self.is_at_end():
+            token_type = self.advance().token_type
+            if token_type == TokenType.LEFT_BRACE:
+                depth += 1
+            elif token_type == TokenType.RIGHT_BRACE:
+                depth -= 1
+                if depth == 0:
+                    return
+
+        self.consume(TokenType.RIGHT_BRACE, ParserErrorType.MISSING_CLOSING_BRACE)
 
     def block(self) -> List[Stmt]:
         statements: List[Stmt] = []
@@ -280,18 +309,25 @@ class Parser:
         expr = self.or_expr()
 
         if self.match(TokenType.EQUAL):
-            equals = self.previous()
-            value = self.assignment()
+            return self.finish_assignment(expr)
 
-            if isinstance(expr, Variable):
-                name = expr.name
-                return Assign(name, value)
-            elif isinstance(expr, Get):
-                assert isinstance(expr, Get)
-                return Set(expr.object, expr.name, value)
+        return expr
 
-            # TODO: Handle error reporting
-            print(f"Invalid assignment target. {equals}")
+    def finish_assignment(self, expr: Expr) -> Expr:
+        equals = self.previous()
+        value = self.assignment()
+        return self.make_assignment(expr, equals, value)
+
+    def make_assignment(self, expr: Expr, equals: Token, value: Expr) -> Expr:
+        if isinstance(expr, Variable):
+            name = expr.name
+            return Assign(name, value)
+        elif isinstance(expr, Get):
+            assert isinstance(expr, Get)
+            return Set(expr.object, expr.name, value)
+
+        # TODO: Handle error reporting
+        print(f"Invalid assignment target. {equals}")
 
         return expr
 
@@ -416,21 +452,13 @@ class Parser:
             self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
             return Grouping(expr)
 
-        token = self.peek()
-        if token.token_type == TokenType.EOF:
-            location = "End of line"
-        else:
-            location = f"Near '{token.lexeme}'"
-        raise ParserError(token.line, location, ParserErrorType.EXPRESSION_EXPECTED)
+        raise self.error(ParserErrorType.EXPRESSION_EXPECTED)
 
     def finish_call(self, callee: Expr) -> Expr:
         arguments: List[Expr] = []
         if not self.check(TokenType.RIGHT_PAREN):
             while True:
-                if len(arguments) >= 255:
-                    # TODO: These kind of errors still need to be properly handled
-                    raise Exception("Can't have more than 255 arguments")
-
+                self.check_argument_count(arguments)
                 arguments.append(self.expression())
                 if not self.match(TokenType.COMMA):
                     break
@@ -439,6 +467,10 @@ class Parser:
 
         return Call(callee, paren, arguments)
 
+    def check_argument_count(self, arguments: List[Expr]):
+        if len(arguments) >= 255:
+            raise self.error(ParserErrorType.TOO_MANY_ARGUMENTS)
+
     def match(self, *types: TokenType) -> bool:
         for type in types:
             if self.check(type):
@@ -469,12 +501,16 @@ class Parser:
         if self.check(token_type):
             return self.advance()
 
+        raise self.error(type)
+
+    # An error at the current token
+    def error(self, type: ParserErrorType) -> ParserError:
         token = self.peek()
         if token.token_type == TokenType.EOF:
             location = "End of line"
         else:
             location = f"Near '{token.lexeme}'"
-        raise ParserError(token.line, location, type)
+        return ParserError(token.line, location, type)
 
     def synchronize(self):
         self.advance()
@@ -496,3 +532,360 @@ class Parser:
                 return
 
             self.advance()
+
+
+# Binding power of every infix operator; higher binds tighter. Prefix
+# operators bind tighter than any infix operator, calls tighter still.
+BINDING_POWERS: Dict[TokenType, int] = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.BANG_EQUAL: 3,
+    TokenType.EQUAL_EQUAL: 3,
+    TokenType.GREATER: 4,
+    TokenType.GREATER_EQUAL: 4,
+    TokenType.LESS: 4,
+    TokenType.LESS_EQUAL: 4,
+    TokenType.MINUS: 5,
+    TokenType.PLUS: 5,
+    TokenType.SLASH: 6,
+    TokenType.STAR: 6,
+}
+LOGICAL_OPERATORS = {TokenType.OR, TokenType.AND}
+PREFIX_OPERATORS = {TokenType.BANG, TokenType.MINUS}
+PREFIX_POWER = 7
+LITERALS: Dict[TokenType, object] = {
+    TokenType.FALSE: False,
+    TokenType.TRUE: True,
+    TokenType.NIL: None,
+}
+
+
+# Precedence-climbing expression parser: a single loop over `BINDING_POWERS`
+# replaces the or_expr → and_expr → ... → unary chain while building exactly
+# the same trees as `Parser`. Statements are parsed by `Parser` itself.
+class PrattParser(Parser):
+
+    def assignment(self) -> Expr:
+        expr = self.infix(1)
+
+        if self.peek().token_type == TokenType.EQUAL:
+            self.advance()
+            return self.finish_assignment(expr)
+
+        return expr
+
+    def infix(self, min_power: int) -> Expr:
+        token = self.peek()
+        if token.token_type in PREFIX_OPERATORS:
+            self.advance()
+            expr: Expr = Unary(token, self.infix(PREFIX_POWER))
+        else:
+            expr = self.call()
+
+        while True:
+            operator = self.peek()
+            power = BINDING_POWERS.get(operator.token_type)
+            if power is None or power < min_power:
+                return expr
+
+            self.advance()
+            right = self.infix(power + 1)
+            if operator.token_type in LOGICAL_OPERATORS:
+                expr = Logical(expr, operator, right)
+            else:
+                expr = Binary(expr, operator, right)
+
+    def call(self) -> Expr:
+        expr = self.primary()
+
+        while True:
+            token_type = self.peek().token_type
+            if token_type == TokenType.LEFT_PAREN:
+                self.advance()
+                expr = self.finish_call(expr)
+            elif token_type == TokenType.DOT:
+                self.advance()
+                name = self.consume(
+                    TokenType.IDENTIFIER, ParserErrorType.EXPECTED_PROPERTY_NAME
+                )
+                expr = Get(expr, name)
+            else:
+                return expr
+
+    def primary(self) -> Expr:
+        token = self.peek()
+        token_type = token.token_type
+
+        if token_type == TokenType.NUMBER or token_type == TokenType.STRING:
+            self.advance()
+            return Literal(token.value)
+
+        if token_type == TokenType.IDENTIFIER:
+            self.advance()
+            return Variable(token)
+
+        if token_type in LITERALS:
+            self.advance()
+            return Literal(LITERALS[token_type])
+
+        return super().primary()
+
+
+ASSIGNMENT_POWER = 1
+
+
+# Parser whose nesting depth is bounded by memory instead of the Python
+# recursion limit. Every rule that may nest is a generator which yields the
+# generator of a sub-rule instead of calling it, and `trampoline` runs them
+# from an explicit stack. Expressions use the same binding powers as
+# `PrattParser` and every rule builds the same trees as `Parser`.
+class StacklessParser(Parser):
+
+    def declaration(self) -> Stmt | None:
+        return trampoline(self.statement_steps(True))
+
+    def statement(self) -> Stmt:
+        return trampoline(self.statement_steps(False))
+
+    def block(self) -> List[Stmt]:
+        return trampoline(self.block_steps())
+
+    def expression(self) -> Expr:
+        return trampoline(self.expression_steps(ASSIGNMENT_POWER))
+
+    def statement_steps(self, allow_declarations: bool) -> Generator:
+        try:
+            if allow_declarations and self.match(TokenType.CLASS):
+                return (yield self.class_steps())
+
+            if allow_declarations and self.match(TokenType.FUN):
+                return (yield self.function_steps("function"))
+
+            if allow_declarations and self.match(TokenType.VAR):
+                return (yield self.var_declaration_steps())
+
+            if self.match(TokenType.FOR):
+                return (yield self.for_steps())
+
+            if self.match(TokenType.IF):
+                self.consume(TokenType.LEFT_PAREN, ParserErrorType.MISSING_LEFT_PARAN)
+                condition = yield self.expression_steps(ASSIGNMENT_POWER)
+                self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
+
+                then_branch = yield self.statement_steps(False)
+                else_branch = None
+                if self.match(TokenType.ELSE):
+                    else_branch = yield self.statement_steps(False)
+
+                return If(condition, then_branch, else_branch)
+
+            if self.match(TokenType.PRINT):
+                value = yield self.expression_steps(ASSIGNMENT_POWER)
+                self.consume(TokenType.SEMI_COLON, ParserErrorType.MISSING_SEMI_COLON)
+                return Print(value)
+
+            if self.match(TokenType.RETURN):
+                keyword = self.previous()
+                value = None
+                if not self.check(TokenType.SEMI_COLON):
+                    value = yield self.expression_steps(ASSIGNMENT_POWER)
+                self.consume(TokenType.SEMI_COLON, ParserErrorType.MISSING_SEMI_COLON)
+                return Return(keyword, value)
+
+            if self.match(TokenType.WHILE):
+                self.consume(TokenType.LEFT_PAREN, ParserErrorType.MISSING_LEFT_PARAN)
+                condition = yield self.expression_steps(ASSIGNMENT_POWER)
+                self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
+                body = yield self.statement_steps(False)
+                return While(condition, body)
+
+            if self.match(TokenType.LEFT_BRACE):
+                statements: List[Stmt] = []
+                while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+                    if statement := (yield self.statement_steps(True)):
+                        statements.append(statement)
+
+                self.consume(
+                    TokenType.RIGHT_BRACE, ParserErrorType.MISSING_CLOSING_BRACE
+                )
+                return Block(statements)
+
+            return (yield self.expression_statement_steps())
+        except ParserError as error:
+            if not allow_declarations:
+                raise
+
+            self.errors.append(error)
+            self.synchronize()
+            return None
+
+    def block_steps(self) -> Generator:
+        statements: List[Stmt] = []
+
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            if statement := (yield self.statement_steps(True)):
+                statements.append(statement)
+
+        self.consume(TokenType.RIGHT_BRACE, ParserErrorType.MISSING_CLOSING_BRACE)
+        return statements
+
+    def class_steps(self) -> Generator:
+        name = self.consume(TokenType.IDENTIFIER, ParserErrorType.EXPECTED_CLASS_NAME)
+
+        superclass: Optional[Variable] = None
+        if self.match(TokenType.LESS):
+            self.consume(TokenType.IDENTIFIER, ParserErrorType.EXPECTED_SUPERCLASS_NAME)
+            superclass = Variable(self.previous())
+
+        self.consume(TokenType.LEFT_BRACE, ParserErrorType.MISSING_OPENING_BRACE)
+
+        methods: List[Function] = []
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            methods.append((yield self.function_steps("method")))
+
+        self.consume(TokenType.RIGHT_BRACE, ParserErrorType.MISSING_CLOSING_BRACE)
+
+        return Class(name, superclass, methods)
+
+    def function_steps(self, kind: TypeLiteral["function", "method"]) -> Generator:
+        name, parameters = self.function_header(kind)
+        if self.lazy_functions:
+            start = self.current
+            self.skip_block()
+            return LazyFunction(name, parameters, self.tokens, start, type(self))
+
+        body = yield self.block_steps()
+        return Function(name, parameters, body)
+
+    def var_declaration_steps(self) -> Generator:
+        name = self.consume(TokenType.IDENTIFIER, ParserErrorType.MISSING_IDENTIFIER)
+
+        initializer = None
+        if self.match(TokenType.EQUAL):
+            initializer = yield self.expression_steps(ASSIGNMENT_POWER)
+
+        self.consume(TokenType.SEMI_COLON, ParserErrorType.MISSING_SEMI_COLON)
+        return VariableDeclaration(name, initializer)
+
+    def expression_statement_steps(self) -> Generator:
+        expr = yield self.expression_steps(ASSIGNMENT_POWER)
+        self.consume(TokenType.SEMI_COLON, ParserErrorType.MISSING_SEMI_COLON)
+        return Expression(expr)
+
+    def for_steps(self) -> Generator:
+        self.consume(TokenType.LEFT_PAREN, ParserErrorType.MISSING_LEFT_PARAN)
+
+        if self.match(TokenType.SEMI_COLON):
+            initializer = None
+        elif self.match(TokenType.VAR):
+            initializer = yield self.var_declaration_steps()
+        else:
+            initializer = yield self.expression_statement_steps()
+
+        if not self.check(TokenType.SEMI_COLON):
+            condition = yield self.expression_steps(ASSIGNMENT_POWER)
+        else:
+            condition = Literal(True)
+
+        self.consume(TokenType.SEMI_COLON, ParserErrorType.MISSING_SEMI_COLON)
+
+        if not self.check(TokenType.RIGHT_PAREN):
+            increment = yield self.expression_steps(ASSIGNMENT_POWER)
+        else:
+            increment = None
+
+        self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
+
+        body = yield self.statement_steps(False)
+
+        if increment is not None:
+            body = Block([body, Expression(increment)])
+
+        body = While(condition, body)
+
+        if initializer is not None:
+            body = Block([initializer, body])
+
+        return body
+
+    def expression_steps(self, min_power: int) -> Generator:
+        token = self.peek()
+        token_type = token.token_type
+
+        if token_type in PREFIX_OPERATORS:
+            self.advance()
+            expr: Expr = Unary(token, (yield self.expression_steps(PREFIX_POWER)))
+        elif token_type == TokenType.NUMBER or token_type == TokenType.STRING:
+            self.advance()
+            expr = Literal(token.value)
+        elif token_type == TokenType.IDENTIFIER:
+            self.advance()
+            expr = Variable(token)
+        elif token_type in LITERALS:
+            self.advance()
+            expr = Literal(LITERALS[token_type])
+        elif token_type == TokenType.LEFT_PAREN:
+            self.advance()
+            inner = yield self.expression_steps(ASSIGNMENT_POWER)
+            self.consume(TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN)
+            expr = Grouping(inner)
+        else:
+            # Only `this`, `super` and syntax errors are left, none of which
+            # nest.
+            expr = Parser.primary(self)
+
+        if token_type not in PREFIX_OPERATORS:
+            expr = yield self.call_steps(expr)
+
+        while True:
+            operator = self.peek()
+            power = BINDING_POWERS.get(operator.token_type)
+            if power is None or power < min_power:
+                break
+
+            self.advance()
+            right = yield self.expression_steps(power + 1)
+            if operator.token_type in LOGICAL_OPERATORS:
+                expr = Logical(expr, operator, right)
+            else:
+                expr = Binary(expr, operator, right)
+
+        if min_power == ASSIGNMENT_POWER and self.match(TokenType.EQUAL):
+            equals = self.previous()
+            value = yield self.expression_steps(ASSIGNMENT_POWER)
+            return self.make_assignment(expr, equals, value)
+
+        return expr
+
+    def call_steps(self, expr: Expr) -> Generator:
+        while True:
+            token_type = self.peek().token_type
+            if token_type == TokenType.LEFT_PAREN:
+                self.advance()
+                arguments: List[Expr] = []
+                if not self.check(TokenType.RIGHT_PAREN):
+                    while True:
+                        self.check_argument_count(arguments)
+                        arguments.append((yield self.expression_steps(ASSIGNMENT_POWER)))
+                        if not self.match(TokenType.COMMA):
+                            break
+
+                paren = self.consume(
+                    TokenType.RIGHT_PAREN, ParserErrorType.MISSING_RIGHT_PARAN
+                )
+                expr = Call(expr, paren, arguments)
+            elif token_type == TokenType.DOT:
+                self.advance()
+                name = self.consume(
+                    TokenType.IDENTIFIER, ParserErrorType.EXPECTED_PROPERTY_NAME
+                )
+                expr = Get(expr, name)
+            else:
+                return expr
+
+
+PARSERS = {
+    "recursive": Parser,
+    "pratt": PrattParser,
+    "stackless": StacklessParser,
+}
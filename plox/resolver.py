@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, Generator, List, Optional, Set, Tuple
 from plox.ast.expr_interface import Expr
 from plox.ast.expr_types import (
     Assign,
@@ -30,7 +30,15 @@ from plox.ast.stmt_types import (
 )
 from plox.ast.stmt_visitor import StmtVisitor
 from plox.interpreter import Interpreter
-from plox.token import Token
+from plox.lazy import LazyFunction
+from plox.token import Token, TokenType
+from plox.utils import trampoline
+
+
+Declaration = Class | Function | VariableDeclaration
+Reference = Assign | Super | This | Variable
+
+IMPLICIT_NAMES = ("this", "super")
 
 
 class FunctionType(Enum):
@@ -48,16 +56,66 @@ class ClassType(Enum):
     SUBCLASS = "Subclass"
 
 
+# A lexical scope seen by the resolver. Closures capture the individual
+# variables they use rather than environments, so blocks share the frame of
+# their function (or of the top-level block they are nested in). Frames,
+# slots and captures are laid out once the outermost scope ends and every
+# capture and assignment is known.
+class Scope:
+
+    def __init__(self, parent: Optional["Scope"], node: Optional[Block | Function]):
+        self.parent = parent
+        self.node = node
+        self.function: Optional[Scope] = (
+            self if isinstance(node, Function) else parent and parent.function
+        )
+        self.names: Dict[str, bool] = {}
+        self.indices: Dict[str, int] = {}
+        self.declarations: Dict[str, Declaration] = {}
+        # Variables used from nested functions and variables assigned after
+        # their declaration; those in both are shared through a Cell
+        self.captured: Set[str] = set()
+        self.assigned: Set[str] = set()
+        # For function scopes, the enclosing variables the function captures
+        self.upvalues: Dict[Tuple[Scope, str], int] = {}
+        self.allocated = True
+        self.frame = self
+        self.offset = 0
+        self.size = 0
+        self.finalized = False
+
+    def boxed(self, name: str) -> bool:
+        return name in self.captured and name in self.assigned
+
+
 class Resolver(ExprVisitor, StmtVisitor):
 
-    def __init__(self, interpreter: Interpreter):
+    def __init__(self, interpreter: Interpreter, elide_scopes: bool = True):
         self.interpreter = interpreter
-        self.scopes: List[Dict[str, bool]] = []
+        self.elide_scopes = elide_scopes
+        self.scopes: List[Scope] = []
+        # Scopes, function scopes, declarations and local references seen
+        # since the last layout, in source order
+        self.opened: List[Scope] = []
+        self.closures: List[Scope] = []
+        self.declarations: List[Tuple[Scope, int, Declaration]] = []
+        self.references: List[Tuple[Scope, Scope, str, Reference]] = []
+        # Deferred function bodies only see the names declared before them
+        self.visible: Dict[Scope, int] = {}
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
+        # Local declarations and global names that some code refers to.
+        # Bodies resolved later may refer to any global visible to them.
+        self.referenced: Set[Declaration] = set()
+        self.referenced_globals: Set[str] = set()
+        self.deferred = False
+        # The scope and name each local reference resolved to, and the
+        # global names some code assigns
+        self.bindings: Dict[Reference, Tuple[Scope, str]] = {}
+        self.assigned_globals: Set[str] = set()
 
     def visit_block_stmt(self, stmt: Block) -> Any:
-        self.begin_scope()
+        self.begin_scope(stmt)
         self.resolve(stmt.statements)
         self.end_scope()
 
@@ -71,38 +129,173 @@ class Resolver(ExprVisitor, StmtVisitor):
     def resolve_expr(self, expr: Expr):
         expr.accept(self)
 
-    def begin_scope(self):
-        self.scopes.append({})
+    def begin_scope(self, node: Optional[Block | Function] = None):
+        scope = Scope(self.scopes[-1] if self.scopes else None, node)
+        scope.allocated = (
+            not isinstance(node, Block) or scope.parent is None or not self.elide_scopes
+        )
+        self.scopes.append(scope)
+        self.opened.append(scope)
+        if isinstance(node, Function):
+            self.closures.append(scope)
 
     def end_scope(self):
-        self.scopes.pop()
+        scope = self.scopes.pop()
+        if scope.parent is None or scope.parent.finalized:
+            self.layout()
+
+    def layout(self):
+        for scope in self.opened:
+            if not scope.allocated:
+                assert scope.parent is not None
+                scope.frame = scope.parent.frame
+                scope.offset = scope.frame.size
+            scope.frame.size += len(scope.indices)
+            scope.finalized = True
+
+        for scope in self.opened:
+            if isinstance(scope.node, Block):
+                scope.node.scoped = scope.allocated
+                scope.node.size = scope.size
+            elif isinstance(scope.node, Function):
+                scope.node.size = scope.size
+                scope.node.reusable = self.elide_scopes
+                scope.node.cells = tuple(
+                    scope.indices[param.lexeme]
+                    for param in scope.node.params
+                    if scope.boxed(param.lexeme)
+                )
+
+        for scope in self.closures:
+            assert isinstance(scope.node, Function)
+            scope.node.captures = tuple(
+                self.capture(scope, target, name) for target, name in scope.upvalues
+            )
+
+        for scope, index, node in self.declarations:
+            node.slot = scope.offset + index
+            node.boxed = scope.boxed(node.name.lexeme)
+
+        for scope, target, name, expr in self.references:
+            boxed = target.boxed(name)
+            if target.function is scope.function:
+                depth = self.distance(scope, target)
+                slot = target.offset + target.indices[name]
+                self.interpreter.resolve(expr, depth, slot, None, boxed)
+            else:
+                assert scope.function is not None
+                upvalue = scope.function.upvalues[(target, name)]
+                self.interpreter.resolve(expr, None, 0, upvalue, boxed)
+
+        self.opened = []
+        self.closures = []
+        self.declarations = []
+        self.references = []
+
+    # Number of environments between the frames holding two scopes
+    def distance(self, scope: Scope, target: Scope) -> int:
+        depth = 0
+        frame = scope.frame
+        while frame is not target.frame:
+            assert frame.parent is not None
+            frame = frame.parent.frame
+            depth += 1
+        return depth
+
+    # Where a closure copies an upvalue from when it is created: a slot of
+    # the creating function's environments, or one of its own upvalues.
+    def capture(
+        self, function: Scope, target: Scope, name: str
+    ) -> Tuple[Optional[int], int]:
+        creator = function.parent
+        assert creator is not None
+        if target.function is creator.function:
+            return (self.distance(creator, target), target.offset + target.indices[name])
+
+        assert creator.function is not None
+        return (None, creator.function.upvalues[(target, name)])
+
+    def add_upvalue(self, function: Scope, target: Scope, name: str):
+        if (target, name) in function.upvalues:
+            return
 
-    def declare(self, name: Token):
+        creator = function.parent
+        assert creator is not None
+        if target.function is not creator.function:
+            assert creator.function is not None
+            self.add_upvalue(creator.function, target, name)
+
+        function.upvalues[(target, name)] = len(function.upvalues)
+
+    def declare(self, name: Token, node: Optional[Declaration] = None):
         if len(self.scopes) == 0:
             return
 
-        if name.lexeme in self.scopes[-1]:
+        scope = self.scopes[-1]
+        if name.lexeme in scope.names:
             raise Exception("Already a variable with this name in this scope")
 
-        self.scopes[-1][name.lexeme] = False
+        scope.names[name.lexeme] = False
+        index = scope.indices[name.lexeme] = len(scope.indices)
+        if node is not None:
+            scope.declarations[name.lexeme] = node
+            self.declarations.append((scope, index, node))
 
     def define(self, name: Token):
         if len(self.scopes) == 0:
             return
 
-        self.scopes[-1][name.lexeme] = True
+        self.scopes[-1].names[name.lexeme] = True
+
+    # Declares `this` (slot 0 of a method's frame) or `super` (slot 0 of the
+    # environment the interpreter creates for it).
+    def define_implicit(self, name: str):
+        self.scopes[-1].names[name] = True
+        self.scopes[-1].indices[name] = len(self.scopes[-1].indices)
+
+    def resolve_local(self, expr: Reference, name: Token, assigned: bool = False):
+        if len(self.scopes) == 0:
+            self.resolve_global(name, assigned)
+            return
 
-    def resolve_local(self, expr: Expr, name: Token):
-        for i in reversed(range(len(self.scopes))):
-            if name.lexeme in self.scopes[i].keys():
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+        scope = self.scopes[-1]
+        for target in reversed(self.scopes):
+            index = target.indices.get(name.lexeme)
+            if index is not None and index < self.visible.get(target, index + 1):
+                if assigned:
+                    target.assigned.add(name.lexeme)
+                if target.function is not scope.function:
+                    assert scope.function is not None
+                    target.captured.add(name.lexeme)
+                    self.add_upvalue(scope.function, target, name.lexeme)
+                self.references.append((scope, target, name.lexeme, expr))
+                self.bindings[expr] = (target, name.lexeme)
+                if name.lexeme in target.declarations:
+                    self.referenced.add(target.declarations[name.lexeme])
                 return
 
+        self.resolve_global(name, assigned)
+
+    def resolve_global(self, name: Token, assigned: bool):
+        self.referenced_globals.add(name.lexeme)
+        if assigned:
+            self.assigned_globals.add(name.lexeme)
+
     def resolve_function(self, function: Function, type: FunctionType):
+        if isinstance(function, LazyFunction) and not function.is_parsed:
+            self.defer_function(function, type)
+            return
+
+        self.begin_scope(function)
+        self.resolve_function_body(function, type)
+
+    # Resolves a function whose scope is already open, and closes it
+    def resolve_function_body(self, function: Function, type: FunctionType):
         enclosing_function = self.current_function
         self.current_function = type
 
-        self.begin_scope()
+        if type == FunctionType.METHOD or type == FunctionType.INITIALIZER:
+            self.define_implicit("this")
         for param in function.params:
             self.declare(param)
             self.define(param)
@@ -111,8 +304,44 @@ class Resolver(ExprVisitor, StmtVisitor):
 
         self.current_function = enclosing_function
 
+    def defer_function(self, function: LazyFunction, type: FunctionType):
+        resolver_class = self.__class__
+        interpreter = self.interpreter
+        elide_scopes = self.elide_scopes
+        scopes = list(self.scopes)
+        visible = {
+            scope: self.visible.get(scope, len(scope.indices)) for scope in scopes
+        }
+        current_class = self.current_class
+
+        # The closure is created before its body is resolved, so it captures
+        # every visible local, in a cell in case the body assigns it.
+        function_scope = Scope(scopes[-1] if scopes else None, function)
+        self.closures.append(function_scope)
+        self.deferred = True
+        for target in scopes:
+            for name, index in target.indices.items():
+                if index < visible[target]:
+                    if name in target.declarations:
+                        self.referenced.add(target.declarations[name])
+                    target.captured.add(name)
+                    if name not in IMPLICIT_NAMES:
+                        target.assigned.add(name)
+                    self.add_upvalue(function_scope, target, name)
+
+        def resolve_body():
+            resolver = resolver_class(interpreter, elide_scopes)
+            resolver.scopes = scopes + [function_scope]
+            resolver.opened = [function_scope]
+            resolver.closures = [function_scope]
+            resolver.visible = visible
+            resolver.current_class = current_class
+            resolver.resolve_function_body(function, type)
+
+        function.on_parse = resolve_body
+
     def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
-        self.declare(stmt.name)
+        self.declare(stmt.name, stmt)
         if stmt.initializer is not None:
             self.resolve_expr(stmt.initializer)
         self.define(stmt.name)
@@ -120,7 +349,7 @@ class Resolver(ExprVisitor, StmtVisitor):
     def visit_variable_expr(self, expr: Variable) -> Any:
         if (
             not (len(self.scopes) == 0)
-            and self.scopes[-1].get(expr.name.lexeme) == False
+            and self.scopes[-1].names.get(expr.name.lexeme) == False
         ):
             raise Exception("Can't read local variable in its own initializer.")
 
@@ -128,10 +357,10 @@ class Resolver(ExprVisitor, StmtVisitor):
 
     def visit_assign_expr(self, expr: Assign) -> Any:
         self.resolve_expr(expr.value)
-        self.resolve_local(expr, expr.name)
+        self.resolve_local(expr, expr.name, assigned=True)
 
     def visit_function_stmt(self, stmt: Function) -> Any:
-        self.declare(stmt.name)
+        self.declare(stmt.name, stmt)
         self.define(stmt.name)
 
         self.resolve_function(stmt, FunctionType.FUNCTION)
@@ -152,7 +381,7 @@ class Resolver(ExprVisitor, StmtVisitor):
         if self.current_function == FunctionType.NONE:
             raise Exception("Can't return from top-level code")
 
-        if self.current_function == FunctionType.INITIALIZER:
+        if self.current_function == FunctionType.INITIALIZER and stmt.expr is not None:
             raise Exception("Can't return a value from an initializer")
 
         if stmt.expr is not None:
@@ -189,7 +418,7 @@ class Resolver(ExprVisitor, StmtVisitor):
         enclosing_class = self.current_class
         self.current_class = ClassType.CLASS
 
-        self.declare(stmt.name)
+        self.declare(stmt.name, stmt)
         self.define(stmt.name)
 
         if (
@@ -204,21 +433,16 @@ class Resolver(ExprVisitor, StmtVisitor):
 
         if stmt.superclass is not None:
             self.begin_scope()
-            self.scopes[-1]["super"] = True
-
-        self.begin_scope()
-        self.scopes[-1]["this"] = True
+            self.define_implicit("super")
 
         for method in stmt.methods:
             declaration = (
                 FunctionType.INITIALIZER
-                if method.name == "init"
+                if method.name.lexeme == "init"
                 else FunctionType.METHOD
             )
             self.resolve_function(method, declaration)
 
-        self.end_scope()
-
         if stmt.superclass is not None:
             self.end_scope()
 
@@ -239,9 +463,174 @@ class Resolver(ExprVisitor, StmtVisitor):
 
         self.resolve_local(expr, expr.keyword)
 
+        # The method's receiver, which super methods are bound to
+        expr.receiver = This(Token(TokenType.THIS, "this", expr.keyword.line))
+        self.resolve_local(expr.receiver, expr.receiver.keyword)
+
     def visit_this_expr(self, expr: This) -> Any:
         if self.current_class == ClassType.NONE:
             # TODO: Handle errors...
             raise Exception("Can't use 'this' outside of a class")
 
         self.resolve_local(expr, expr.keyword)
+
+
+# Resolver whose nesting depth is bounded by memory instead of the Python
+# recursion limit. Visits that reach child nodes are generators which yield
+# `child.accept(self)` and `trampoline` runs them from an explicit stack.
+# Visits of leaf nodes are inherited unchanged.
+class StacklessResolver(Resolver):
+
+    def resolve(self, statements: List[Stmt]):
+        trampoline(self.statements_steps(statements))
+
+    def resolve_stmt(self, stmt: Stmt):
+        trampoline(stmt.accept(self))
+
+    def resolve_expr(self, expr: Expr):
+        trampoline(expr.accept(self))
+
+    def resolve_function(self, function: Function, type: FunctionType):
+        trampoline(self.function_steps(function, type))
+
+    def resolve_function_body(self, function: Function, type: FunctionType):
+        trampoline(self.function_body_steps(function, type))
+
+    def statements_steps(self, statements: List[Stmt]) -> Generator:
+        for statement in statements:
+            yield statement.accept(self)
+
+    def function_steps(self, function: Function, type: FunctionType) -> Generator:
+        if isinstance(function, LazyFunction) and not function.is_parsed:
+            self.defer_function(function, type)
+            return
+
+        self.begin_scope(function)
+        yield self.function_body_steps(function, type)
+
+    def function_body_steps(self, function: Function, type: FunctionType) -> Generator:
+        enclosing_function = self.current_function
+        self.current_function = type
+
+        if type == FunctionType.METHOD or type == FunctionType.INITIALIZER:
+            self.define_implicit("this")
+        for param in function.params:
+            self.declare(param)
+            self.define(param)
+        yield self.statements_steps(function.body)
+        self.end_scope()
+
+        self.current_function = enclosing_function
+
+    def visit_block_stmt(self, stmt: Block) -> Any:
+        self.begin_scope(stmt)
+        yield self.statements_steps(stmt.statements)
+        self.end_scope()
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
+        self.declare(stmt.name, stmt)
+        if stmt.initializer is not None:
+            yield stmt.initializer.accept(self)
+        self.define(stmt.name)
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        yield expr.value.accept(self)
+        self.resolve_local(expr, expr.name, assigned=True)
+
+    def visit_function_stmt(self, stmt: Function) -> Any:
+        self.declare(stmt.name, stmt)
+        self.define(stmt.name)
+
+        yield self.function_steps(stmt, FunctionType.FUNCTION)
+
+    def visit_expression_stmt(self, stmt: Expression) -> Any:
+        yield stmt.expression.accept(self)
+
+    def visit_if_stmt(self, stmt: If) -> Any:
+        yield stmt.condition.accept(self)
+        yield stmt.thenBranch.accept(self)
+        if stmt.elseBranch is not None:
+            yield stmt.elseBranch.accept(self)
+
+    def visit_print_stmt(self, stmt: Print) -> Any:
+        yield stmt.expression.accept(self)
+
+    def visit_return_stmt(self, stmt: Return) -> Any:
+        if self.current_function == FunctionType.NONE:
+            raise Exception("Can't return from top-level code")
+
+        if self.current_function == FunctionType.INITIALIZER and stmt.expr is not None:
+            raise Exception("Can't return a value from an initializer")
+
+        if stmt.expr is not None:
+            yield stmt.expr.accept(self)
+
+    def visit_while_stmt(self, stmt: While) -> Any:
+        yield stmt.condition.accept(self)
+        yield stmt.body.accept(self)
+
+    def visit_binary_expr(self, expr: Binary) -> Any:
+        yield expr.left.accept(self)
+        yield expr.right.accept(self)
+
+    def visit_call_expr(self, expr: Call) -> Any:
+        yield expr.callee.accept(self)
+
+        for argument in expr.params:
+            yield argument.accept(self)
+
+    def visit_grouping_expr(self, expr: Grouping) -> Any:
+        yield expr.expression.accept(self)
+
+    def visit_logical_expr(self, expr: Logical) -> Any:
+        yield expr.left.accept(self)
+        yield expr.right.accept(self)
+
+    def visit_unary_expr(self, expr: Unary) -> Any:
+        yield expr.right.accept(self)
+
+    def visit_class_stmt(self, stmt: Class) -> Any:
+        enclosing_class = self.current_class
+        self.current_class = ClassType.CLASS
+
+        self.declare(stmt.name, stmt)
+        self.define(stmt.name)
+
+        if (
+            stmt.superclass is not None
+            and stmt.name.lexeme == stmt.superclass.name.lexeme
+        ):
+            raise Exception("A class can't inherit from itself.")
+
+        if stmt.superclass is not None:
+            self.current_class = ClassType.SUBCLASS
+            yield stmt.superclass.accept(self)
+
+            self.begin_scope()
+            self.define_implicit("super")
+
+        for method in stmt.methods:
+            declaration = (
+                FunctionType.INITIALIZER
+                if method.name.lexeme == "init"
+                else FunctionType.METHOD
+            )
+            yield self.function_steps(method, declaration)
+
+        if stmt.superclass is not None:
+            self.end_scope()
+
+        self.current_class = enclosing_class
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        yield expr.object.accept(self)
+
+    def visit_set_expr(self, expr: Set) -> Any:
+        yield expr.value.accept(self)
+        yield expr.object.accept(self)
+
+
+RESOLVERS = {
+    "recursive": Resolver,
+    "stackless": StacklessResolver,
+}
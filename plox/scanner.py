@@ -1,6 +1,7 @@
-from typing import List
+import re
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 from plox.exceptions import ScannerError, ScannerErrorType
-from plox.token import Token, TokenType
+from plox.token import Token, TokenStream, TokenType, literal_value
 
 
 class Scanner:
@@ -13,6 +14,10 @@ class Scanner:
         self.line: int = 1
         self.had_error: bool = False
 
+    @classmethod
+    def from_stream(cls, stream: TextIO):
+        return cls(stream.read())
+
     def scan_tokens(self) -> List[Token]:
         while not self.is_at_end():
             self.start = self.current
@@ -180,11 +185,7 @@ class Scanner:
 
     def add_token(self, token_type: TokenType):
         text = self.source[self.start : self.current]
-        value = None
-        if token_type == TokenType.NUMBER:
-            value = float(text)
-        elif token_type == TokenType.STRING:
-            value = text[1:-1]
+        value = literal_value(token_type, text)
 
         self.tokens.append(Token(token_type, text, self.line, value))
 
@@ -193,3 +194,215 @@ class Scanner:
 
     def is_alpha(self, character: str) -> bool:
         return character.isalnum() or character == "_"
+
+
+KEYWORDS: Dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+
+OPERATORS: Dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMI_COLON,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading blanks are skipped as part of each match, then one alternative per
+# token class is tried in order. Identifiers follow the character-at-a-time
+# scanner exactly: they start with a digit-free alphanumeric character or an
+# underscore and continue with alphanumerics only.
+TOKEN_PATTERN = re.compile(
+    r"""
+    [ \r\t]*
+    (?:
+        (?P<newlines>\n[ \r\t\n]*)
+        | (?P<comment>//[^\n]*)
+        | (?P<string>"[^"]*")
+        | (?P<number>\d+(?:\.\d+)?)
+        | (?P<identifier>(?:_|[^\W\d_])[^\W_]*)
+        | (?P<operator>[!=<>]=?|[(){},.\-+;/*])
+        | (?P<blank>\Z)
+    )
+    """,
+    re.VERBOSE,
+)
+BLANKS = re.compile(r"[ \r\t]*")
+
+
+# Drop-in replacement for `Scanner` that recognizes a whole token per step.
+class RegexScanner(Scanner):
+
+    def scan_tokens(self) -> List[Token]:
+        self.tokens.extend(self.iter_tokens())
+        return self.tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        for token_type, lexeme, _, line in self.iter_lexemes():
+            if token_type is TokenType.NUMBER:
+                yield Token(token_type, lexeme, line, float(lexeme))
+            elif token_type is TokenType.STRING:
+                yield Token(token_type, lexeme, line, lexeme[1:-1])
+            else:
+                yield Token(token_type, lexeme, line)
+
+    def scan_token_stream(self) -> TokenStream:
+        stream = TokenStream(self.source)
+        append = stream.append
+        for token_type, lexeme, start, line in self.iter_lexemes():
+            append(token_type, start, len(lexeme), line)
+        return stream
+
+    def iter_lexemes(self) -> Iterator[Tuple[TokenType, str, int, int]]:
+        match_token = TOKEN_PATTERN.match
+        buffer = self.source
+        exhausted = False
+        offset = 0
+        position = 0
+        line = self.line
+        end = len(buffer)
+
+        while True:
+            if not exhausted and position + 1 >= end:
+                buffer, offset, position, exhausted = self.refill(
+                    buffer, offset, position
+                )
+                end = len(buffer)
+
+            if position >= end:
+                break
+
+            match = match_token(buffer, position)
+            if match is not None and (exhausted or match.end() + 1 < end):
+                kind = match.lastgroup
+                lexeme = match.group(kind)
+                start = offset + match.start(kind)
+                position = match.end()
+            elif not exhausted and (
+                match is not None
+                or buffer.startswith('"', BLANKS.match(buffer, position).end())
+            ):
+                # The token may continue in the next chunk, e.g. an identifier,
+                # a number waiting for its fraction or an open string.
+                buffer, offset, position, exhausted = self.refill(
+                    buffer, offset, position
+                )
+                end = len(buffer)
+                continue
+            else:
+                position = BLANKS.match(buffer, position).end()
+                self.current = offset + position
+                self.line = line
+                self.unexpected_input(buffer[position:])
+
+            if kind == "identifier":
+                yield KEYWORDS.get(lexeme, TokenType.IDENTIFIER), lexeme, start, line
+            elif kind == "operator":
+                yield OPERATORS[lexeme], lexeme, start, line
+            elif kind == "number":
+                yield TokenType.NUMBER, lexeme, start, line
+            elif kind == "newlines":
+                line += lexeme.count("\n")
+            elif kind == "string":
+                line += lexeme.count("\n")
+                yield TokenType.STRING, lexeme, start, line
+
+        self.start = self.current = offset + position
+        self.line = line
+        yield TokenType.EOF, "", self.current, line
+
+    def refill(self, buffer: str, offset: int, position: int):
+        chunk = self.read_chunk()
+        if not chunk:
+            return buffer, offset, position, True
+
+        return buffer[position:] + chunk, offset + position, 0, False
+
+    def read_chunk(self) -> str:
+        return ""
+
+    def unexpected_input(self, remaining: str):
+        self.had_error = True
+        if remaining.startswith('"'):
+            self.line += remaining.count("\n")
+            raise ScannerError(self.line, "", ScannerErrorType.UNTERMINATED_STRING)
+
+        raise ScannerError(self.line, "", ScannerErrorType.UNEXPECTED_CHARACTER)
+
+
+# Scans any text stream in fixed-size chunks so that memory is bounded by the
+# chunk size (plus the longest token) rather than by the size of the input.
+class StreamScanner(RegexScanner):
+
+    def __init__(
+        self,
+        source: str = "",
+        stream: Optional[TextIO] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        super().__init__(source)
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # Chunks read so far, kept only while scanning into a token stream
+        self.consumed: Optional[List[str]] = None
+
+    @classmethod
+    def from_stream(cls, stream: TextIO, chunk_size: int = CHUNK_SIZE):
+        return cls("", stream, chunk_size)
+
+    # Token streams slice lexemes out of the source, so unlike the other
+    # scans this keeps the whole input
+    def scan_token_stream(self) -> TokenStream:
+        self.consumed = []
+        try:
+            stream = super().scan_token_stream()
+            stream.source = self.source + "".join(self.consumed)
+        finally:
+            self.consumed = None
+        return stream
+
+    def read_chunk(self) -> str:
+        if self.stream is None:
+            return ""
+        chunk = self.stream.read(self.chunk_size)
+        if self.consumed is not None:
+            self.consumed.append(chunk)
+        return chunk
+
+
+SCANNERS = {
+    "default": Scanner,
+    "regex": RegexScanner,
+    "stream": StreamScanner,
+}
@@ -1,5 +1,6 @@
+from array import array
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class TokenType(Enum):
@@ -79,3 +80,74 @@ class Token:
             and self.lexeme == __value.lexeme
             and self.line == __value.line
         )
+
+
+def literal_value(token_type: TokenType, lexeme: str) -> Optional[object]:
+    if token_type == TokenType.NUMBER:
+        return float(lexeme)
+    if token_type == TokenType.STRING:
+        return lexeme[1:-1]
+    return None
+
+
+TOKEN_TYPES: List[TokenType] = list(TokenType)
+TOKEN_CODES: Dict[TokenType, int] = {
+    token_type: code for code, token_type in enumerate(TOKEN_TYPES)
+}
+
+
+# Struct-of-arrays alternative to `List[Token]`: every token costs four
+# machine integers and `Token` objects are only built when an index is read.
+# The parser keeps alternating between `peek()` and `previous()`, so the two
+# most recently built tokens are kept around.
+class TokenStream:
+
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("I")
+        self.lengths = array("I")
+        self.lines = array("I")
+        # No index has been read yet; -1 would stand for the last token
+        self.last_index: Optional[int] = None
+        self.last_token = Token(TokenType.EOF, "", 0)
+        self.prior_index: Optional[int] = None
+        self.prior_token = self.last_token
+
+    def append(self, token_type: TokenType, start: int, length: int, line: int):
+        self.types.append(TOKEN_CODES[token_type])
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        if index == self.last_index:
+            return self.last_token
+        if index < 0:
+            return self[index + len(self.types)]
+
+        if index == self.prior_index:
+            token = self.prior_token
+        else:
+            token = self.materialize(index)
+
+        self.prior_index, self.prior_token = self.last_index, self.last_token
+        self.last_index, self.last_token = index, token
+        return token
+
+    def token_type(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        return self.source[start : start + self.lengths[index]]
+
+    def materialize(self, index: int) -> Token:
+        token_type = TOKEN_TYPES[self.types[index]]
+        lexeme = self.lexeme(index)
+        return Token(
+            token_type, lexeme, self.lines[index], literal_value(token_type, lexeme)
+        )
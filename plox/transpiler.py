@@ -0,0 +1,642 @@
+import builtins
+import math
+import time
+import types
+import typing
+import warnings
+from typing import Any, Dict, List, Optional, Set, Tuple
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import (
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set as SetExpr,
+    This,
+    Unary,
+    Variable,
+    Super,
+)
+from plox.ast.expr_visitor import ExprVisitor
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.ast.stmt_visitor import StmtVisitor
+from plox.environment import Cell
+from plox.exceptions import InterpreterError, InterpreterErrorType, PLoxRuntimeError
+from plox.interpreter import Interpreter
+from plox.token import Token, TokenType
+
+
+NUMBER_OPERATORS = {
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+    TokenType.MINUS: "-",
+    TokenType.SLASH: "/",
+    TokenType.STAR: "*",
+}
+
+# Operators whose result is always a bool, so they can be tested directly
+BOOLEAN_OPERATORS = {
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.BANG_EQUAL,
+    TokenType.EQUAL_EQUAL,
+}
+
+
+# Python names of Lox variables end in `_` (globals, properties) or in
+# `_<slot>` (locals), which keeps them apart from Python keywords, builtins
+# and the runtime helpers below. Other identifiers are spelled out as code
+# points after `u_`; Lox identifiers have no `_` past their first character,
+# so no Lox name is spelled the same way.
+def python_name(lexeme: str) -> str:
+    if lexeme.isidentifier() and lexeme.isascii():
+        return lexeme
+    return "u_" + "_".join(f"{ord(character):x}" for character in lexeme)
+
+
+def fail(token: Token, message: str):
+    raise PLoxRuntimeError(token, message)
+
+
+# The namespace generated code runs in, with the helpers for the slow paths
+# of inlined operations
+def runtime_helpers(stringify: typing.Callable[[Any], str]) -> Dict[str, Any]:
+
+    def add(a: Any, b: Any, token: Token) -> Any:
+        if isinstance(a, str) or isinstance(b, str):
+            return str(stringify(a)) + str(stringify(b))
+        fail(token, "Operands must be two numbers or two strings")
+
+    def set_cell(cell: Cell, value: Any) -> Any:
+        cell.value = value
+        return value
+
+    return {
+        "__builtins__": builtins,
+        "Cell": Cell,
+        "stringify": stringify,
+        "add": add,
+        "set_cell": set_cell,
+        "number_error": lambda token: fail(token, "Operand must be a number"),
+        "not_instance": lambda token: fail(token, "Only instances have fields"),
+        "undefined": lambda token: fail(token, f"Undefined variable {token.lexeme}."),
+    }
+
+
+# Lox classes are Python classes with this metaclass; `init` runs on
+# construction and the instance is returned whatever `init` returns. Like
+# functions, classes carry the `arity` calls are checked against.
+class LoxClass(type):
+
+    def __call__(cls, *arguments):
+        instance = object.__new__(cls)
+        initializer = getattr(cls, "init_", None)
+        if initializer is not None:
+            initializer(instance, *arguments)
+        return instance
+
+    def __repr__(cls) -> str:
+        return cls.lox_name  # type: ignore
+
+
+class LoxInstance(metaclass=LoxClass):
+
+    lox_name = "LoxInstance"
+    arity = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.lox_name} instance"
+
+
+class NativeClock:
+
+    __doc__ = "clock"
+    arity = 0
+
+    def __call__(self) -> float:
+        return time.time()
+
+    def __repr__(self) -> str:
+        return "<native clock fn>"
+
+
+# A function being translated: its output lines and the Python names of
+# the locals the resolver laid out in it, by environment level and slot
+class FunctionContext:
+
+    def __init__(self):
+        self.lines: List[Tuple[int, str, int]] = []
+        self.globals: Set[str] = set()
+        self.names: Dict[Tuple[int, int], str] = {}
+        self.level = 0
+        self.temps = 0
+        self.initializer = False
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"_{self.temps}"
+
+
+# Translates resolved statements into the source of a Python module whose
+# `main()` runs the program. Locals become Python locals named after their
+# slots, closures are made by factory functions taking the captured values
+# (or cells) as arguments, and operators are inlined with the type checks
+# Lox requires.
+class PythonTranspiler(ExprVisitor, StmtVisitor):
+
+    def __init__(self, tokens: Optional[List[Token]] = None):
+        # Tokens referenced by runtime errors, shared by every translation
+        # run in the same namespace
+        self.tokens = tokens if tokens is not None else []
+        self.context = FunctionContext()
+        self.indent = 1
+        self.line = 0
+
+    def transpile(self, statements: List[Stmt]) -> Tuple[str, List[int]]:
+        for statement in statements:
+            statement.accept(self)
+
+        body = self.context.lines
+        lines: List[Tuple[int, str, int]] = [(0, "def main():", 0)]
+        if self.context.globals:
+            lines.append((1, "global " + ", ".join(sorted(self.context.globals)), 0))
+        lines.extend(body or [(1, "pass", 0)])
+
+        source = "".join("    " * indent + text + "\n" for indent, text, _ in lines)
+        return source, [line for _, _, line in lines]
+
+    def emit(self, text: str):
+        self.context.lines.append((self.indent, text, self.line))
+
+    def token(self, token: Token) -> str:
+        self.line = token.line
+        self.tokens.append(token)
+        return f"T[{len(self.tokens) - 1}]"
+
+    def suite(self, stmt: Stmt):
+        self.indent += 1
+        start = len(self.context.lines)
+        stmt.accept(self)
+        if len(self.context.lines) == start:
+            self.emit("pass")
+        self.indent -= 1
+
+    def expression(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    def condition(self, expr: Expr) -> str:
+        if (
+            isinstance(expr, Binary)
+            and expr.operator.token_type in BOOLEAN_OPERATORS
+            or isinstance(expr, Unary)
+            and expr.operator.token_type == TokenType.BANG
+        ):
+            return self.expression(expr)
+        if isinstance(expr, Literal):
+            return repr(expr.value is not None and expr.value is not False)
+
+        temp = self.context.temp()
+        return f"(({temp} := {self.expression(expr)}) is not None and {temp} is not False)"
+
+    def local_name(self, lexeme: str, level: int, slot: int) -> str:
+        name = python_name(lexeme)
+        if level == 0:
+            return f"{name}_{slot}"
+        return f"{name}_{level}_{slot}"
+
+    def global_name(self, lexeme: str) -> str:
+        return python_name(lexeme) + "_"
+
+    # Where a declaration stores its value, recording local names so that
+    # closures created later can capture them
+    def target(self, name: Token, slot: Optional[int]) -> str:
+        self.line = name.line
+        if slot is None:
+            target = self.global_name(name.lexeme)
+            self.context.globals.add(target)
+            return target
+
+        level = self.context.level
+        target = self.local_name(name.lexeme, level, slot)
+        self.context.names[(level, slot)] = target
+        return target
+
+    def reference(self, lexeme: str, expr: Assign | Super | This | Variable) -> str:
+        if expr.upvalue is not None:
+            return f"_u{expr.upvalue}"
+        if expr.depth is None:
+            return self.global_name(lexeme)
+        return self.local_name(lexeme, self.context.level - expr.depth, expr.slot)
+
+    def load(self, lexeme: str, expr: Super | This | Variable) -> str:
+        reference = self.reference(lexeme, expr)
+        return reference + ".value" if expr.boxed else reference
+
+    def literal(self, value: Any) -> str:
+        if isinstance(value, float) and not math.isfinite(value):
+            return f"float({str(value)!r})"
+        return repr(value)
+
+    def visit_block_stmt(self, stmt: Block) -> Any:
+        if stmt.scoped:
+            self.context.level += 1
+        for statement in stmt.statements:
+            statement.accept(self)
+        if stmt.scoped:
+            self.context.level -= 1
+
+    def visit_class_stmt(self, stmt: Class) -> Any:
+        self.line = stmt.name.line
+        bases = "LoxInstance"
+        creator_level = self.context.level
+        if stmt.superclass is not None:
+            creator_level += 1
+            bases = f"super_{creator_level}"
+            self.context.names[(creator_level, 0)] = bases
+            superclass = self.expression(stmt.superclass)
+            error = self.token(stmt.superclass.name)
+            self.emit(f"{bases} = {superclass}")
+            self.emit(f"if not isinstance({bases}, LoxClass): superclass_error({error})")
+
+        target = self.target(stmt.name, stmt.slot)
+        name = self.context.temp() if stmt.boxed else target
+        self.emit(f"class {name}({bases}):")
+        self.indent += 1
+        self.emit(f"lox_name = {stmt.name.lexeme!r}")
+        for method in stmt.methods:
+            if method.name.lexeme == "init":
+                self.emit(f"arity = {len(method.params)}")
+        for method in stmt.methods:
+            if not method.captures:
+                self.function(method, self.global_name(method.name.lexeme), True)
+        self.indent -= 1
+
+        if stmt.boxed:
+            self.emit(f"{target} = Cell({name})")
+
+        for method in stmt.methods:
+            if method.captures:
+                attribute = f"{name}.{self.global_name(method.name.lexeme)}"
+                self.closure(method, attribute, creator_level, True)
+
+    def visit_expression_stmt(self, stmt: Expression) -> Any:
+        expr = stmt.expression
+        if isinstance(expr, Assign):
+            self.assign_statement(expr)
+        elif isinstance(expr, SetExpr) and isinstance(expr.object, This):
+            object = self.expression(expr.object)
+            value = self.expression(expr.value)
+            self.emit(f"{object}.{self.global_name(expr.name.lexeme)} = {value}")
+        else:
+            self.emit(self.expression(expr))
+
+    def assign_statement(self, expr: Assign):
+        value = self.expression(expr.value)
+        reference = self.reference(expr.name.lexeme, expr)
+        if expr.upvalue is not None or expr.boxed:
+            self.emit(f"{reference}.value = {value}")
+        elif expr.depth is None:
+            temp = self.context.temp()
+            error = self.token(expr.name)
+            self.context.globals.add(reference)
+            self.emit(f"{temp} = {value}")
+            self.emit(f"if {reference!r} not in G: undefined({error})")
+            self.emit(f"{reference} = {temp}")
+        else:
+            self.emit(f"{reference} = {value}")
+
+    def visit_function_stmt(self, stmt: Function) -> Any:
+        target = self.target(stmt.name, stmt.slot)
+        if not stmt.captures:
+            self.function(stmt, target, False)
+            if stmt.boxed:
+                self.emit(f"{target} = Cell({target})")
+            return
+
+        if stmt.boxed:
+            self.emit(f"{target} = Cell(None)")
+            self.closure(stmt, f"{target}.value", self.context.level, False)
+        else:
+            self.closure(stmt, target, self.context.level, False)
+
+    # Creates a capturing function through a factory, so every closure gets
+    # its own copy of the values (or cells) it captures. A function that
+    # captures its own declaration refers to itself instead.
+    def closure(self, function: Function, target: str, creator_level: int, method: bool):
+        name = python_name(function.name.lexeme) + "_"
+        arguments: List[str] = []
+        parameters: List[str] = []
+        recursive: List[str] = []
+        for index, (depth, slot) in enumerate(function.captures):
+            if depth is None:
+                argument = f"_u{slot}"
+            else:
+                argument = self.context.names[(creator_level - depth, slot)]
+            if not method and not function.boxed and argument == target:
+                recursive.append(f"_u{index}")
+            else:
+                arguments.append(argument)
+                parameters.append(f"_u{index}")
+
+        self.emit(f"def make_{name}({', '.join(parameters)}):")
+        self.indent += 1
+        self.function(function, name, method)
+        for upvalue in recursive:
+            self.emit(f"{upvalue} = {name}")
+        self.emit(f"return {name}")
+        self.indent -= 1
+        self.emit(f"{target} = make_{name}({', '.join(arguments)})")
+
+    def function(self, function: Function, name: str, method: bool):
+        enclosing, self.context = self.context, FunctionContext()
+        enclosing_indent, self.indent = self.indent, self.indent + 1
+
+        is_initializer = method and function.name.lexeme == "init"
+        self.context.initializer = is_initializer
+        parameters = ["this_0"] if method else []
+        if method:
+            self.context.names[(0, 0)] = "this_0"
+        for param in function.params:
+            parameters.append(self.target(param, len(parameters)))
+
+        # Reading the body of a lazy function resolves it, which lays out
+        # its cells
+        body = function.body
+        for slot in function.cells:
+            self.emit(f"{parameters[slot]} = Cell({parameters[slot]})")
+        for statement in body:
+            statement.accept(self)
+        if is_initializer:
+            self.emit("return this_0")
+
+        lines = [(enclosing_indent, f"def {name}({', '.join(parameters)}):", function.name.line)]
+        lines.append((self.indent, repr(function.name.lexeme), function.name.line))
+        if self.context.globals:
+            declared = ", ".join(sorted(self.context.globals))
+            lines.append((self.indent, f"global {declared}", function.name.line))
+        lines.extend(self.context.lines)
+
+        self.context, self.indent = enclosing, enclosing_indent
+        self.context.lines.extend(lines)
+        self.emit(f"{name}.arity = {len(function.params)}")
+
+    def visit_if_stmt(self, stmt: If) -> Any:
+        keyword = "if"
+        branch: Optional[Stmt] = stmt
+        while isinstance(branch, If):
+            self.emit(f"{keyword} {self.condition(branch.condition)}:")
+            self.suite(branch.thenBranch)
+            keyword = "elif"
+            branch = branch.elseBranch
+
+        if branch is not None:
+            self.emit("else:")
+            self.suite(branch)
+
+    def visit_print_stmt(self, stmt: Print) -> Any:
+        self.emit(f"print(stringify({self.expression(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt: Return) -> Any:
+        self.line = stmt.keyword.line
+        if self.context.initializer:
+            self.emit("return this_0")
+        elif stmt.expr is None:
+            self.emit("return None")
+        else:
+            self.emit(f"return {self.expression(stmt.expr)}")
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration) -> Any:
+        value = "None"
+        if stmt.initializer is not None:
+            value = self.expression(stmt.initializer)
+        if stmt.boxed:
+            value = f"Cell({value})"
+        self.emit(f"{self.target(stmt.name, stmt.slot)} = {value}")
+
+    def visit_while_stmt(self, stmt: While) -> Any:
+        self.emit(f"while {self.condition(stmt.condition)}:")
+        self.suite(stmt.body)
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        value = self.expression(expr.value)
+        reference = self.reference(expr.name.lexeme, expr)
+        if expr.upvalue is not None or expr.boxed:
+            return f"set_cell({reference}, {value})"
+        if expr.depth is None:
+            return f"set_global({reference!r}, {value}, {self.token(expr.name)})"
+        return f"({reference} := {value})"
+
+    def visit_binary_expr(self, expr: Binary) -> Any:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        token_type = expr.operator.token_type
+
+        if token_type == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        if token_type == TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+
+        a, b = self.context.temp(), self.context.temp()
+        check = f"({a} := {left}).__class__ is ({b} := {right}).__class__ is float"
+        error = self.token(expr.operator)
+        if token_type == TokenType.PLUS:
+            return f"({a} + {b} if {check} else add({a}, {b}, {error}))"
+        if token_type in NUMBER_OPERATORS:
+            operator = NUMBER_OPERATORS[token_type]
+            return f"({a} {operator} {b} if {check} else number_error({error}))"
+
+        raise InterpreterError(InterpreterErrorType.INVALID_BINARY_OPERATOR)
+
+    # Calls check the callee's arity first; the failing branch evaluates
+    # the arguments too, before reporting the error as Lox does
+    def visit_call_expr(self, expr: Call) -> Any:
+        callee = self.expression(expr.callee)
+        arguments = ", ".join(self.expression(argument) for argument in expr.params)
+        count = len(expr.params)
+        temp = self.context.temp()
+        error = self.token(expr.paren)
+        return (
+            f"({temp}({arguments}) if getattr({temp} := {callee}, 'arity', None) == {count}"
+            f" else call_error({temp}, {error}, [{arguments}]))"
+        )
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        object = self.expression(expr.object)
+        name = self.global_name(expr.name.lexeme)
+        if isinstance(expr.object, This):
+            return f"{object}.{name}"
+
+        temp = self.context.temp()
+        error = self.token(expr.name)
+        return (
+            f"({temp}.{name} if isinstance({temp} := {object}, LoxInstance)"
+            f" else not_instance({error}))"
+        )
+
+    def visit_grouping_expr(self, expr: Grouping) -> Any:
+        return f"({self.expression(expr.expression)})"
+
+    def visit_literal_expr(self, expr: Literal) -> Any:
+        return self.literal(expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> Any:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        temp = self.context.temp()
+        truthy = f"({temp} := {left}) is not None and {temp} is not False"
+
+        if expr.operator.token_type == TokenType.OR:
+            return f"({temp} if {truthy} else {right})"
+        return f"({right} if {truthy} else {temp})"
+
+    def visit_set_expr(self, expr: SetExpr) -> Any:
+        object = self.expression(expr.object)
+        value = self.expression(expr.value)
+        name = self.global_name(expr.name.lexeme)
+        return f"set_field({object}, {name!r}, {value}, {self.token(expr.name)})"
+
+    def visit_super_expr(self, expr: Super) -> Any:
+        assert expr.receiver is not None
+        superclass = self.load(expr.keyword.lexeme, expr)
+        receiver = self.load(expr.receiver.keyword.lexeme, expr.receiver)
+        method = self.global_name(expr.method.lexeme)
+        temp = self.context.temp()
+        error = self.token(expr.method)
+        return (
+            f"({temp}.__get__({receiver}) if ({temp} := getattr({superclass}, {method!r}, None))"
+            f" is not None else undefined_method({error}))"
+        )
+
+    def visit_this_expr(self, expr: This) -> Any:
+        return self.load(expr.keyword.lexeme, expr)
+
+    def visit_unary_expr(self, expr: Unary) -> Any:
+        right = self.expression(expr.right)
+        temp = self.context.temp()
+
+        match expr.operator.token_type:
+            case TokenType.MINUS:
+                error = self.token(expr.operator)
+                return f"(-{temp} if ({temp} := {right}).__class__ is float else number_error({error}))"
+
+            case TokenType.BANG:
+                return f"(({temp} := {right}) is None or {temp} is False)"
+
+            case _:
+                raise InterpreterError(InterpreterErrorType.INVALID_UNARY_OPERATOR)
+
+    def visit_variable_expr(self, expr: Variable) -> Any:
+        self.line = expr.name.line
+        return self.load(expr.name.lexeme, expr)
+
+
+# Runs programs by translating them to Python and executing the result.
+# Each program is compiled into its own module code object, but they all
+# run in one namespace, so globals persist between REPL lines.
+class TranspilingInterpreter(Interpreter):
+
+    def __init__(self):
+        super().__init__()
+        self.tokens: List[Token] = []
+        self.line_tables: Dict[str, List[int]] = {}
+        self.namespace = self.runtime()
+
+    def runtime(self) -> Dict[str, Any]:
+        namespace = runtime_helpers(self.stringify)
+
+        def set_global(name: str, value: Any, token: Token) -> Any:
+            if name not in namespace:
+                fail(token, f"Undefined variable {token.lexeme}.")
+            namespace[name] = value
+            return value
+
+        def set_field(object: Any, name: str, value: Any, token: Token) -> Any:
+            if not isinstance(object, LoxInstance):
+                fail(token, "Only instances have fields")
+            setattr(object, name, value)
+            return value
+
+        def call_error(callee: Any, token: Token, arguments: List[Any]):
+            arity = getattr(callee, "arity", None)
+            if arity is None or not callable(callee):
+                fail(token, "Can only call functions and classes.")
+            fail(token, f"Expected {arity} arguments but got {len(arguments)}.")
+
+        namespace.update(
+            G=namespace,
+            T=self.tokens,
+            LoxClass=LoxClass,
+            LoxInstance=LoxInstance,
+            set_global=set_global,
+            set_field=set_field,
+            call_error=call_error,
+            superclass_error=lambda token: fail(token, "Superclass must be a class"),
+            undefined_method=lambda token: fail(token, f"Undefined property '{token.lexeme}'."),
+            clock_=NativeClock(),
+        )
+        return namespace
+
+    def transpile(self, statements: List[Stmt]) -> str:
+        return PythonTranspiler(self.tokens).transpile(statements)[0]
+
+    def interpret(self, statements: List[Stmt]):
+        source, lines = PythonTranspiler(self.tokens).transpile(statements)
+        filename = f"<plox {len(self.line_tables)}>"
+        self.line_tables[filename] = lines
+        # Calling a literal is a Lox runtime error, not something to warn about
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", SyntaxWarning)
+            code = compile(source, filename, "exec")
+        exec(code, self.namespace)
+
+        try:
+            self.namespace["main"]()
+        except PLoxRuntimeError as e:
+            return self.handle_runtime_error(e)
+        except (AttributeError, NameError, TypeError) as e:
+            return self.handle_runtime_error(self.runtime_error(e))
+
+    # Python raises these where the Lox operation had no explicit check:
+    # reading undefined globals or properties and bad calls
+    def runtime_error(self, error: Exception) -> PLoxRuntimeError:
+        line = 0
+        traceback = error.__traceback__
+        while traceback is not None:
+            table = self.line_tables.get(traceback.tb_frame.f_code.co_filename)
+            if table is not None and 0 < traceback.tb_lineno <= len(table):
+                line = table[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+
+        name = getattr(error, "name", None) or ""
+        lexeme = name[:-1] if name.endswith("_") else name
+        token = Token(TokenType.IDENTIFIER, lexeme, line)
+        if isinstance(error, NameError):
+            return PLoxRuntimeError(token, f"Undefined variable {lexeme}.")
+        if isinstance(error, AttributeError):
+            return PLoxRuntimeError(token, f"Undefined property {lexeme}")
+        if "not callable" in str(error):
+            return PLoxRuntimeError(token, "Can only call functions and classes.")
+        return PLoxRuntimeError(token, str(error))
+
+    def stringify(self, object: Any) -> str:
+        if isinstance(object, (types.FunctionType, types.MethodType)):
+            return f"<fn {object.__doc__}>"
+        return super().stringify(object)
@@ -1,6 +1,49 @@
+from types import GeneratorType
+from typing import Any, Generator, List, Optional
+
+
 def display_error(line: int, location: str, message: str):
     print(f"[Line {line}] Error: {location}: {message}")
 
 
 def log(line: int, location: str, message: str):
     print(f"[Line {line}] Info: {location}: {message}")
+
+
+def trampoline(steps: Generator) -> Any:
+    # Runs a tree of generators without growing the Python stack. A generator
+    # yields another generator to have it run to completion first and gets its
+    # return value back; any other yielded value is sent straight back, and
+    # exceptions propagate to the yielding generator as if it had called it.
+    if not isinstance(steps, GeneratorType):
+        return steps
+
+    stack: List[Generator] = [steps]
+    value: Any = None
+    error: Optional[Exception] = None
+
+    while True:
+        try:
+            if error is None:
+                request = stack[-1].send(value)
+            else:
+                request = stack[-1].throw(error)
+        except StopIteration as stop:
+            stack.pop()
+            value, error = stop.value, None
+            if not stack:
+                return value
+            continue
+        except Exception as exception:
+            stack.pop()
+            if not stack:
+                raise
+            value, error = None, exception
+            continue
+
+        error = None
+        if isinstance(request, GeneratorType):
+            stack.append(request)
+            value = None
+        else:
+            value = request
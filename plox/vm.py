@@ -0,0 +1,503 @@
+from typing import Any, List, Optional, Tuple
+from plox.ast.stmt_interface import Stmt
+from plox.bytecode import BytecodeCompiler, Chunk, ClassProto, FunctionProto, OpCode
+from plox.environment import Cell, LocalEnvironment
+from plox.exceptions import PLoxRuntimeError
+from plox.functions import Callable, PLoxFunction
+from plox.interpreter import Interpreter
+from plox.oop import PLoxClass, PLoxInstance
+
+CONSTANT = OpCode.CONSTANT.value
+NIL = OpCode.NIL.value
+TRUE = OpCode.TRUE.value
+FALSE = OpCode.FALSE.value
+POP = OpCode.POP.value
+DUP = OpCode.DUP.value
+GET_LOCAL = OpCode.GET_LOCAL.value
+SET_LOCAL = OpCode.SET_LOCAL.value
+DEFINE_LOCAL = OpCode.DEFINE_LOCAL.value
+GET_OUTER = OpCode.GET_OUTER.value
+SET_OUTER = OpCode.SET_OUTER.value
+GET_UPVALUE = OpCode.GET_UPVALUE.value
+SET_UPVALUE = OpCode.SET_UPVALUE.value
+SET_LOCAL_CELL = OpCode.SET_LOCAL_CELL.value
+SET_OUTER_CELL = OpCode.SET_OUTER_CELL.value
+BOX = OpCode.BOX.value
+UNBOX = OpCode.UNBOX.value
+GET_GLOBAL = OpCode.GET_GLOBAL.value
+SET_GLOBAL = OpCode.SET_GLOBAL.value
+DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+GET_PROPERTY = OpCode.GET_PROPERTY.value
+SET_PROPERTY = OpCode.SET_PROPERTY.value
+GET_SUPER = OpCode.GET_SUPER.value
+EQUAL = OpCode.EQUAL.value
+NOT_EQUAL = OpCode.NOT_EQUAL.value
+GREATER = OpCode.GREATER.value
+GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+LESS = OpCode.LESS.value
+LESS_EQUAL = OpCode.LESS_EQUAL.value
+ADD = OpCode.ADD.value
+SUBTRACT = OpCode.SUBTRACT.value
+MULTIPLY = OpCode.MULTIPLY.value
+DIVIDE = OpCode.DIVIDE.value
+NOT = OpCode.NOT.value
+NEGATE = OpCode.NEGATE.value
+PRINT = OpCode.PRINT.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+JUMP_IF_TRUE = OpCode.JUMP_IF_TRUE.value
+POP_JUMP_IF_FALSE = OpCode.POP_JUMP_IF_FALSE.value
+LOOP = OpCode.LOOP.value
+CALL = OpCode.CALL.value
+CLOSURE = OpCode.CLOSURE.value
+CAPTURE = OpCode.CAPTURE.value
+CLASS = OpCode.CLASS.value
+CAPTURE_METHODS = OpCode.CAPTURE_METHODS.value
+RETURN = OpCode.RETURN.value
+PUSH_SCOPE = OpCode.PUSH_SCOPE.value
+POP_SCOPE = OpCode.POP_SCOPE.value
+
+
+class VMFunction(PLoxFunction):
+
+    def __init__(
+        self,
+        proto: FunctionProto,
+        upvalues: List[object],
+        is_initializer: bool,
+        receiver: Optional[PLoxInstance] = None,
+    ):
+        super().__init__(proto.declaration, upvalues, is_initializer, receiver)
+        self.proto = proto
+
+    # Only reached from outside the VM's own call instruction, e.g. from a
+    # native callable; runs the function in a dispatch loop of its own
+    def call(self, interpreter: "Interpreter", arguments: List[object]):
+        assert isinstance(interpreter, VM)
+        chunk = self.proto.get()
+        return interpreter.run(CallFrame(self, chunk, self.enter(arguments)))
+
+    # Runs through `call`, which this engine replaces
+    def call_method(
+        self, interpreter: "Interpreter", receiver: PLoxInstance, arguments: List[object]
+    ):
+        return self.bind(receiver).call(interpreter, arguments)
+
+    def bind(self, instance: PLoxInstance):
+        method = VMFunction(self.proto, self.upvalues, self.is_initializer, instance)
+        method.frames = self.frames
+        return method
+
+
+class CallFrame:
+
+    __slots__ = ("function", "chunk", "ip", "environment", "display")
+
+    def __init__(
+        self,
+        function: Optional[VMFunction],
+        chunk: Chunk,
+        environment: Optional[LocalEnvironment],
+    ):
+        self.function = function
+        self.chunk = chunk
+        self.ip = 0
+        # The function frame, returned to the function's pool on return
+        self.environment = environment
+        # Slot lists of the frame and of the scopes pushed inside it
+        self.display: List[List[object]] = (
+            environment.display if environment is not None else []
+        )
+
+
+def capture(
+    captures: Tuple[Tuple[Optional[int], int], ...],
+    display: List[List[object]],
+    upvalues: List[object],
+) -> List[object]:
+    return [
+        upvalues[slot] if depth is None else display[-1 - depth][slot]
+        for depth, slot in captures
+    ]
+
+
+# Runs bytecode from plox.bytecode. Calls between Lox functions push a
+# CallFrame instead of recursing in Python; classes, instances and bound
+# methods are the same objects the tree-walker uses.
+class VM(Interpreter):
+
+    def interpret(self, statements: List[Stmt]):
+        chunk = BytecodeCompiler().compile(statements)
+        try:
+            self.run(CallFrame(None, chunk, None))
+        except PLoxRuntimeError as e:
+            return self.handle_runtime_error(e)
+
+    def run(self, frame: CallFrame) -> Any:
+        frames = [frame]
+        stack: List[Any] = []
+        globals = self.globals.values
+        stringify = self.stringify
+        is_equal = self.is_equal
+
+        code = frame.chunk.code
+        constants = frame.chunk.constants
+        tokens = frame.chunk.tokens
+        ip = 0
+        display = frame.display
+        values = display[-1] if display else []
+        upvalues = frame.function.upvalues if frame.function else []
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                stack.append(values[code[ip]])
+                ip += 1
+
+            elif op == CONSTANT:
+                stack.append(constants[code[ip]])
+                ip += 1
+
+            elif op == POP_JUMP_IF_FALSE:
+                value = stack.pop()
+                if value is None or value is False:
+                    ip += code[ip] + 1
+                else:
+                    ip += 1
+
+            elif op == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    stack.append(globals[name])
+                except KeyError:
+                    raise PLoxRuntimeError(tokens[ip - 1], f"Undefined variable {name}.")
+
+            elif op == ADD:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is float and b.__class__ is float:
+                    stack[-1] = a + b
+                elif isinstance(a, str) or isinstance(b, str):
+                    stack[-1] = str(stringify(a)) + str(stringify(b))
+                else:
+                    raise PLoxRuntimeError(
+                        tokens[ip - 1], "Operands must be two numbers or two strings"
+                    )
+
+            elif op == LESS:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a < b
+
+            elif op == SUBTRACT:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a - b
+
+            elif op == MULTIPLY:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a * b
+
+            elif op == SET_LOCAL:
+                values[code[ip]] = stack[-1]
+                ip += 1
+
+            elif op == POP:
+                stack.pop()
+
+            elif op == LOOP:
+                ip -= code[ip] - 1
+
+            elif op == CALL:
+                count = code[ip]
+                ip += 1
+                callee = stack[-1 - count]
+                arguments = stack[len(stack) - count :]
+                del stack[len(stack) - count - 1 :]
+
+                if callee.__class__ is PLoxClass:
+                    instance = PLoxInstance(callee)
+                    initializer = callee.initializer
+                    if initializer is None:
+                        if count != 0:
+                            raise PLoxRuntimeError(
+                                tokens[ip - 1],
+                                f"Expected 0 arguments but got {count}.",
+                            )
+                        stack.append(instance)
+                        continue
+                    if not isinstance(initializer, VMFunction):
+                        stack.append(callee.call(self, arguments))
+                        continue
+                    callee = initializer.bind(instance)
+
+                if callee.__class__ is VMFunction:
+                    if count != len(callee.declaration.params):
+                        raise PLoxRuntimeError(
+                            tokens[ip - 1],
+                            f"Expected {callee.arity()} arguments but got {count}.",
+                        )
+
+                    chunk = callee.proto.get()
+                    frame.ip = ip
+                    frame.display = display
+                    frame = CallFrame(callee, chunk, callee.enter(arguments))
+                    frames.append(frame)
+
+                    code = chunk.code
+                    constants = chunk.constants
+                    tokens = chunk.tokens
+                    ip = 0
+                    display = frame.display
+                    values = display[-1]
+                    upvalues = callee.upvalues
+
+                elif isinstance(callee, Callable):
+                    if count != callee.arity():
+                        raise PLoxRuntimeError(
+                            tokens[ip - 1],
+                            f"Expected {callee.arity()} arguments but got {count}.",
+                        )
+                    stack.append(callee.call(self, arguments))
+
+                else:
+                    raise PLoxRuntimeError(
+                        tokens[ip - 1], "Can only call functions and classes."
+                    )
+
+            elif op == RETURN:
+                result = stack.pop()
+                function = frame.function
+                if function is not None:
+                    if function.is_initializer:
+                        result = function.receiver
+                    function.release(frame.environment)  # type: ignore
+
+                frames.pop()
+                if not frames:
+                    return result
+
+                frame = frames[-1]
+                code = frame.chunk.code
+                constants = frame.chunk.constants
+                tokens = frame.chunk.tokens
+                ip = frame.ip
+                display = frame.display
+                values = display[-1] if display else []
+                upvalues = frame.function.upvalues if frame.function else []
+                stack.append(result)
+
+            elif op == GET_PROPERTY:
+                name = constants[code[ip]]
+                ip += 1
+                object = stack[-1]
+                if not isinstance(object, PLoxInstance):
+                    raise PLoxRuntimeError(name, "Only instances have fields")
+                stack[-1] = object.get(name)
+
+            elif op == SET_PROPERTY:
+                name = constants[code[ip]]
+                ip += 1
+                value = stack.pop()
+                object = stack[-1]
+                if not isinstance(object, PLoxInstance):
+                    raise PLoxRuntimeError(name, "Only instances have fields")
+                object.set(name, value)
+                stack[-1] = value
+
+            elif op == NIL:
+                stack.append(None)
+
+            elif op == TRUE:
+                stack.append(True)
+
+            elif op == FALSE:
+                stack.append(False)
+
+            elif op == DUP:
+                stack.append(stack[-1])
+
+            elif op == DEFINE_LOCAL:
+                values[code[ip]] = stack.pop()
+                ip += 1
+
+            elif op == GET_OUTER:
+                stack.append(display[-1 - code[ip]][code[ip + 1]])
+                ip += 2
+
+            elif op == SET_OUTER:
+                display[-1 - code[ip]][code[ip + 1]] = stack[-1]
+                ip += 2
+
+            elif op == GET_UPVALUE:
+                stack.append(upvalues[code[ip]])
+                ip += 1
+
+            elif op == SET_UPVALUE:
+                upvalues[code[ip]].value = stack[-1]  # type: ignore
+                ip += 1
+
+            elif op == SET_LOCAL_CELL:
+                values[code[ip]].value = stack[-1]  # type: ignore
+                ip += 1
+
+            elif op == SET_OUTER_CELL:
+                display[-1 - code[ip]][code[ip + 1]].value = stack[-1]  # type: ignore
+                ip += 2
+
+            elif op == BOX:
+                stack[-1] = Cell(stack[-1])
+
+            elif op == UNBOX:
+                stack[-1] = stack[-1].value
+
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals:
+                    raise PLoxRuntimeError(tokens[ip - 1], f"Undefined variable {name}.")
+                globals[name] = stack[-1]
+
+            elif op == DEFINE_GLOBAL:
+                globals[constants[code[ip]]] = stack.pop()
+                ip += 1
+
+            elif op == GET_SUPER:
+                name = constants[code[ip]]
+                ip += 1
+                object = stack.pop()
+                superclass = stack[-1]
+                method = superclass.find_method(name.lexeme)
+                if method is None:
+                    raise PLoxRuntimeError(
+                        name, f"Undefined property '{name.lexeme}'."
+                    )
+                stack[-1] = method.bind(object)
+
+            elif op == EQUAL:
+                b = stack.pop()
+                stack[-1] = is_equal(stack[-1], b)
+
+            elif op == NOT_EQUAL:
+                b = stack.pop()
+                stack[-1] = not is_equal(stack[-1], b)
+
+            elif op == GREATER:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a > b
+
+            elif op == LESS_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a <= b
+
+            elif op == GREATER_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a >= b
+
+            elif op == DIVIDE:
+                b = stack.pop()
+                a = stack[-1]
+                if a.__class__ is not float or b.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = a / b
+
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+
+            elif op == NEGATE:
+                value = stack[-1]
+                if value.__class__ is not float:
+                    raise PLoxRuntimeError(tokens[ip - 1], "Operand must be a number")
+                stack[-1] = -value
+
+            elif op == PRINT:
+                print(stringify(stack.pop()))
+
+            elif op == JUMP:
+                ip += code[ip] + 1
+
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += code[ip] + 1
+                else:
+                    ip += 1
+
+            elif op == JUMP_IF_TRUE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += 1
+                else:
+                    ip += code[ip] + 1
+
+            elif op == CLOSURE:
+                stack.append(VMFunction(constants[code[ip]], [], False))
+                ip += 1
+
+            elif op == CAPTURE:
+                function = stack.pop()
+                function.upvalues = capture(
+                    function.declaration.captures, display, upvalues
+                )
+
+            elif op == CLASS:
+                proto: ClassProto = constants[code[ip]]
+                ip += 1
+                superclass = stack[-1]
+                if proto.superclass is not None and not isinstance(
+                    superclass, PLoxClass
+                ):
+                    raise PLoxRuntimeError(
+                        proto.superclass, "Superclass must be a class"
+                    )
+
+                methods = {
+                    method.declaration.name.lexeme: VMFunction(
+                        method, [], method.declaration.name.lexeme == "init"
+                    )
+                    for method in proto.methods
+                }
+                stack[-1] = PLoxClass(proto.name, superclass, methods)  # type: ignore
+
+            elif op == CAPTURE_METHODS:
+                plox_class = stack.pop()
+                # `super` lives in a scope of its own around the methods
+                creator = display
+                if plox_class.superclass is not None:
+                    creator = display + [[plox_class.superclass]]
+                for method in plox_class.methods.values():
+                    method.upvalues = capture(
+                        method.declaration.captures, creator, upvalues
+                    )
+
+            elif op == PUSH_SCOPE:
+                values = [None] * code[ip]
+                display = display + [values]
+                ip += 1
+
+            elif op == POP_SCOPE:
+                display = display[:-1]
+                values = display[-1] if display else []
+
+            else:
+                raise RuntimeError(f"Unknown opcode {op}")
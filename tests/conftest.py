@@ -0,0 +1,19 @@
+import pytest
+
+from plox.engines import ENGINES
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--engine",
+        choices=ENGINES.keys(),
+        default="tree",
+        help="execution engine used by run_code",
+    )
+
+
+@pytest.fixture(autouse=True)
+def engine(request, monkeypatch):
+    monkeypatch.setattr(
+        "tests.utils.Interpreter", ENGINES[request.config.getoption("--engine")]
+    )
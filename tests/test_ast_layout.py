@@ -0,0 +1,140 @@
+import copy
+import importlib.util
+import pickle
+import tracemalloc
+from typing import Any, Dict, List, Type
+import pytest
+from plox.ast import expr_types, stmt_types
+from plox.ast.expr_interface import Expr
+from plox.ast.expr_types import Binary, Literal, Variable
+from plox.ast.stmt_interface import Stmt
+from plox.parser import Parser
+from plox.scanner import RegexScanner
+from tools import ast_classes_generator
+from tools.benchmarks import LIBRARY_FUNCTION
+
+NODE_CLASSES = [
+    value
+    for module in (expr_types, stmt_types)
+    for value in vars(module).values()
+    if isinstance(value, type)
+    and issubclass(value, (Expr, Stmt))
+    and value not in (Expr, Stmt)
+    and value.__module__ == module.__name__
+]
+
+
+def is_node(value: Any) -> bool:
+    return isinstance(value, (Expr, Stmt))
+
+
+def count_nodes(statements: List[Stmt]) -> int:
+    count = 0
+    pending: List[Any] = list(statements)
+    while pending:
+        value = pending.pop()
+        if isinstance(value, list):
+            pending.extend(value)
+        elif is_node(value):
+            count += 1
+            pending.extend(getattr(value, field) for field in value.__match_args__)
+    return count
+
+
+def retained_bytes(build) -> int:
+    tracemalloc.start()
+    try:
+        result = build()
+        held = tracemalloc.get_traced_memory()[0]
+        del result
+        return held
+    finally:
+        tracemalloc.stop()
+
+
+# Copies a tree into classes with the same fields but a per-instance __dict__,
+# the layout the generator emitted before nodes were slotted.
+def with_dict_layout(statements: List[Stmt]) -> List[Any]:
+    classes: Dict[type, Type] = {}
+
+    def copy(value: Any) -> Any:
+        if isinstance(value, list):
+            return [copy(item) for item in value]
+        if not is_node(value):
+            return value
+
+        cls = type(value)
+        if cls not in classes:
+            classes[cls] = type(cls.__name__, (), {})
+        clone = classes[cls]()
+        for field in cls.__match_args__:
+            setattr(clone, field, copy(getattr(value, field)))
+        return clone
+
+    return copy(statements)
+
+
+@pytest.mark.parametrize("node_class", NODE_CLASSES)
+def test_nodes_are_slotted(node_class):
+    fields = node_class.__match_args__
+    assert node_class.__slots__[: len(fields)] == fields
+    assert "__dict__" not in dir(node_class)
+
+
+def test_nodes_support_structural_matching():
+    token = RegexScanner("a + 1").scan_tokens()
+    expr = Parser(token).expression()
+
+    match expr:
+        case Binary(Variable(name), operator, Literal(value)):
+            assert (name.lexeme, operator.lexeme, value) == ("a", "+", 1.0)
+        case _:
+            pytest.fail("expression did not match")
+
+
+def test_slotted_nodes_pickle():
+    statements = Parser(RegexScanner(LIBRARY_FUNCTION.format(index=1)).scan_tokens()).parse()
+    copied = pickle.loads(pickle.dumps(statements))
+    assert count_nodes(copied) == count_nodes(statements)
+
+
+def test_bytes_per_node():
+    source = "".join(LIBRARY_FUNCTION.format(index=i) for i in range(200))
+    tokens = RegexScanner(source).scan_tokens()
+    statements = Parser(tokens).parse()
+    nodes = count_nodes(statements)
+
+    slotted = retained_bytes(lambda: Parser(tokens).parse()) / nodes
+    with_dict = retained_bytes(lambda: with_dict_layout(statements)) / nodes
+
+    assert slotted < 80
+    assert slotted < 0.7 * with_dict
+
+
+def test_frozen_nodes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ast_classes_generator, "OUTPUT_PATH", str(tmp_path))
+    monkeypatch.setattr(ast_classes_generator, "print", lambda *args: None, raising=False)
+    ast_classes_generator.generate_expressions(frozen=True)
+
+    spec = importlib.util.spec_from_file_location("frozen_expr", tmp_path / "expr_interface.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # Build a node class on the frozen base the way expr_types.py does
+    source = (tmp_path / "expr_types.py").read_text()
+    assert "object.__setattr__(self, 'name', name)" in source
+
+    class Variable(module.Expr):
+        __slots__ = ("name",)
+        __match_args__ = ("name",)
+
+        def __init__(self, name):
+            object.__setattr__(self, "name", name)
+
+    node = Variable("a")
+    with pytest.raises(AttributeError):
+        node.name = "b"
+    with pytest.raises(AttributeError):
+        del node.name
+
+    assert copy.copy(node).name == "a"
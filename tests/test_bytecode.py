@@ -0,0 +1,75 @@
+from .utils import capture_stdout, run_code
+
+from plox.bytecode import BytecodeCompiler
+from plox.optimizer import Optimizer
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+from plox.vm import VM
+
+
+def test_locals_compile_to_slots():
+    source = "{ var a = 1; var b = a + 2; print b; }"
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(VM()).resolve(statements)
+
+    assert BytecodeCompiler().compile(statements).disassemble() == [
+        "0000 PUSH_SCOPE 2",
+        "0002 CONSTANT 0 (1.0)",
+        "0004 DEFINE_LOCAL 0",
+        "0006 GET_LOCAL 0",
+        "0008 CONSTANT 1 (2.0)",
+        "0010 ADD",
+        "0011 DEFINE_LOCAL 1",
+        "0013 GET_LOCAL 1",
+        "0015 PRINT",
+        "0016 POP_SCOPE",
+        "0017 NIL",
+        "0018 RETURN",
+    ]
+
+
+def test_constants_are_shared():
+    statements = Parser(Scanner('print 1 + 1; print "a" + "a";').scan_tokens()).parse()
+    chunk = BytecodeCompiler().compile(statements)
+
+    assert chunk.constants == [1.0, "a"]
+
+
+def test_negative_zero_keeps_its_own_constant(capture_stdout):
+    source = "print 0; print 0 * -1;"
+    statements = Optimizer().optimize(Parser(Scanner(source).scan_tokens()).parse())
+    vm = VM()
+    Resolver(vm).resolve(statements)
+    vm.interpret(statements)
+
+    assert capture_stdout["stdout"] == "0\n-0\n"
+
+
+def test_calls_do_not_use_the_python_stack(capture_stdout):
+    source = """
+        fun depth(n) {
+            if (n == 0) return 0;
+            return depth(n - 1) + 1;
+        }
+        print depth(20000);
+    """
+    vm = run_code(source, VM())
+
+    assert not vm.had_runtime_error
+    assert capture_stdout["stdout"] == "20000\n"
+
+
+def test_loops_and_jumps(capture_stdout):
+    source = """
+        var total = 0;
+        for (var i = 0; i < 10; i = i + 1) {
+            if (i == 3 or i == 5) total = total + 100;
+            else if (i > 7 and !false) total = total - 1;
+            else total = total + i;
+        }
+        print total;
+    """
+    run_code(source, VM())
+
+    assert capture_stdout["stdout"] == "218\n"
@@ -0,0 +1,113 @@
+import io
+import os
+from .utils import capture_stdout
+
+import main
+from plox import cache as cache_module
+from plox.cache import ASTCache
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+
+SOURCE = """
+    fun makeCounter() {
+        var i = 0;
+        fun count() {
+            i = i + 1;
+            print i;
+        }
+        return count;
+    }
+
+    var counter = makeCounter();
+    counter();
+    counter();
+"""
+
+
+def compile_and_store(cache: ASTCache, source: str) -> str:
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+
+    key = cache.key(io.StringIO(source))
+    cache.store(key, statements)
+    return key
+
+
+def test_cache_hit_skips_front_end(tmp_path, capture_stdout):
+    cache = ASTCache(str(tmp_path))
+    key = compile_and_store(cache, SOURCE)
+
+    statements = cache.load(key)
+    assert statements is not None
+
+    Interpreter().interpret(statements)
+
+    assert capture_stdout["stdout"] == "1\n2\n"
+
+
+def test_cache_key_depends_on_source(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    key = compile_and_store(cache, SOURCE)
+
+    assert cache.key(io.StringIO(SOURCE + " ")) != key
+    assert cache.load(cache.key(io.StringIO(SOURCE + " "))) is None
+
+
+def test_cache_key_depends_on_interpreter_version(tmp_path, monkeypatch):
+    cache = ASTCache(str(tmp_path))
+    key = compile_and_store(cache, SOURCE)
+
+    monkeypatch.setattr(cache_module, "_interpreter_version", "other version")
+
+    assert cache.key(io.StringIO(SOURCE)) != key
+
+
+def test_corrupt_cache_entry_is_discarded(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    key = compile_and_store(cache, SOURCE)
+
+    with open(cache.path(key), "wb") as file:
+        file.write(b"not a pickle")
+
+    assert cache.load(key) is None
+    assert not os.path.exists(cache.path(key))
+
+
+def test_mismatched_cache_entry_is_discarded(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    key = compile_and_store(cache, SOURCE)
+    other_key = compile_and_store(cache, "print 1;")
+
+    os.replace(cache.path(other_key), cache.path(key))
+
+    assert cache.load(key) is None
+
+
+def test_cache_key_depends_on_compile_settings(tmp_path):
+    script = tmp_path / "script.lox"
+    script.write_text("var unused = 1; print 2 * 3;")
+    directory = tmp_path / "cache"
+
+    main.run_file(str(script), main.Options(cache_directory=str(directory), eliminate=True))
+    main.run_file(str(script), main.Options(cache_directory=str(directory)))
+    main.run_file(str(script), main.Options(cache_directory=str(directory), eliminate=True))
+
+    assert len(os.listdir(directory)) == 2
+
+
+def test_eliminated_code_is_reported_on_every_run(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text("var unused = 1; print 2 * 3;")
+    options = main.Options(
+        cache_directory=str(tmp_path / "cache"), eliminate=True, report_eliminated=True
+    )
+
+    main.run_file(str(script), options)
+    main.run_file(str(script), options)
+
+    captured = capsys.readouterr()
+    assert captured.out == "6\n6\n"
+    assert captured.err.count("unused variable 'unused'") == 2
@@ -0,0 +1,102 @@
+from typing import Dict
+from .utils import capture_stdout, run_code
+
+from plox.caches import InlineCache, report
+from plox.interpreter import Interpreter
+
+
+def run_cached(code: str) -> Interpreter:
+    interpreter = Interpreter()
+    interpreter.caches = []
+    return run_code(code, interpreter)
+
+
+def sites(interpreter: Interpreter) -> Dict[str, InlineCache]:
+    return {
+        f"{cache.name.lexeme}@{cache.name.line}": cache for cache in interpreter.caches
+    }
+
+
+def test_repeated_accesses_hit(capture_stdout):
+    source = """
+        class Counter {
+            init() { this.count = 0; }
+            add() { this.count = this.count + 1; }
+        }
+        var counter = Counter();
+        for (var i = 0; i < 10; i = i + 1) counter.add();
+        print counter.count;
+    """
+    interpreter = run_cached(source)
+    caches = sites(interpreter)
+
+    assert capture_stdout["stdout"] == "10\n"
+    assert (caches["add@7"].hits, caches["add@7"].misses) == (9, 1)
+    count = [cache for cache in interpreter.caches if cache.name.line == 4]
+    assert [(cache.hits, cache.misses) for cache in count] == [(9, 1), (9, 1)]
+    assert all(cache.state == "monomorphic" for cache in caches.values())
+
+
+def test_sites_turn_polymorphic_then_megamorphic(capture_stdout):
+    classes = "".join(f"class C{n} {{ get() {{ return {n}; }} }}" for n in range(6))
+    source = f"""
+        {classes}
+        fun call(object) {{ return object.get(); }}
+        var two = C0(); var three = C1();
+        call(two); call(three); call(two); call(three);
+        print call(C2()) + call(C3()) + call(C4()) + call(C5());
+    """
+    interpreter = run_cached(source)
+    cache = sites(interpreter)["get@3"]
+
+    assert capture_stdout["stdout"] == "14\n"
+    assert cache.state == "megamorphic"
+    assert cache.hits == 2
+    assert cache.misses == 6
+
+
+def test_fields_shadow_cached_methods(capture_stdout):
+    source = """
+        class Thing { name() { return "method"; } }
+        fun describe(thing) { return thing.name; }
+        var plain = Thing();
+        var shadowed = Thing();
+        shadowed.name = "field";
+        print describe(plain)();
+        print describe(shadowed);
+        print describe(plain)();
+    """
+    run_cached(source)
+
+    assert capture_stdout["stdout"] == "method\nfield\nmethod\n"
+
+
+def test_super_calls_are_cached_per_superclass(capture_stdout):
+    source = """
+        class A { name() { return "A"; } }
+        class B < A { name() { return "B" + super.name(); } }
+        class C < B { name() { return "C" + super.name(); } }
+        var c = C();
+        for (var i = 0; i < 3; i = i + 1) print c.name();
+    """
+    interpreter = run_cached(source)
+    caches = [cache for cache in interpreter.caches if cache.name.line == 4]
+
+    assert capture_stdout["stdout"] == "CBA\n" * 3
+    assert len(caches) == 1
+    assert (caches[0].hits, caches[0].misses) == (2, 1)
+
+
+def test_report_lists_sites(capture_stdout):
+    source = """class P {}
+        var p = P();
+        p.x = 1;
+        for (var i = 0; i < 3; i = i + 1) print p.x;
+    """
+    interpreter = run_cached(source)
+
+    assert report(interpreter.caches).splitlines() == [
+        "inline caches: 2 sites, 2 of 4 lookups hit (50.0%)",
+        "  .x (line 3): 0 hits, 1 misses, monomorphic",
+        "  .x (line 4): 2 hits, 1 misses, monomorphic",
+    ]
@@ -0,0 +1,112 @@
+from typing import List, Optional
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import Block, Expression, If
+from plox.interpreter import Interpreter
+from plox.parser import Parser, StacklessParser
+from plox.resolver import StacklessResolver
+from plox.scanner import RegexScanner
+from tools.pretty_printer import ASTPrettyPrinter, StacklessPrettyPrinter
+
+DEPTH = 100_000
+
+
+def parse(source: str, interpreter: Optional[Interpreter] = None) -> List[Stmt]:
+    tokens = RegexScanner(source).scan_tokens()
+    parser = StacklessParser(tokens)
+    statements = parser.parse()
+    assert parser.errors == []
+
+    StacklessResolver(interpreter or Interpreter()).resolve(statements)
+    return statements
+
+
+def print_expression(source: str) -> str:
+    (statement,) = parse(source)
+    assert isinstance(statement, Expression)
+    return StacklessPrettyPrinter().print(statement.expression)
+
+
+def test_long_binary_chain():
+    output = print_expression("1" + " + 1" * DEPTH + ";")
+    assert output.startswith("(+ " * DEPTH + "1.0 1.0)")
+
+
+def test_right_nested_binary_chain():
+    output = print_expression("1 + (" * DEPTH + "1" + ")" * DEPTH + ";")
+    assert output == "(+ 1.0 (group " * DEPTH + "1.0" + ")" * (2 * DEPTH)
+
+
+def test_nested_parentheses():
+    output = print_expression("(" * DEPTH + "x" + ")" * DEPTH + ";")
+    assert output == "(group " * DEPTH + "x" + ")" * DEPTH
+
+
+def test_unary_chain():
+    output = print_expression("-" * DEPTH + "x;")
+    assert output == "(- " * DEPTH + "x" + ")" * DEPTH
+
+
+def test_assignment_chain():
+    output = print_expression("a = " * DEPTH + "1;")
+    assert output == "(= a " * DEPTH + "1.0" + ")" * DEPTH
+
+
+def test_nested_blocks_resolve_innermost_local():
+    interpreter = Interpreter()
+    source = "{ var a = 1; " + "{ " * DEPTH + "a;" + " }" * DEPTH + " }"
+    (statement,) = parse(source, interpreter)
+
+    for _ in range(DEPTH + 1):
+        assert isinstance(statement, Block)
+        statement = statement.statements[-1]
+
+    assert isinstance(statement, Expression)
+    # No closure captures the inner blocks, so they share the outer frame
+    expr = statement.expression
+    assert (expr.depth, expr.slot) == (0, 0)
+
+
+def test_else_if_chain():
+    (statement,) = parse("if (x) x; else " * DEPTH + "x;")
+
+    for _ in range(DEPTH):
+        assert isinstance(statement, If)
+        statement = statement.elseBranch
+
+    assert isinstance(statement, Expression)
+
+
+def test_stackless_front_end_matches_recursive_one():
+    source = """
+    class A < B {
+        init(x) { this.x = -x; }
+        get() { return super.get() + this.x * 2; }
+    }
+    fun f(a, b) {
+        for (var i = 0; i < a; i = i + 1) {
+            if (i > b and !(i == 3) or nil) print i; else { b = a = i; }
+        }
+        while (true) return f(a - 1)(b).c;
+    }
+    var v = f(1, 2);
+    """
+    tokens = RegexScanner(source).scan_tokens()
+
+    def dump(statements: List[Stmt]) -> List[str]:
+        # Compare expressions through the printer and statements by type
+        pieces: List[str] = []
+        pending: List[Stmt] = list(statements)
+        while pending:
+            node = pending.pop()
+            pieces.append(type(node).__name__)
+            for field in node.__match_args__:
+                value = getattr(node, field)
+                children = value if isinstance(value, list) else [value]
+                for child in children:
+                    if hasattr(child, "accept") and isinstance(child, Stmt):
+                        pending.append(child)
+                    elif hasattr(child, "accept"):
+                        pieces.append(ASTPrettyPrinter().print(child))
+        return pieces
+
+    assert dump(StacklessParser(tokens).parse()) == dump(Parser(tokens).parse())
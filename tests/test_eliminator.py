@@ -0,0 +1,151 @@
+from typing import List, Tuple
+from .utils import capture_stdout
+
+from plox.eliminator import DeadCodeEliminator
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+from tools.pretty_printer import ASTPrettyPrinter
+
+
+def eliminate(code: str, lazy_functions: bool = False) -> Tuple[Interpreter, List, List[str]]:
+    interpreter = Interpreter()
+    statements = Parser(Scanner(code).scan_tokens(), lazy_functions).parse()
+    eliminator = DeadCodeEliminator()
+    eliminator.remove_unreachable(statements)
+    resolver = Resolver(interpreter)
+    resolver.resolve(statements)
+    while eliminator.remove_unused(statements, resolver):
+        resolver = Resolver(interpreter)
+        resolver.resolve(statements)
+    return interpreter, statements, eliminator.removed
+
+
+def printed(statements) -> List[str]:
+    return ASTPrettyPrinter().print_statements(statements).splitlines()
+
+
+def test_unreachable_code_is_removed():
+    source = """
+        fun f(n) {
+            if (n) { return 1; } else { return 2; }
+            print "after";
+        }
+        if (false) print "never"; else print f(true);
+        while (nil) print "never";
+    """
+    _, statements, removed = eliminate(source)
+
+    assert printed(statements) == [
+        "(fun f (n)",
+        "  (if n",
+        "    (block",
+        "      (return 1.0))",
+        "    (block",
+        "      (return 2.0))))",
+        "(print (call f True))",
+    ]
+    assert removed == [
+        "[near line 3] unreachable statement after return",
+        "[near line 6] branch that is never taken",
+        "[near line 6] loop that never runs",
+    ]
+
+
+def test_unused_declarations_are_removed():
+    source = """
+        var unused = 1;
+        fun helper() { return 2; }
+        fun unusedFn() { return helper(); }
+        class Unused {}
+        class Kept {}
+        fun f() {
+            var local = "local";
+            var kept = "kept";
+            return kept;
+        }
+        print f();
+        print Kept;
+    """
+    _, statements, removed = eliminate(source)
+
+    assert printed(statements)[-2:] == ["(print (call f))", "(print Kept)"]
+    assert removed == [
+        "[line 2] unused variable 'unused'",
+        "[line 4] unused function 'unusedFn'",
+        "[line 5] unused class 'Unused'",
+        "[line 8] unused variable 'local'",
+        "[line 3] unused function 'helper'",
+    ]
+
+
+def test_initializers_with_effects_still_run(capture_stdout):
+    source = """
+        fun effect() { print "effect"; return 1; }
+        var unused = effect();
+        var failing = missing;
+        print "done";
+    """
+    interpreter, statements, removed = eliminate(source)
+    interpreter.interpret(statements)
+
+    assert removed == [
+        "[line 3] unused variable 'unused' (its initializer still runs)",
+        "[line 4] unused variable 'failing' (its initializer still runs)",
+    ]
+    assert capture_stdout["stdout"] == "effect\n"
+    assert interpreter.had_runtime_error
+
+
+def test_declarations_that_may_be_used_are_kept():
+    source = """
+        class Base {}
+        class Derived < Base {}
+        var global = 1;
+        fun closure() {
+            var captured = 1;
+            fun inner() { return captured; }
+            return inner;
+        }
+        print closure()();
+    """
+    _, _, removed = eliminate(source)
+
+    assert removed == ["[line 4] unused variable 'global'"]
+
+
+def test_lazy_functions_keep_every_global():
+    source = """
+        var global = 1;
+        fun f() { return global; }
+        print f();
+    """
+    _, _, removed = eliminate(source, lazy_functions=True)
+
+    assert removed == []
+
+
+def test_eliminated_programs_behave_the_same(capture_stdout):
+    source = """
+        var a = 1;
+        var b = 2;
+        fun sum(n) {
+            var total = 0;
+            var unused = n * 2;
+            for (var i = 0; i < n; i = i + 1) total = total + i;
+            return total;
+            total = 0;
+        }
+        {
+            var c = a + 1;
+            var d = c;
+            print c;
+        }
+        print sum(10);
+    """
+    interpreter, statements, _ = eliminate(source)
+    interpreter.interpret(statements)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "2\n45\n"
@@ -0,0 +1,103 @@
+import textwrap
+import pytest
+from .utils import capture_stdout, run_code
+
+from plox.engines import ENGINES
+
+
+@pytest.fixture(params=ENGINES.keys())
+def engine_name(request):
+    return request.param
+
+
+PROGRAM = """
+    fun fib(n) {
+        if (n < 2) return n;
+        return fib(n - 1) + fib(n - 2);
+    }
+
+    fun counter() {
+        var count = 0;
+        fun next() { count = count + 1; return count; }
+        return next;
+    }
+
+    class Shape {
+        init(name) { this.name = name; }
+        describe() { return this.name + " with area " + this.area(); }
+        area() { return 0; }
+    }
+
+    class Square < Shape {
+        init(side) {
+            super.init("square");
+            this.side = side;
+        }
+        area() { return this.side * this.side; }
+        describe() { return "a " + super.describe(); }
+    }
+
+    var next = counter();
+    next();
+    print next();
+    print fib(15);
+    print Square(3).describe();
+    {
+        var total = 0;
+        for (var i = 0; i < 5; i = i + 1) {
+            if (i == 2 or !(i < 4) and nil) total = total - i;
+            else total = total + i * 2;
+        }
+        print total;
+    }
+    print -1.5 / 2 >= -1 == true;
+"""
+
+EXPECTED = textwrap.dedent(
+    """
+    2
+    610
+    a square with area 9
+    14
+    True
+    """
+).lstrip()
+
+
+@pytest.mark.parametrize("lazy_functions", [False, True])
+def test_engines_agree(capture_stdout, engine_name, lazy_functions):
+    interpreter = run_code(PROGRAM, ENGINES[engine_name](), lazy_functions)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == EXPECTED
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "print 1; print nil + 1;",
+        "print 1; print -nil;",
+        "print 1; print undefined;",
+        "var a = 1; print a; a();",
+        "fun f(a) {} print 1; f();",
+        "class A {} print 1; A().missing;",
+        "class A {} class B < A { m() { return super.missing; } } print 1; B().m();",
+    ],
+)
+def test_runtime_errors_stop_every_engine(capture_stdout, engine_name, source):
+    interpreter = run_code(source, ENGINES[engine_name]())
+
+    assert interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "1\n"
+
+
+def test_returned_values_are_not_kept_alive(capture_stdout, engine_name):
+    source = """
+        class Big {}
+        fun make() { return Big(); }
+        print make();
+    """
+    interpreter = run_code(source, ENGINES[engine_name]())
+
+    assert capture_stdout["stdout"] == "Big instance\n"
+    assert interpreter.return_value is None
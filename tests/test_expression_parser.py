@@ -1,86 +1,134 @@
-from plox.parser import Parser
+from typing import Type
+import pytest
+from plox.exceptions import ParserErrorType
+from plox.parser import PARSERS, Parser
 from plox.scanner import Scanner
 from tools.pretty_printer import ASTPrettyPrinter
 
 
-def parse(source: str) -> str:
+@pytest.fixture(params=PARSERS.values())
+def parser_class(request):
+    return request.param
+
+
+def parse(source: str, parser_class: Type[Parser]) -> str:
     scanner = Scanner(source)
     tokens = scanner.scan_tokens()
 
-    parser = Parser(tokens)
+    parser = parser_class(tokens)
     ast = parser.expression()
 
     return ASTPrettyPrinter().print(ast)
 
 
-def test_addition():
+def test_addition(parser_class):
     source = "1 + 1"
-    assert parse(source) == "(+ 1.0 1.0)"
+    assert parse(source, parser_class) == "(+ 1.0 1.0)"
 
 
-def test_addition_and_subtraction():
+def test_addition_and_subtraction(parser_class):
     source = "1 + 1 - 1"
-    assert parse(source) == "(- (+ 1.0 1.0) 1.0)"
+    assert parse(source, parser_class) == "(- (+ 1.0 1.0) 1.0)"
 
 
-def test_multiplication_and_division():
+def test_multiplication_and_division(parser_class):
     source = "2 * 3 / 4"
-    assert parse(source) == "(/ (* 2.0 3.0) 4.0)"
+    assert parse(source, parser_class) == "(/ (* 2.0 3.0) 4.0)"
 
 
-def test_basic_primaries():
+def test_basic_primaries(parser_class):
     source = "123"
-    assert parse(source) == "123.0"
+    assert parse(source, parser_class) == "123.0"
 
     source = "true"
-    assert parse(source) == "True"
+    assert parse(source, parser_class) == "True"
 
     source = "false"
-    assert parse(source) == "False"
+    assert parse(source, parser_class) == "False"
 
     source = "nil"
-    assert parse(source) == "None"
+    assert parse(source, parser_class) == "None"
 
 
-def test_expression_primary():
+def test_expression_primary(parser_class):
     source = "(123 - (456 / 789))"
-    assert parse(source) == "(group (- 123.0 (group (/ 456.0 789.0))))"
+    assert parse(source, parser_class) == "(group (- 123.0 (group (/ 456.0 789.0))))"
 
 
-def test_unary():
+def test_unary(parser_class):
     source = "!false"
-    assert parse(source) == "(! False)"
+    assert parse(source, parser_class) == "(! False)"
 
 
-def test_factor():
+def test_factor(parser_class):
     source = "-123 + 1"
-    assert parse(source) == "(+ (- 123.0) 1.0)"
+    assert parse(source, parser_class) == "(+ (- 123.0) 1.0)"
 
 
-def test_equality():
+def test_equality(parser_class):
     source = "2 == 2"
-    assert parse(source) == "(== 2.0 2.0)"
+    assert parse(source, parser_class) == "(== 2.0 2.0)"
 
     source = "2 != 2"
-    assert parse(source) == "(!= 2.0 2.0)"
+    assert parse(source, parser_class) == "(!= 2.0 2.0)"
 
 
-def test_comparison():
+def test_comparison(parser_class):
     source = "2 > 2"
-    assert parse(source) == "(> 2.0 2.0)"
+    assert parse(source, parser_class) == "(> 2.0 2.0)"
 
     source = "2 >= 2"
-    assert parse(source) == "(>= 2.0 2.0)"
+    assert parse(source, parser_class) == "(>= 2.0 2.0)"
 
     source = "2 < 2"
-    assert parse(source) == "(< 2.0 2.0)"
+    assert parse(source, parser_class) == "(< 2.0 2.0)"
 
     source = "2 <= 2"
-    assert parse(source) == "(<= 2.0 2.0)"
+    assert parse(source, parser_class) == "(<= 2.0 2.0)"
 
 
-def test_complex_expression():
+def test_complex_expression(parser_class):
     source = "(1 + 2 / 2) * -1 >= 0 == false"
     assert (
-        parse(source) == "(== (>= (* (group (+ 1.0 (/ 2.0 2.0))) (- 1.0)) 0.0) False)"
+        parse(source, parser_class) == "(== (>= (* (group (+ 1.0 (/ 2.0 2.0))) (- 1.0)) 0.0) False)"
     )
+
+
+def test_logical_precedence(parser_class):
+    source = "a or b and !c == d"
+    assert parse(source, parser_class) == "(or a (and b (== (! c) d)))"
+
+
+def test_assignment_is_right_associative(parser_class):
+    source = "a = b.c = d or e"
+    assert parse(source, parser_class) == "(= a (set c b (or d e)))"
+
+
+def test_calls_and_properties(parser_class):
+    source = "-a.b(1, c)(d).e + super.f * this.g"
+    assert (
+        parse(source, parser_class)
+        == "(+ (- (. e (call (call (. b a) 1.0 c) d))) (* (super f) (. g this)))"
+    )
+
+
+def test_invalid_assignment_target(parser_class):
+    source = "a + b = c"
+    assert parse(source, parser_class) == "(+ a b)"
+
+
+@pytest.mark.parametrize(
+    "source, error_type",
+    [
+        (
+            "fun f(" + ", ".join(f"p{n}" for n in range(256)) + ") {}",
+            ParserErrorType.TOO_MANY_PARAMETERS,
+        ),
+        ("f(" + ", ".join("1" for _ in range(256)) + ");", ParserErrorType.TOO_MANY_ARGUMENTS),
+    ],
+)
+def test_too_many_parameters_and_arguments(parser_class, source, error_type):
+    parser = parser_class(Scanner(source).scan_tokens())
+    parser.parse()
+
+    assert [error.type for error in parser.errors] == [error_type]
@@ -112,3 +112,35 @@ def test_closure_binding(capture_stdout):
 
     run_code(source)
     assert expected == capture_stdout["stdout"]
+
+
+def test_return_from_nested_loops_and_blocks(capture_stdout):
+    source = """
+        fun find(target) {
+            var i = 0;
+            while (true) {
+                {
+                    for (var j = 0; j < 10; j = j + 1) {
+                        if (i * 10 + j == target) {
+                            if (j > 5) return "late " + i; else return "early " + i;
+                        }
+                    }
+                }
+                i = i + 1;
+            }
+        }
+        fun nothing() {
+            find(3);
+            for (var i = 0; i < 3; i = i + 1) if (i == 1) return;
+            print "unreachable";
+        }
+        fun fallsOff() { find(3); }
+
+        print find(3);
+        print find(28);
+        print nothing();
+        print fallsOff();
+    """
+
+    run_code(source)
+    assert capture_stdout["stdout"] == "early 0\nlate 2\nnil\nnil\n"
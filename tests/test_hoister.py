@@ -0,0 +1,191 @@
+from typing import List, Tuple
+from .utils import capture_stdout, parse_code, run_code
+
+from plox.ast.stmt_interface import Stmt
+from plox.hoister import LoopInvariantHoister
+from plox.interpreter import Interpreter
+from plox.resolver import Resolver
+from tools.pretty_printer import ASTPrettyPrinter
+
+
+def hoist(code: str) -> Tuple[Interpreter, List[Stmt], int]:
+    interpreter = Interpreter()
+    statements = parse_code(code)
+    resolver = Resolver(interpreter)
+    resolver.resolve(statements)
+    hoisted = LoopInvariantHoister().hoist(statements, resolver)
+    Resolver(interpreter).resolve(statements)
+    return interpreter, statements, hoisted
+
+
+def run_both(code: str, capture_stdout) -> int:
+    interpreter = run_code(code, Interpreter())
+    expected = (capture_stdout["stdout"], interpreter.had_runtime_error)
+
+    capture_stdout["stdout"] = ""
+    interpreter, statements, hoisted = hoist(code)
+    interpreter.interpret(statements)
+    assert (capture_stdout["stdout"], interpreter.had_runtime_error) == expected
+    return hoisted
+
+
+def test_condition_and_body_invariants_are_hoisted():
+    source = """
+        fun square(x) { return x * x; }
+        fun sum(n) {
+            var total = 0;
+            for (var i = 0; i < n * 2; i = i + 1) total = total + square(n) + i;
+            return total;
+        }
+    """
+    _, statements, hoisted = hoist(source)
+
+    assert hoisted == 2
+    assert ASTPrettyPrinter().print_statements(statements).splitlines()[3:] == [
+        "  (var total 0.0)",
+        "  (block",
+        "    (var i 0.0)",
+        "    (block",
+        "      (var invariant.0 (* n 2.0))",
+        "      (var invariant.1)",
+        "      (var first.2 True)",
+        "      (while (< i invariant.0)",
+        "        (block",
+        "          (if first.2",
+        "            (block",
+        "              (; (= invariant.1 (call square n)))",
+        "              (; (= first.2 False))))",
+        "          (; (= total (+ (+ total invariant.1) i)))",
+        "          (; (= i (+ i 1.0)))))))",
+        "  (return total))",
+    ]
+
+
+def test_hoisted_programs_behave_the_same(capture_stdout):
+    source = """
+        fun square(x) { return x * x; }
+        fun sum(n) {
+            var total = 0;
+            for (var i = 0; i < n * 2; i = i + 1) total = total + square(n) + i;
+            return total;
+        }
+        print sum(3);
+        print sum(0);
+        var limit = 3;
+        for (var i = 0; i < limit + 1; i = i + 1) print i * limit;
+    """
+
+    assert run_both(source, capture_stdout) == 3
+    assert capture_stdout["stdout"] == "69\n0\n0\n3\n6\n9\n"
+
+
+def test_assigned_and_declared_variables_are_not_invariant(capture_stdout):
+    source = """
+        fun f(n) {
+            var total = 0;
+            var step = 1;
+            while (total < n * 10) {
+                var local = n + 1;
+                total = total + local * step;
+                step = step + 1;
+            }
+            return total;
+        }
+        print f(2);
+    """
+
+    assert run_both(source, capture_stdout) == 1
+    assert capture_stdout["stdout"] == "30\n"
+
+
+def test_variables_assigned_through_closures_are_not_invariant(capture_stdout):
+    source = """
+        fun f() {
+            var k = 1;
+            fun bump() { k = k + 1; }
+            var total = 0;
+            for (var i = 0; i < 3; i = i + 1) {
+                bump();
+                total = total + k * 10 * 2;
+            }
+            return total;
+        }
+        print f();
+        var g = 1;
+        fun bumpGlobal() { g = g + 1; }
+        for (var i = 0; i < g * 3; i = i + g) bumpGlobal();
+        print g;
+    """
+
+    assert run_both(source, capture_stdout) == 0
+    assert capture_stdout["stdout"] == "180\n6\n"
+
+
+def test_fields_stored_through_aliases_are_not_invariant(capture_stdout):
+    source = """
+        class Box { init(v) { this.v = v; } }
+        fun aliased(a, b) {
+            var total = 0;
+            for (var i = 0; i < 3; i = i + 1) {
+                total = total + a.v * 2 * 3;
+                b.v = b.v + 1;
+            }
+            return total;
+        }
+        fun fresh(a) {
+            var total = 0;
+            for (var i = 0; i < a.v + 1; i = i + 1) total = total + Box(i).v;
+            return total;
+        }
+        fun unchanged(a) {
+            var total = 0;
+            for (var i = 0; i < 3; i = i + 1) total = total + a.v * 2 * 3;
+            return total;
+        }
+        var box = Box(1);
+        print aliased(box, box);
+        print fresh(Box(3));
+        print unchanged(box);
+    """
+
+    assert run_both(source, capture_stdout) == 1
+    assert capture_stdout["stdout"] == "36\n6\n72\n"
+
+
+def test_errors_and_output_keep_their_order(capture_stdout):
+    source = """
+        fun f(n, s) {
+            var i = 0;
+            while (i < 2) {
+                print "before";
+                print n * s * 2;
+                i = i + 1;
+            }
+        }
+        fun g(n) {
+            var i = 0;
+            while (i < 0) { var x = n * n * n; i = i + 1; }
+            print "no iterations";
+        }
+        g("text");
+        f(1, "s");
+    """
+
+    assert run_both(source, capture_stdout) == 1
+    assert capture_stdout["stdout"] == "no iterations\nbefore\n"
+
+
+def test_impure_functions_are_not_hoisted(capture_stdout):
+    source = """
+        var calls = 0;
+        fun counted(x) { calls = calls + 1; return x; }
+        fun printed(x) { print x; return x; }
+        fun f(n) {
+            for (var i = 0; i < counted(n); i = i + 1) printed(n);
+        }
+        f(2);
+        print calls;
+    """
+
+    assert run_both(source, capture_stdout) == 0
+    assert capture_stdout["stdout"] == "2\n2\n3\n"
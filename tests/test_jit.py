@@ -0,0 +1,146 @@
+from .utils import capture_stdout, run_code
+
+from plox.jit import JITInterpreter, MAX_DEOPTIMIZATIONS
+
+
+def run_jit(code: str, call_threshold: int = 2, loop_threshold: int = 10) -> JITInterpreter:
+    interpreter = JITInterpreter(call_threshold, loop_threshold)
+    run_code(code, interpreter)
+    return interpreter
+
+
+def profiles(interpreter: JITInterpreter):
+    assert interpreter.jit is not None
+    return {
+        profile.declaration.name.lexeme: profile
+        for profile in interpreter.jit.profiles.values()
+    }
+
+
+def test_hot_functions_are_promoted(capture_stdout):
+    source = """
+        fun fib(n) {
+            if (n < 2) return n;
+            return fib(n - 1) + fib(n - 2);
+        }
+        fun once() { return 1; }
+        print fib(15);
+        print once();
+    """
+    interpreter = run_jit(source)
+    fib, once = profiles(interpreter)["fib"], profiles(interpreter)["once"]
+
+    assert capture_stdout["stdout"] == "610\n1\n"
+    assert fib.code is not None and fib.promotions == [(2, 0)]
+    assert once.code is None and once.promotions == []
+
+
+def test_loop_back_edges_make_functions_hot(capture_stdout):
+    source = """
+        fun sum(n) {
+            var total = 0;
+            for (var i = 0; i < n; i = i + 1) total = total + i;
+            return total;
+        }
+        print sum(20);
+        print sum(3);
+    """
+    interpreter = run_jit(source, call_threshold=100)
+
+    assert capture_stdout["stdout"] == "190\n3\n"
+    assert profiles(interpreter)["sum"].promotions == [(2, 20)]
+
+
+def test_rebinding_a_global_deoptimizes(capture_stdout):
+    source = """
+        fun value() { return 1; }
+        fun read() { return value(); }
+        for (var i = 0; i < 5; i = i + 1) read();
+        fun other() { return 2; }
+        value = other;
+        print read();
+        print read();
+    """
+    interpreter = run_jit(source)
+    read = profiles(interpreter)["read"]
+
+    assert capture_stdout["stdout"] == "2\n2\n"
+    assert read.deoptimizations == 1
+    assert read.promotions == [(2, 0), (2, 0)]
+
+
+def test_rebinding_inside_a_compiled_call(capture_stdout):
+    source = """
+        fun first() { return "first"; }
+        fun second() { return "second"; }
+        fun swap() { first = second; return "swapped"; }
+        fun run(n) {
+            if (n == 1) print swap();
+            return first();
+        }
+        print run(0);
+        print run(0);
+        print run(1);
+    """
+    run_jit(source)
+
+    assert capture_stdout["stdout"] == "first\nfirst\nswapped\nsecond\n"
+
+
+def test_functions_that_keep_deoptimizing_stay_interpreted(capture_stdout):
+    source = """
+        fun a() { return 1; }
+        fun b() { return 2; }
+        fun call() { return a(); }
+        for (var i = 0; i < 20; i = i + 1) {
+            call();
+            if (i == 19) { print call(); }
+            var next = b;
+            b = a;
+            a = next;
+        }
+    """
+    interpreter = run_jit(source)
+    call = profiles(interpreter)["call"]
+
+    assert capture_stdout["stdout"] == "2\n"
+    assert call.deoptimizations == MAX_DEOPTIMIZATIONS
+    assert call.failure == "deoptimized too often"
+
+
+def test_methods_and_errors_in_compiled_code(capture_stdout):
+    source = """
+        class Point {
+            init(x) { this.x = x; }
+            move(dx) { this.x = this.x + dx; return this; }
+        }
+        var p = Point(0);
+        for (var i = 0; i < 5; i = i + 1) p.move(i);
+        print p.x;
+        fun field(object) { return object.x; }
+        print field(p);
+        print field(p);
+        print field(1);
+    """
+    interpreter = run_jit(source)
+
+    assert capture_stdout["stdout"] == "10\n10\n10\n"
+    assert interpreter.had_runtime_error
+    assert profiles(interpreter)["field"].code is not None
+
+
+def test_report_lists_promotions_and_failures(capture_stdout):
+    source = """
+        fun square(n) { return n * n; }
+        fun outer() { fun inner() {} return inner; }
+        for (var i = 0; i < 3; i = i + 1) { square(i); outer(); }
+    """
+    interpreter = run_jit(source)
+    assert interpreter.jit is not None
+
+    assert interpreter.jit.report().splitlines() == [
+        "jit: promoted 1 of 2 functions, 0 deoptimizations "
+        "(thresholds: 2 calls, 10 loop iterations)",
+        "  square (line 2): promoted after 2 calls, 0 loop iterations",
+        "  outer (line 3): not compiled: declares a function",
+    ]
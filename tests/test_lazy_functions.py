@@ -0,0 +1,145 @@
+import textwrap
+from typing import List
+import pytest
+from .utils import capture_stdout
+
+from plox.ast.stmt_interface import Stmt
+from plox.exceptions import ParserError, ParserErrorType
+from plox.interpreter import Interpreter
+from plox.lazy import LazyFunction
+from plox.parser import PARSERS
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+
+
+@pytest.fixture(params=PARSERS.values())
+def parser_class(request):
+    return request.param
+
+
+def run_lazily(code: str, parser_class) -> List[Stmt]:
+    interpreter = Interpreter()
+
+    parser = parser_class(Scanner(code).scan_tokens(), lazy_functions=True)
+    statements = parser.parse()
+    assert parser.errors == []
+
+    Resolver(interpreter).resolve(statements)
+    interpreter.interpret(statements)
+    return statements
+
+
+def test_only_called_functions_are_parsed(capture_stdout, parser_class):
+    source = """
+        fun used() { print "used"; }
+        fun unused() { print "unused"; }
+        used();
+    """
+
+    used, unused, _ = run_lazily(source, parser_class)
+
+    assert isinstance(used, LazyFunction) and used.is_parsed
+    assert isinstance(unused, LazyFunction) and not unused.is_parsed
+    assert capture_stdout["stdout"] == "used\n"
+
+
+def test_closures_resolve_in_declaration_scope(capture_stdout, parser_class):
+    source = """
+        var a = "global";
+        {
+            fun showA() {
+                print a;
+            }
+
+            showA();
+            var a = "block";
+            showA();
+        }
+
+        fun makeCounter() {
+            var i = 0;
+            fun count() {
+                i = i + 1;
+                print i;
+            }
+            return count;
+        }
+
+        var counter = makeCounter();
+        counter();
+        counter();
+    """
+
+    run_lazily(source, parser_class)
+    assert capture_stdout["stdout"] == "global\nglobal\n1\n2\n"
+
+
+def test_lazy_methods(capture_stdout, parser_class):
+    source = """
+        class Doughnut {
+            cook() {
+                print "Fry until golden brown.";
+            }
+        }
+
+        class BostonCream < Doughnut {
+            init(filling) {
+                this.filling = filling;
+            }
+
+            cook() {
+                super.cook();
+                print "Pipe full of " + this.filling + ".";
+            }
+
+            unused() { print "never parsed"; }
+        }
+
+        BostonCream("custard").cook();
+    """
+
+    run_lazily(source, parser_class)
+    assert capture_stdout["stdout"] == (
+        "Fry until golden brown.\nPipe full of custard.\n"
+    )
+
+
+def test_syntax_errors_are_reported_on_first_call(capture_stdout, parser_class):
+    source = textwrap.dedent(
+        """
+        fun broken() {
+            print "first";
+            var = 1;
+        }
+        fun fine() { print "fine"; }
+        fine();
+        broken();
+        """
+    )
+
+    with pytest.raises(ParserError) as exc_info:
+        run_lazily(source, parser_class)
+
+    assert exc_info.value.line == 4
+    assert exc_info.value.type == ParserErrorType.MISSING_IDENTIFIER
+    assert capture_stdout["stdout"] == "fine\n"
+
+    source = "fun bad() { print 1 }\nbad();\n\n\n"
+
+    with pytest.raises(ParserError) as exc_info:
+        run_lazily(source, parser_class)
+
+    assert exc_info.value.line == 1
+    assert exc_info.value.type == ParserErrorType.MISSING_SEMI_COLON
+
+
+def test_unbalanced_body_is_reported_while_parsing(parser_class):
+    source = "fun broken() { if (true) { print 1; }\n\n"
+
+    parser = parser_class(Scanner(source).scan_tokens(), lazy_functions=True)
+    parser.parse()
+
+    assert [error.type for error in parser.errors] == [
+        ParserErrorType.MISSING_CLOSING_BRACE
+    ]
+    assert parser.errors[0].line == 3
@@ -1,6 +1,14 @@
 import textwrap
+import pytest
 from .utils import capture_stdout, run_code
 
+from plox.functions import PLoxFunction
+from plox.interpreter import Interpreter
+from plox.oop import PLoxInstance
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+
 
 def test_argument_passing(capture_stdout):
     source = """
@@ -153,3 +161,106 @@ def test_super(capture_stdout):
         == "Fry until golden brown.\nPipe full of custard and coat with chocolate.\n"
     )
 
+
+
+def test_method_calls_do_not_bind(capture_stdout, monkeypatch):
+    source = """
+        class Counter {
+            init() { this.count = 0; }
+            add(n) { this.count = this.count + n; return this; }
+        }
+        var counter = Counter();
+        counter.add(1).add(2);
+        var add = counter.add;
+        add(3);
+        counter.callback = add;
+        counter.callback(4);
+        print counter.count;
+    """
+    bound = []
+    original = PLoxFunction.bind
+
+    def counting_bind(self, instance):
+        bound.append(self.declaration.name.lexeme)
+        return original(self, instance)
+
+    monkeypatch.setattr(PLoxFunction, "bind", counting_bind)
+    run_code(source, Interpreter())
+
+    assert capture_stdout["stdout"] == "10\n"
+    assert bound == ["add"]
+
+
+def test_instances_share_shapes(capture_stdout):
+    source = """
+        class Point {
+            init(x, y) { this.x = x; this.y = y; }
+        }
+        var a = Point(1, 2);
+        var b = Point(3, 4);
+        var c = Point(5, 6);
+        c.z = 7;
+        var d = Point(8, 9);
+        d.y = 10;
+        var e = Point(0, 0);
+        e.z = 1;
+        var f = Point(0, 0);
+        f.w = 2;
+        class Empty {}
+        var g = Empty();
+        g.y = 1;
+        g.x = 2;
+        print c.x + c.y + c.z;
+        print d.y;
+    """
+    interpreter = run_code(source, Interpreter())
+    a, b, c, d, e, f, g = (interpreter.globals.values[name] for name in "abcdefg")
+    assert all(isinstance(instance, PLoxInstance) for instance in (a, b, c, d, e, f, g))
+
+    assert capture_stdout["stdout"] == "18\n10\n"
+    assert a.shape is b.shape is d.shape
+    assert c.shape is e.shape and c.shape is not f.shape
+    assert c.shape.indices == {"x": 0, "y": 1, "z": 2}
+    assert g.shape.indices == {"y": 0, "x": 1}
+    assert d.values == [8, 10]
+
+
+def test_methods_are_inherited_from_any_ancestor(capture_stdout):
+    source = """
+        class A {
+            init(name) { this.name = name; }
+            greet() { return "A " + this.name; }
+        }
+        class B < A {}
+        class C < B {}
+        class D < C { greet() { return "D " + super.greet(); } }
+        var d = D("d");
+        print C("c").greet();
+        print d.greet();
+    """
+    run_code(source)
+    assert capture_stdout["stdout"] == "A c\nD A d\n"
+
+
+def test_bare_return_in_initializer(capture_stdout):
+    source = """
+        class Counter {
+            init(count) {
+                this.count = count;
+                if (count > 0) return;
+                this.count = 1;
+            }
+        }
+        print Counter(5).count;
+        print Counter(0).count;
+        print Counter(5).init(-1).count;
+    """
+    run_code(source)
+    assert capture_stdout["stdout"] == "5\n1\n1\n"
+
+
+def test_initializers_cannot_return_values():
+    source = "class Foo { init() { return 1; } }"
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    with pytest.raises(Exception, match="Can't return a value from an initializer"):
+        Resolver(Interpreter()).resolve(statements)
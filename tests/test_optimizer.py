@@ -0,0 +1,109 @@
+from .utils import capture_stdout, parse_code, run_statements
+
+from plox.interpreter import Interpreter
+from plox.optimizer import Optimizer
+from plox.parser import Parser
+from plox.scanner import Scanner
+from tools.pretty_printer import ASTPrettyPrinter
+
+
+def optimized(code: str) -> str:
+    statements = Optimizer().optimize(parse_code(code))
+    return ASTPrettyPrinter().print_statements(statements)
+
+
+def run_optimized(code: str) -> Interpreter:
+    return run_statements(Optimizer().optimize(parse_code(code)), Interpreter())
+
+
+def test_constants_are_folded():
+    source = """
+        print 60 * 60 * 24;
+        print "prefix" + "suffix";
+        print "n" + 1;
+        print !true;
+        print -(2);
+        print 1 < 2 == true;
+    """
+
+    assert optimized(source).splitlines() == [
+        "(print 86400.0)",
+        "(print prefixsuffix)",
+        "(print n1)",
+        "(print False)",
+        "(print -2.0)",
+        "(print True)",
+    ]
+
+
+def test_failing_operations_are_left_to_run():
+    assert optimized('print 1 / 0; print "a" - 1; print -nil;').splitlines() == [
+        "(print (/ 1.0 0.0))",
+        "(print (- a 1.0))",
+        "(print (- None))",
+    ]
+
+
+def test_identities_need_number_operands():
+    source = """
+        print (x * 2) * 1;
+        print -(-(x / y));
+        print !!(x < y);
+        print x * 1;
+        print -(-x);
+        print !!x;
+        print (x - y) - -0;
+    """
+
+    assert optimized(source).splitlines() == [
+        "(print (* x 2.0))",
+        "(print (/ x y))",
+        "(print (< x y))",
+        "(print (* x 1.0))",
+        "(print (- (- x)))",
+        "(print (! (! x)))",
+        "(print (- (- x y) -0.0))",
+    ]
+
+
+def test_constant_conditions():
+    source = """
+        if (1 > 2) print "then"; else print "else";
+        if (nil) print "gone";
+        while (false and x) print "never";
+        print nil or "default";
+        print "first" and x;
+        if (!!x) print "x";
+    """
+
+    assert optimized(source).splitlines() == [
+        "(print else)",
+        "(print default)",
+        "(print x)",
+        "(if x",
+        "  (print x))",
+    ]
+
+
+def test_optimized_programs_behave_the_same(capture_stdout):
+    source = """
+        var zero = -0;
+        print zero - 0;
+        print zero * 1;
+        var text = "a";
+        print text + 0;
+        fun f(n) { return (n + 1) * (2 * 3); }
+        print f(1);
+        if (!(1 == 1)) print "no"; else print "yes";
+    """
+    interpreter = run_optimized(source)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "-0\n-0\na0\n12\nyes\n"
+
+
+def test_parsed_statements_are_not_changed():
+    statements = Parser(Scanner("print 1 + 2;").scan_tokens()).parse()
+    Optimizer().optimize(statements)
+
+    assert ASTPrettyPrinter().print_statements(statements) == "(print (+ 1.0 2.0))"
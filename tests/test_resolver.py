@@ -0,0 +1,257 @@
+import gc
+import textwrap
+import tracemalloc
+from typing import List, Tuple
+from .utils import capture_stdout, run_code
+
+import main
+from plox.environment import Cell, LocalEnvironment
+from plox.functions import FRAME_POOL_SIZE
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+
+
+SLOTS_SOURCE = """
+    fun f(a, b) {
+        var c = a;
+        {
+            var d = b;
+            print c + d;
+        }
+    }
+"""
+
+
+def resolve_slots(elide_scopes: bool) -> List[Tuple[int, int]]:
+    statements = Parser(Scanner(SLOTS_SOURCE).scan_tokens()).parse()
+    Resolver(Interpreter(), elide_scopes).resolve(statements)
+
+    (function,) = statements
+    declare_c, block = function.body
+    declare_d, show = block.statements
+    references = [
+        declare_c.initializer,
+        declare_d.initializer,
+        show.expression.left,
+        show.expression.right,
+    ]
+    return [(expr.depth, expr.slot) for expr in references]
+
+
+def test_slots_follow_declaration_order():
+    assert resolve_slots(False) == [(0, 0), (1, 1), (1, 2), (0, 0)]
+
+
+def test_uncaptured_blocks_share_the_function_frame():
+    assert resolve_slots(True) == [(0, 0), (0, 1), (0, 2), (0, 3)]
+
+
+def test_closures_capture_only_what_they_reference():
+    source = """
+        fun f() {
+            var shared = 0;
+            for (var i = 0; i < 2; i = i + 1) {
+                var own = i;
+                { var merged = own; }
+                fun show() { print own; shared = shared + 1; }
+            }
+        }
+    """
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(Interpreter()).resolve(statements)
+
+    (function,) = statements
+    shared, loop = function.body
+    _, while_loop = loop.statements
+    body, _ = while_loop.body.statements
+    own, inner, show = body.statements
+
+    assert function.size == 5 and function.reusable
+    assert (loop.scoped, body.scoped, inner.scoped) == (False, False, False)
+    assert show.captures == ((0, 2), (0, 0))
+    # Only captured variables that are assigned later need a cell
+    assert shared.boxed and not own.boxed
+
+
+def test_closures_copy_their_upvalues(capture_stdout):
+    source = """
+        fun make() {
+            var first;
+            var second;
+            var count = 0;
+            for (var i = 0; i < 2; i = i + 1) {
+                var own = i;
+                fun show() { count = count + 1; print own + count; }
+                if (i == 0) first = show; else second = show;
+            }
+            first();
+            second();
+            print count;
+            return first;
+        }
+        var closure = make();
+    """
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+    interpreter.interpret(statements)
+
+    assert capture_stdout["stdout"] == "1\n3\n2\n"
+    closure = interpreter.globals.values["closure"]
+    count, own = closure.upvalues
+    assert own == 0 and isinstance(count, Cell) and count.value == 2
+
+
+def test_closures_do_not_retain_other_locals(capture_stdout):
+    source = """
+        class Big {}
+        fun make() {
+            var big = Big();
+            var size = 1;
+            fun tiny() { return size; }
+            return tiny;
+        }
+        var tiny = make();
+    """
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+    interpreter.interpret(statements)
+
+    assert interpreter.globals.values["tiny"].upvalues == [1.0]
+
+
+def test_finished_frames_are_pooled_empty(capture_stdout):
+    source = """
+        fun rec(n) {
+            var label = "level " + n;
+            if (n > 0) rec(n - 1);
+        }
+        rec(30);
+    """
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+    interpreter.interpret(statements)
+
+    frames = interpreter.globals.values["rec"].frames
+    assert len(frames) == FRAME_POOL_SIZE
+    assert all(value is None for frame in frames for value in frame.values)
+
+
+def test_globals_stay_unresolved():
+    source = "var a = 1; { print a; a = 2; }"
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+
+    show, assign = statements[1].statements
+    assert show.expression.depth is None
+    assert assign.expression.depth is None
+
+
+def test_repl_memory_stays_flat(capture_stdout):
+    interpreter = Interpreter()
+    main.run(interpreter, Scanner("class Point {} var point = Point(); point.x = 0;"))
+
+    def evaluate(count: int):
+        for i in range(count):
+            source = f"{{ var a = {i}; fun f() {{ return a; }} a = f(); }}"
+            main.run(interpreter, Scanner(source))
+            main.run(interpreter, Scanner(f"point.x = point.x + {i};"))
+
+    evaluate(200)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        evaluate(2000)
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    assert growth < 20_000
+
+
+def test_local_classes_and_functions(capture_stdout):
+    source = """
+        {
+            var greeting = "hi";
+            class Base {
+                name() { return "base"; }
+            }
+            class Derived < Base {
+                init(suffix) { this.suffix = suffix; }
+                name() { return greeting + " " + super.name() + this.suffix; }
+            }
+            fun show(object) { print object.name(); }
+            show(Derived("!"));
+            greeting = "bye";
+            show(Derived("?"));
+        }
+    """
+
+    run_code(source)
+    assert capture_stdout["stdout"] == "hi base!\nbye base?\n"
+
+
+def test_shadowing_in_nested_blocks(capture_stdout):
+    source = """
+        var a = "global";
+        {
+            var a = "outer";
+            var b = "b";
+            {
+                var a = "inner";
+                print a + b;
+                a = "changed";
+                print a;
+            }
+            print a;
+        }
+        print a;
+    """
+
+    expected = textwrap.dedent(
+        """
+        innerb
+        changed
+        outer
+        global
+        """
+    ).lstrip()
+
+    run_code(source)
+    assert capture_stdout["stdout"] == expected
+
+
+def test_display_reaches_every_depth(capture_stdout):
+    depth = 50
+    source = (
+        "{ var x = 1;"
+        + " { var y = x;" * depth
+        + " x = x + y; print x;"
+        + " }" * depth
+        + " print x; }"
+    )
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(interpreter, elide_scopes=False).resolve(statements)
+    interpreter.interpret(statements)
+
+    assert capture_stdout["stdout"] == "2\n2\n"
+
+
+def test_display_lists_the_frames_of_an_activation():
+    frame = LocalEnvironment(None, 1, [])
+    environment = frame
+    for _ in range(3):
+        environment = LocalEnvironment(environment, 1, [])
+
+    environment.assign_at(3, 0, "frame")
+    assert frame.values == ["frame"]
+    assert environment.get_at(3, 0) == "frame"
+    assert len(environment.display) == 4 and environment.display[0] is frame.values
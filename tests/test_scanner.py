@@ -1,10 +1,16 @@
+import io
 from typing import List
 import pytest
 from plox.exceptions import ScannerError, ScannerErrorType
-from plox.scanner import Scanner
+from plox.scanner import RegexScanner, Scanner, StreamScanner
 from plox.token import Token, TokenType
 
 
+@pytest.fixture(params=[Scanner, RegexScanner])
+def scanner_class(request):
+    return request.param
+
+
 def match_tokens(expected: List[Token], scanned: List[Token]) -> bool:
     for e, s in zip(expected, scanned):
         if e != s:
@@ -13,20 +19,20 @@ def match_tokens(expected: List[Token], scanned: List[Token]) -> bool:
     return True
 
 
-def test_parens():
+def test_parens(scanner_class):
     expected = [
         Token(TokenType.LEFT_PAREN, "(", 1),
         Token(TokenType.RIGHT_PAREN, ")", 1),
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("()")
+    scanner = scanner_class("()")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_brackets():
+def test_brackets(scanner_class):
     expected = [
         Token(TokenType.LEFT_PAREN, "(", 1),
         Token(TokenType.LEFT_BRACE, "{", 1),
@@ -37,13 +43,13 @@ def test_brackets():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("({()})")
+    scanner = scanner_class("({()})")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_assignment():
+def test_assignment(scanner_class):
     expected = [
         Token(TokenType.VAR, "var", 1),
         Token(TokenType.IDENTIFIER, "count", 1),
@@ -53,13 +59,13 @@ def test_assignment():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("var count = 42;")
+    scanner = scanner_class("var count = 42;")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_single_character_tokens():
+def test_single_character_tokens(scanner_class):
     expected = [
         Token(TokenType.LEFT_PAREN, "(", 1),
         Token(TokenType.RIGHT_PAREN, ")", 1),
@@ -75,13 +81,13 @@ def test_single_character_tokens():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("(){},.-+;/*")
+    scanner = scanner_class("(){},.-+;/*")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_two_character_tokens():
+def test_two_character_tokens(scanner_class):
     expected = [
         Token(TokenType.BANG, "!", 1),
         Token(TokenType.BANG_EQUAL, "!=", 1),
@@ -94,13 +100,13 @@ def test_two_character_tokens():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("! != = == > >= < <=")
+    scanner = scanner_class("! != = == > >= < <=")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_literals_and_keywords():
+def test_literals_and_keywords(scanner_class):
     expected = [
         Token(TokenType.IDENTIFIER, "identifier", 1),
         Token(TokenType.STRING, "\"string\"", 1),
@@ -111,13 +117,13 @@ def test_literals_and_keywords():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner("identifier \"string\" 123 true false nil")
+    scanner = scanner_class("identifier \"string\" 123 true false nil")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_keywords():
+def test_keywords(scanner_class):
     expected = [
         Token(TokenType.AND, "and", 1),
         Token(TokenType.CLASS, "class", 1),
@@ -135,14 +141,14 @@ def test_keywords():
         Token(TokenType.EOF, "", 1)
     ]
 
-    scanner = Scanner(
+    scanner = scanner_class(
         "and class else fun for if or print return super this var while")
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_multiple_lines():
+def test_multiple_lines(scanner_class):
     code = """
     var name = "John";
     var age = 30;
@@ -177,13 +183,13 @@ def test_multiple_lines():
         Token(TokenType.EOF, "", 6)
     ]
 
-    scanner = Scanner(code)
+    scanner = scanner_class(code)
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_multiple_lines_with_comments():
+def test_multiple_lines_with_comments(scanner_class):
     code = """
     // Define variables
     var name = "Alice"; // Name variable
@@ -221,14 +227,14 @@ def test_multiple_lines_with_comments():
         Token(TokenType.EOF, "", 9)
     ]
 
-    scanner = Scanner(code)
+    scanner = scanner_class(code)
     scanner.scan_tokens()
 
     assert match_tokens(expected, scanner.tokens)
 
 
-def test_unterminated_string():
-    scanner = Scanner("\"abc")
+def test_unterminated_string(scanner_class):
+    scanner = scanner_class("\"abc")
 
     with pytest.raises(ScannerError) as exc_info:
         scanner.scan_tokens()
@@ -236,10 +242,107 @@ def test_unterminated_string():
     assert exc_info.value.type == ScannerErrorType.UNTERMINATED_STRING
 
 
-def test_unexpected_character():
-    scanner = Scanner("var @count = 1;")
+def test_unexpected_character(scanner_class):
+    scanner = scanner_class("var @count = 1;")
 
     with pytest.raises(ScannerError) as exc_info:
         scanner.scan_tokens()
 
     assert exc_info.value.type == ScannerErrorType.UNEXPECTED_CHARACTER
+
+
+CORPUS = [
+    "()",
+    "({()})",
+    "var count = 42;",
+    "(){},.-+;/*",
+    "! != = == > >= < <=",
+    "identifier \"string\" 123 true false nil",
+    "and class else fun for if or print return super this var while",
+    """
+    var name = "John";
+    var age = 30;
+    print("Name:", name);
+    print("Age:", age);
+    """,
+    """
+    // Define variables
+    var name = "Alice"; // Name variable
+    var age = 25; // Age variable
+
+    // Print details
+    print("Name:", name); // Print Name
+    print("Age:", age); // Print Age
+    """,
+    "snake_case _private 12.5 12. .5 a1b2 \"multi\nline\" after",
+    "x//comment at end of file",
+]
+
+
+def token_tuples(tokens: List[Token]) -> List[tuple]:
+    return [(t.token_type, t.lexeme, t.line, t.value) for t in tokens]
+
+
+def scan_with_values(scanner_class, source: str) -> List[tuple]:
+    return token_tuples(scanner_class(source).scan_tokens())
+
+
+@pytest.mark.parametrize("source", CORPUS)
+def test_regex_scanner_matches_default(source):
+    assert scan_with_values(RegexScanner, source) == scan_with_values(Scanner, source)
+
+
+def test_regex_scanner_throughput_corpus():
+    source = "\n".join(CORPUS) * 200
+
+    assert scan_with_values(RegexScanner, source) == scan_with_values(Scanner, source)
+
+
+@pytest.mark.parametrize("source", ["var a = 1;\n\"abc\ndef", "var a = 1;\n@"])
+def test_regex_scanner_errors_match_default(source):
+    results = []
+    for scanner_class in (Scanner, RegexScanner):
+        scanner = scanner_class(source)
+        with pytest.raises(ScannerError) as exc_info:
+            scanner.scan_tokens()
+
+        error = exc_info.value
+        results.append((error.type, error.line, token_tuples(scanner.tokens)))
+
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_stream_scanner_matches_default_across_chunk_boundaries(chunk_size):
+    source = "\n".join(CORPUS) * 3
+    scanner = StreamScanner.from_stream(io.StringIO(source), chunk_size)
+
+    assert token_tuples(list(scanner.iter_tokens())) == scan_with_values(Scanner, source)
+
+
+def test_stream_scanner_yields_lazily():
+    stream = io.StringIO("var a = 1;\n" * 1000)
+    tokens = StreamScanner.from_stream(stream, 16).iter_tokens()
+
+    first = next(tokens)
+
+    assert first == Token(TokenType.VAR, "var", 1)
+    assert stream.tell() < 64
+
+
+@pytest.mark.parametrize(
+    "source, error_type, line",
+    [
+        ("var a;\n\"abc\ndef\nghi", ScannerErrorType.UNTERMINATED_STRING, 4),
+        ("var a;\n\nvar @b;", ScannerErrorType.UNEXPECTED_CHARACTER, 3),
+    ],
+)
+def test_stream_scanner_errors(source, error_type, line):
+    scanner = StreamScanner.from_stream(io.StringIO(source), 4)
+
+    with pytest.raises(ScannerError) as exc_info:
+        scanner.scan_tokens()
+
+    assert exc_info.value.type == error_type
+    assert exc_info.value.line == line
+    assert scanner.had_error
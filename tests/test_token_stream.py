@@ -0,0 +1,101 @@
+import io
+import tracemalloc
+from .utils import capture_stdout
+
+import main
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import RegexScanner, StreamScanner
+from plox.token import TokenStream, TokenType
+
+SOURCE = """
+    class Counter {
+        init(start) {
+            this.count = start;
+        }
+
+        step() {
+            this.count = this.count + 1.5;
+            return this.count;
+        }
+    }
+
+    var counter = Counter(1);
+    var label = "count:
+multi-line";
+    while (counter.step() < 10) {}
+    print label + " " + counter.count;
+"""
+
+
+def token_tuples(tokens) -> list:
+    return [
+        (tokens[i].token_type, tokens[i].lexeme, tokens[i].line, tokens[i].value)
+        for i in range(len(tokens))
+    ]
+
+
+def test_token_stream_matches_token_list():
+    tokens = RegexScanner(SOURCE).scan_tokens()
+    stream = RegexScanner(SOURCE).scan_token_stream()
+
+    assert isinstance(stream, TokenStream)
+    assert token_tuples(stream) == token_tuples(tokens)
+    assert stream[-1].token_type == TokenType.EOF
+
+
+def test_negative_index_on_a_fresh_stream():
+    tokens = RegexScanner(SOURCE).scan_tokens()
+    stream = RegexScanner(SOURCE).scan_token_stream()
+
+    last = stream[-1]
+    assert (last.token_type, last.line) == (TokenType.EOF, tokens[-1].line)
+    assert stream[-1] is last
+
+
+def test_stream_scanner_fills_token_stream():
+    tokens = RegexScanner(SOURCE).scan_tokens()
+    stream = StreamScanner.from_stream(io.StringIO(SOURCE), 4).scan_token_stream()
+
+    assert token_tuples(stream) == token_tuples(tokens)
+
+
+def test_streamed_files_compile_from_a_token_stream(capture_stdout, monkeypatch):
+    def scan_tokens(self):
+        raise AssertionError("streamed input was scanned into a token list")
+
+    monkeypatch.setattr(StreamScanner, "scan_tokens", scan_tokens)
+    interpreter = Interpreter()
+    scanner = StreamScanner.from_stream(io.StringIO(SOURCE), 16)
+    statements = main.compile_source(interpreter, scanner, main.Options())
+    interpreter.interpret(statements)
+
+    assert capture_stdout["stdout"] == "count:\nmulti-line 10\n"
+
+
+def test_parser_consumes_token_stream(capture_stdout):
+    interpreter = Interpreter()
+    statements = Parser(RegexScanner(SOURCE).scan_token_stream()).parse()
+    Resolver(interpreter).resolve(statements)
+    interpreter.interpret(statements)
+
+    assert capture_stdout["stdout"] == "count:\nmulti-line 10\n"
+
+
+def held_memory(function) -> int:
+    tracemalloc.start()
+    try:
+        result = function()
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def test_token_stream_memory():
+    source = SOURCE * 200
+
+    token_list = held_memory(lambda: RegexScanner(source).scan_tokens())
+    token_stream = held_memory(lambda: RegexScanner(source).scan_token_stream())
+
+    assert token_stream * 4 < token_list
@@ -0,0 +1,139 @@
+from .utils import capture_stdout, run_code
+
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import Scanner
+from plox.transpiler import TranspilingInterpreter
+
+
+def resolve(interpreter: TranspilingInterpreter, code: str, lazy_functions: bool = False):
+    statements = Parser(Scanner(code).scan_tokens(), lazy_functions=lazy_functions).parse()
+    Resolver(interpreter).resolve(statements)
+    return statements
+
+
+def run_python(code: str, lazy_functions: bool = False) -> TranspilingInterpreter:
+    interpreter = TranspilingInterpreter()
+    run_code(code, interpreter, lazy_functions)
+    return interpreter
+
+
+def test_locals_become_python_locals():
+    interpreter = TranspilingInterpreter()
+    source = interpreter.transpile(resolve(interpreter, "{ var a = 1; print a; }"))
+
+    assert source == (
+        "def main():\n"
+        "    a_1_0 = 1.0\n"
+        "    print(stringify(a_1_0))\n"
+    )
+
+
+def test_closures_copy_captured_values(capture_stdout):
+    source = """
+        var first;
+        var second;
+        for (var i = 0; i < 2; i = i + 1) {
+            var own = i;
+            fun show() { print own; }
+            if (i == 0) first = show; else second = show;
+        }
+        first();
+        second();
+    """
+    interpreter = run_python(source)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "0\n1\n"
+
+
+def test_recursive_local_functions(capture_stdout):
+    source = """
+        fun outer() {
+            fun count(n) {
+                if (n == 0) return 0;
+                return count(n - 1) + 1;
+            }
+            return count(5);
+        }
+        print outer();
+    """
+    interpreter = run_python(source)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "5\n"
+
+
+def test_values_print_like_lox(capture_stdout):
+    source = """
+        class A { init() { return; } m() {} }
+        fun f() {}
+        print A;
+        print A();
+        print A().m;
+        print f;
+        print clock;
+        print A().init() == nil;
+    """
+    interpreter = run_python(source)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == (
+        "A\nA instance\n<fn m>\n<fn f>\n<native clock fn>\nFalse\n"
+    )
+
+
+def test_python_errors_become_runtime_errors(capture_stdout):
+    for source, message in [
+        ("print 1;\nprint missing;", "[line 2] Undefined variable missing."),
+        ("class A {}\nprint A().x;", "[line 2] Undefined property x"),
+        ('print 1;\n"text"();', "[line 2] Can only call functions and classes."),
+        ("fun f(a) {}\nf();", "[line 2] Expected 1 arguments but got 0."),
+        ("fun f(a) {}\nf(1, 2);", "[line 2] Expected 1 arguments but got 2."),
+        ("class A { init(a) {} }\nA();", "[line 2] Expected 1 arguments but got 0."),
+        ("class A {}\nA(1);", "[line 2] Expected 0 arguments but got 1."),
+        ("class A { m(a) {} }\nA().m();", "[line 2] Expected 1 arguments but got 0."),
+        (
+            "class A {}\nclass B < A { m() { super.missing(); } }\nB().m();",
+            "[line 2] Undefined property 'missing'.",
+        ),
+        ("print 1;\nmissing = 2;", "[line 2] Undefined variable missing."),
+        ("var a = 1;\na.x = 2;", "[line 2] Only instances have fields"),
+    ]:
+        interpreter = TranspilingInterpreter()
+        error = interpreter.interpret(resolve(interpreter, source))
+
+        assert interpreter.had_runtime_error
+        assert error == message
+
+
+def test_globals_persist_between_programs(capture_stdout):
+    interpreter = TranspilingInterpreter()
+    interpreter.interpret(resolve(interpreter, "var a = 1; fun f() { return a; }"))
+    interpreter.interpret(resolve(interpreter, "a = 2; print f();"))
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "2\n"
+
+
+def test_escaped_names_do_not_collide_with_lox_names(capture_stdout):
+    interpreter = run_python('var é = "accent"; var ue9 = "plain"; print é; print ue9;')
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "accent\nplain\n"
+
+
+def test_lazy_functions_box_assigned_parameters(capture_stdout):
+    source = """
+        fun make(n) {
+            fun inner() { n = n + 1; return n; }
+            return inner;
+        }
+        var f = make(0);
+        print f();
+        print f();
+    """
+    interpreter = run_python(source, lazy_functions=True)
+
+    assert not interpreter.had_runtime_error
+    assert capture_stdout["stdout"] == "1\n2\n"
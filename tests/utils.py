@@ -1,5 +1,7 @@
 import pytest
 import sys
+from typing import List, Optional
+from plox.ast.stmt_interface import Stmt
 from plox.interpreter import Interpreter
 from plox.parser import Parser
 from plox.resolver import Resolver
@@ -21,16 +23,29 @@ def capture_stdout(monkeypatch):
     return buffer
 
 
-def run_code(code: str):
-    interpreter = Interpreter()
-
+def parse_code(code: str, lazy_functions: bool = False) -> List[Stmt]:
     scanner = Scanner(code)
     tokens = scanner.scan_tokens()
 
-    parser = Parser(tokens)
-    statements = parser.parse()
+    parser = Parser(tokens, lazy_functions=lazy_functions)
+    return parser.parse()
+
+
+def run_statements(
+    statements: List[Stmt], interpreter: Optional[Interpreter] = None
+) -> Interpreter:
+    if interpreter is None:
+        interpreter = Interpreter()
 
     resolver = Resolver(interpreter)
     resolver.resolve(statements)
 
     interpreter.interpret(statements)
+    return interpreter
+
+
+# Runs on the engine picked with --engine unless given an interpreter
+def run_code(
+    code: str, interpreter: Optional[Interpreter] = None, lazy_functions: bool = False
+) -> Interpreter:
+    return run_statements(parse_code(code, lazy_functions), interpreter)
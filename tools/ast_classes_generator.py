@@ -1,9 +1,10 @@
+import argparse
 from os import walk, unlink
-from os.path import join
+from os.path import abspath, dirname, join
 import textwrap
-from typing import List, Literal, Tuple
+from typing import Dict, List, Literal, Tuple
 
-OUTPUT_PATH = "../plox/ast/"
+OUTPUT_PATH = join(dirname(abspath(__file__)), "../plox/ast/")
 EXPRESSIONS: List[Tuple[str, str]] = [
     ("Assign", "name: Token, value: Expr"),
     ("Binary", "left: Expr, operator: Token, right: Expr"),
@@ -18,43 +19,86 @@ EXPRESSIONS: List[Tuple[str, str]] = [
     ("Unary", "operator: Token, right: Expr"),
     ("Variable", "name: Token"),
 ]
+# Slots with a default that are filled in after construction (by the
+# resolver), which are neither constructor parameters nor __match_args__.
+REFERENCE = [
+    "depth: Optional[int] = None",
+    "slot: int = 0",
+    "upvalue: Optional[int] = None",
+    "boxed: bool = False",
+]
+DECLARATION = ["slot: Optional[int] = None", "boxed: bool = False"]
+# Filled in by the interpreter the first time the node runs
+CACHE = ["cache: Optional['InlineCache'] = None"]
+ANNOTATIONS: Dict[str, List[str]] = {
+    "Assign": REFERENCE,
+    "Get": CACHE,
+    "Set": CACHE,
+    "Super": REFERENCE + ["receiver: Optional['This'] = None"] + CACHE,
+    "This": REFERENCE,
+    "Variable": REFERENCE,
+    "Block": ["scoped: bool = True", "size: int = 0"],
+    "Class": DECLARATION,
+    "Function": DECLARATION
+    + [
+        "size: int = 0",
+        "reusable: bool = False",
+        "cells: Tuple[int, ...] = ()",
+        "captures: Tuple[Tuple[Optional[int], int], ...] = ()",
+    ],
+    "VariableDeclaration": DECLARATION,
+}
 STATEMENTS: List[Tuple[str, str]] = [
     ("Block", "statements: List[Stmt]"),
     ("Function", "name: Token, params: List[Token], body: List[Stmt]"),
-    ("Class", "name: Token, superclass: Variable, method: List[Function]"),
+    ("Class", "name: Token, superclass: Optional[Variable], methods: List[Function]"),
     ("Expression", "expression: Expr"),
-    ("If", "condition: Expr, thenBranch: Stmt, elseBranch: Stmt"),
+    ("If", "condition: Expr, thenBranch: Stmt, elseBranch: Optional[Stmt]"),
     ("Print", "expression: Expr"),
-    ("Return", "keyword: Token, expr: Expr"),
-    ("VariableDeclaration", "name: Token, initializer: Expr"),
+    ("Return", "keyword: Token, expr: Optional[Expr]"),
+    ("VariableDeclaration", "name: Token, initializer: Optional[Expr]"),
     ("While", "condition: Expr, body: Stmt"),
 ]
 
 
 def generate_expr_types(
-    content_type: Literal["Expr", "Stmt"], content: List[Tuple[str, str]]
+    content_type: Literal["Expr", "Stmt"],
+    content: List[Tuple[str, str]],
+    frozen: bool = False,
 ):
     code = f"""
-        from typing import TYPE_CHECKING, List
+        from typing import TYPE_CHECKING, List, Optional, Tuple
         from plox.token import Token
         from plox.ast.expr_interface import Expr
 
         if TYPE_CHECKING:
             from plox.ast.{content_type.lower()}_visitor import {content_type}Visitor
     """
+    if content_type == "Expr":
+        code += "        from plox.caches import InlineCache\n"
 
     class_code = ""
     for name, params in content:
-        param_names = map(lambda x: x.split(":")[0], params.split(", "))
+        param_names = [param.split(":")[0] for param in params.split(", ")]
+        annotations = ANNOTATIONS.get(name, [])
+        annotation_names = [annotation.split(":")[0] for annotation in annotations]
         class_code += textwrap.dedent(
             f"""
             class {name}({content_type}):
 
-                def __init__(self, {params}):      
+                __slots__ = {format_names(param_names + annotation_names)}
+                __match_args__ = {format_names(param_names)}
+
+                def __init__(self, {params}):
         """
         )
         for param in param_names:
-            class_code += f"{' ' * 8}self.{param} = {param}\n"
+            if frozen:
+                class_code += f"{' ' * 8}object.__setattr__(self, '{param}', {param})\n"
+            else:
+                class_code += f"{' ' * 8}self.{param} = {param}\n"
+        for annotation in annotations:
+            class_code += f"{' ' * 8}self.{annotation}\n"
 
         class_code += textwrap.indent(
             textwrap.dedent(
@@ -77,6 +121,11 @@ def generate_expr_types(
     create_file(join(OUTPUT_PATH, f"{content_type.lower()}_types.py"), code)
 
 
+def format_names(names: List[str]) -> str:
+    quoted = ", ".join(f"'{name}'" for name in names)
+    return f"({quoted},)" if len(names) == 1 else f"({quoted})"
+
+
 def generate_expr_visitor(
     content_type: Literal["Expr", "Stmt"], content: List[Tuple[str, str]]
 ):
@@ -101,35 +150,68 @@ def generate_expr_visitor(
 
 
 def generate_expr_interface(
-    content_type: Literal["Expr", "Stmt"], content: List[Tuple[str, str]]
+    content_type: Literal["Expr", "Stmt"],
+    content: List[Tuple[str, str]],
+    frozen: bool = False,
 ):
     code = textwrap.dedent(
         f"""
-        from typing import TYPE_CHECKING, Any
+        from typing import TYPE_CHECKING, Any, Tuple
         if TYPE_CHECKING:
             from plox.ast.{content_type.lower()}_visitor import {content_type}Visitor
 
-                              
+
         class {content_type}:
 
+            __slots__ = ()
+            __match_args__: Tuple[str, ...] = ()
+
             def accept(self, visitor: '{content_type}Visitor') -> Any:
                 raise Exception('accept(visitor: {content_type}Visitor) is not implemented')
     """
     ).strip()
 
+    # Frozen nodes reject writes to their fields, so they pickle and copy
+    # through their constructor and only restore resolver annotations as state.
+    if frozen:
+        code += textwrap.indent(
+            textwrap.dedent(
+                """
+
+                def __setattr__(self, name: str, value: Any):
+                    if name in self.__match_args__:
+                        raise AttributeError(f"{type(self).__name__} nodes are frozen")
+                    object.__setattr__(self, name, value)
+
+                def __delattr__(self, name: str):
+                    raise AttributeError(f"{type(self).__name__} nodes are frozen")
+
+                def __reduce__(self):
+                    fields = tuple(getattr(self, field) for field in self.__match_args__)
+                    annotations = {
+                        name: getattr(self, name)
+                        for name in self.__slots__
+                        if name not in self.__match_args__
+                    }
+                    return (type(self), fields, (None, annotations))
+            """
+            ),
+            "    ",
+        ).rstrip()
+
     create_file(join(OUTPUT_PATH, f"{content_type.lower()}_interface.py"), code)
 
 
-def generate_expressions():
+def generate_expressions(frozen: bool = False):
     create_file(join(OUTPUT_PATH, "__init__.py"))
 
-    generate_expr_interface("Expr", EXPRESSIONS)
+    generate_expr_interface("Expr", EXPRESSIONS, frozen)
     generate_expr_visitor("Expr", EXPRESSIONS)
-    generate_expr_types("Expr", EXPRESSIONS)
+    generate_expr_types("Expr", EXPRESSIONS, frozen)
 
-    generate_expr_interface("Stmt", STATEMENTS)
+    generate_expr_interface("Stmt", STATEMENTS, frozen)
     generate_expr_visitor("Stmt", STATEMENTS)
-    generate_expr_types("Stmt", STATEMENTS)
+    generate_expr_types("Stmt", STATEMENTS, frozen)
 
 
 def create_file(path: str, code: str = ""):
@@ -148,8 +230,16 @@ def clear_old_files():
 
 
 def main():
+    arg_parser = argparse.ArgumentParser(prog="ast_classes_generator")
+    arg_parser.add_argument(
+        "--frozen",
+        action="store_true",
+        help="emit immutable nodes (incompatible with lazy function bodies)",
+    )
+    args = arg_parser.parse_args()
+
     clear_old_files()
-    generate_expressions()
+    generate_expressions(args.frozen)
 
 
 if __name__ == "__main__":
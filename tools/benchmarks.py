@@ -0,0 +1,718 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from plox.environment import Environment, LocalEnvironment
+from plox.parser import Parser, PrattParser
+from plox.scanner import RegexScanner, Scanner, StreamScanner
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+SAMPLE_PROGRAM = """
+// Generated benchmark input
+class Point {
+    init(x, y) {
+        this.x = x;
+        this.y = y;
+    }
+
+    length_squared() {
+        return this.x * this.x + this.y * this.y;
+    }
+}
+
+fun total(count) {
+    var sum = 0;
+    for (var i = 0; i < count; i = i + 1) {
+        sum = sum + Point(i, i / 2.5).length_squared();
+    }
+    return sum;
+}
+
+var label = "total:";
+if (total(10) >= 100 and label != nil) print label;
+"""
+
+
+def benchmark(name: str):
+    def register(function: Callable[[], None]):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def best_time(function: Callable[[], object], repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(label: str, seconds: float, baseline: float | None = None):
+    line = f"  {label:<28} {seconds * 1000:10.2f} ms"
+    if baseline is not None:
+        line += f"  ({baseline / seconds:.2f}x)"
+    print(line)
+
+
+@benchmark("scanner")
+def scanner_benchmark():
+    source = SAMPLE_PROGRAM * 2000
+    megabytes = len(source) / 1_000_000
+    print(f"scanner: {megabytes:.2f} MB of source")
+
+    baseline = best_time(lambda: Scanner(source).scan_tokens())
+    report("Scanner", baseline)
+    report("RegexScanner", best_time(lambda: RegexScanner(source).scan_tokens()), baseline)
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@benchmark("stream")
+def stream_benchmark():
+    source = SAMPLE_PROGRAM * 2000
+    print(f"stream: peak memory while counting tokens of {len(source) / 1e6:.2f} MB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.lox")
+        with open(path, "w") as file:
+            file.write(source)
+
+        def count_whole_source():
+            with open(path) as file:
+                return sum(1 for _ in RegexScanner(file.read()).iter_tokens())
+
+        def count_streamed():
+            with open(path) as file:
+                return sum(1 for _ in StreamScanner.from_stream(file).iter_tokens())
+
+        for label, function in [
+            ("read() + RegexScanner", count_whole_source),
+            ("StreamScanner", count_streamed),
+        ]:
+            print(f"  {label:<28} {peak_memory(function) / 1024:10.1f} KiB")
+
+
+@benchmark("tokens")
+def token_stream_benchmark():
+    source = SAMPLE_PROGRAM * 2000
+    print(f"tokens: memory held by the tokens of {len(source) / 1e6:.2f} MB")
+
+    def hold(function: Callable[[], object]) -> int:
+        tracemalloc.start()
+        try:
+            tokens = function()
+            held = tracemalloc.get_traced_memory()[0]
+            del tokens
+            return held
+        finally:
+            tracemalloc.stop()
+
+    baseline = hold(lambda: RegexScanner(source).scan_tokens())
+    compact = hold(lambda: RegexScanner(source).scan_token_stream())
+    print(f"  {'List[Token]':<28} {baseline / 1024:10.1f} KiB")
+    print(f"  {'TokenStream':<28} {compact / 1024:10.1f} KiB  ({baseline / compact:.1f}x)")
+
+    tokens = RegexScanner(source).scan_tokens()
+    stream = RegexScanner(source).scan_token_stream()
+    baseline = best_time(lambda: Parser(tokens).parse())
+    report("Parser(List[Token])", baseline)
+    report("Parser(TokenStream)", best_time(lambda: Parser(stream).parse()), baseline)
+
+
+def count_calls(function: Callable[[], object]) -> int:
+    calls = 0
+
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == "call":
+            calls += 1
+
+    sys.setprofile(profile)
+    try:
+        function()
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+@benchmark("parser")
+def parser_benchmark():
+    expression = "a = (1 + 2 * x - y / 4 >= z or !done and -w == 3) != (f(1, 2) < g.h);"
+    source = "\n".join(f"var v{i} = {expression}" for i in range(5000))
+    tokens = RegexScanner(source).scan_tokens()
+    print(f"parser: {len(tokens)} tokens of expression-heavy input")
+
+    baseline = best_time(lambda: Parser(tokens).parse())
+    report("Parser", baseline)
+    report("PrattParser", best_time(lambda: PrattParser(tokens).parse()), baseline)
+
+    for parser_class in (Parser, PrattParser):
+        calls = count_calls(lambda: parser_class(tokens).parse())
+        label = f"{parser_class.__name__} calls/token"
+        print(f"  {label:<28} {calls / len(tokens):10.2f}")
+
+
+LIBRARY_FUNCTION = """
+fun helper{index}(a, b) {{
+    var total = 0;
+    for (var i = 0; i < a; i = i + 1) {{
+        if (i / 2 == b or !(i > a)) total = total + i * {index};
+        else total = total - 1;
+    }}
+    return total;
+}}
+
+class Shape{index} {{
+    init(size) {{ this.size = size; }}
+    area() {{ return this.size * this.size + helper{index}(2, 1); }}
+}}
+"""
+
+
+@benchmark("cache")
+def cache_benchmark():
+    import main
+
+    source = "".join(LIBRARY_FUNCTION.format(index=i) for i in range(2000))
+    source += "var area = Shape7(3).area();\n"
+    print(f"cache: startup of a {len(source) / 1e6:.2f} MB script")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "library.lox")
+        with open(path, "w") as file:
+            file.write(source)
+
+        def cold_start():
+            options = main.Options(cache_directory=tempfile.mkdtemp(dir=directory))
+            main.run_file(path, options)
+
+        warm = main.Options(cache_directory=os.path.join(directory, "warm"))
+        main.run_file(path, warm)
+
+        baseline = best_time(lambda: main.run_file(path))
+        report("no cache", baseline)
+        report("cold cache", best_time(cold_start), baseline)
+        report("warm cache", best_time(lambda: main.run_file(path, warm)), baseline)
+
+
+@benchmark("lazy")
+def lazy_benchmark():
+    import main
+
+    source = "".join(LIBRARY_FUNCTION.format(index=i) for i in range(2000))
+    source += "var area = Shape7(3).area();\n"
+    print(f"lazy: startup of a {len(source) / 1e6:.2f} MB library calling one method")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "library.lox")
+        with open(path, "w") as file:
+            file.write(source)
+
+        eager = main.Options(RegexScanner, PrattParser)
+        lazy = main.Options(RegexScanner, PrattParser, lazy_functions=True)
+        baseline = best_time(lambda: main.run_file(path, eager))
+        report("eager bodies", baseline)
+        report("lazy bodies", best_time(lambda: main.run_file(path, lazy)), baseline)
+
+
+VARIABLE_LOOPS = {
+    "locals": """
+{
+    var total = 0;
+    for (var i = 0; i < 20000; i = i + 1) {
+        var a = i;
+        var b = a + 1;
+        total = total + a * b - i;
+    }
+}
+""",
+    "enclosing locals": """
+{
+    var total = 0;
+    var step = 1;
+    {
+        {
+            for (var i = 0; i < 20000; i = i + step) {
+                total = total + i - step;
+            }
+        }
+    }
+}
+""",
+    "globals": """
+var total = 0;
+var i = 0;
+while (i < 20000) {
+    total = total + i * 2;
+    i = i + 1;
+}
+""",
+}
+
+
+def run_source(source: str, options=None):
+    import main
+
+    options = options or main.Options()
+    interpreter = options.interpreter()
+    statements = main.compile_source(interpreter, RegexScanner(source), options)
+    assert statements is not None
+    return lambda: interpreter.interpret(statements)
+
+
+@benchmark("variables")
+def variables_benchmark():
+    print("variables: variable-heavy loops of 20000 iterations")
+
+    for label, source in VARIABLE_LOOPS.items():
+        report(label, best_time(run_source(source), repeat=7))
+
+    print("variables: 100000 resolved reads from a scope two levels out")
+    names = Environment()
+    names.define("x", 1.0)
+    slots = LocalEnvironment(None, 1, [])
+    slots.values[0] = 1.0
+    for _ in range(2):
+        names = Environment(names)
+        slots = LocalEnvironment(slots, 0, [])
+
+    def read_names():
+        for _ in range(100_000):
+            names.get_at(2, "x")
+
+    def read_slots():
+        for _ in range(100_000):
+            slots.get_at(2, 0)
+
+    baseline = best_time(read_names, repeat=7)
+    report("Environment (dict)", baseline)
+    report("LocalEnvironment (slots)", best_time(read_slots, repeat=7), baseline)
+
+
+SCOPE_PROGRAMS = {
+    "loop": """
+fun sum(count) {
+    var total = 0;
+    for (var i = 0; i < count; i = i + 1) {
+        var square = i * i;
+        if (square > 100) {
+            var excess = square - 100;
+            total = total + excess;
+        }
+    }
+    return total;
+}
+sum(20000);
+""",
+    "recursion": """
+fun fib(n) {
+    if (n < 2) return n;
+    {
+        var left = fib(n - 1);
+        var right = fib(n - 2);
+        return left + right;
+    }
+}
+fib(18);
+""",
+}
+
+
+def count_environments(function: Callable[[], object]) -> int:
+    created = 0
+    original = LocalEnvironment.__init__
+
+    def counting_init(self, enclosing, size, upvalues):
+        nonlocal created
+        created += 1
+        original(self, enclosing, size, upvalues)
+
+    LocalEnvironment.__init__ = counting_init  # type: ignore
+    try:
+        function()
+    finally:
+        LocalEnvironment.__init__ = original  # type: ignore
+    return created
+
+
+@benchmark("scopes")
+def scopes_benchmark():
+    import main
+
+    print("scopes: environments allocated with and without capture analysis")
+
+    for label, source in SCOPE_PROGRAMS.items():
+        every_scope = run_source(source, main.Options(elide_scopes=False))
+        elided = run_source(source, main.Options(elide_scopes=True))
+
+        before, after = count_environments(every_scope), count_environments(elided)
+        print(f"  {label + ' environments':<28} {before:10d} -> {after}")
+
+        baseline = best_time(every_scope)
+        report(f"{label} every scope", baseline)
+        report(f"{label} elided", best_time(elided), baseline)
+
+
+@benchmark("depth")
+def depth_benchmark():
+    import main
+
+    print("depth: 100000 reads of a local N environments out")
+    for depth in (1, 4, 16, 64):
+        environment = LocalEnvironment(None, 1, [])
+        environment.values[0] = 1.0
+        for _ in range(depth):
+            environment = LocalEnvironment(environment, 0, [])
+
+        def walk_enclosing():
+            for _ in range(100_000):
+                target = environment
+                for _ in range(depth):
+                    target = target.enclosing  # type: ignore
+                target.values[0]
+
+        def index_display():
+            for _ in range(100_000):
+                environment.get_at(depth, 0)
+
+        baseline = best_time(walk_enclosing)
+        report(f"depth {depth} walk", baseline)
+        report(f"depth {depth} display", best_time(index_display), baseline)
+
+    print("depth: loop reading a local N blocks out, every block allocated")
+    for depth in (1, 16, 64):
+        source = (
+            "{ var x = 1; var total = 0;"
+            + " {" * depth
+            + " for (var i = 0; i < 5000; i = i + 1) total = total + x;"
+            + " }" * depth
+            + " }"
+        )
+        report(f"depth {depth}", best_time(run_source(source, main.Options(elide_scopes=False))))
+
+
+ENGINE_PROGRAMS = {
+    "fib": """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fib(20);
+""",
+    "loop": """
+{
+    var total = 0;
+    for (var i = 0; i < 100000; i = i + 1) {
+        if (i / 2 > 10 and total != nil) total = total + i * 2 - 1;
+    }
+}
+""",
+    "method calls": """
+class Counter {
+    init() { this.count = 0; }
+    add(amount) { this.count = this.count + amount; return this; }
+}
+var counter = Counter();
+for (var i = 0; i < 30000; i = i + 1) counter.add(i).add(1);
+""",
+}
+
+
+@benchmark("engines")
+def engines_benchmark():
+    import main
+    from plox.engines import ENGINES
+
+    print("engines: the same programs on every execution engine")
+    for label, source in ENGINE_PROGRAMS.items():
+        baseline = None
+        for name, engine in ENGINES.items():
+            seconds = best_time(run_source(source, main.Options(interpreter=engine)))
+            report(f"{label} ({name})", seconds, baseline)
+            baseline = baseline or seconds
+
+
+CONSTANT_LOOP = """
+{
+    var seconds = 0;
+    for (var i = 0; i < 20000; i = i + 1) {
+        seconds = seconds + 60 * 60 * 24 * (7 - 2);
+        if (!!(i > 10 * 10)) seconds = seconds - (1) * 1;
+    }
+}
+"""
+
+
+@benchmark("optimizer")
+def optimizer_benchmark():
+    import main
+
+    print("optimizer: a loop over constant expressions, as parsed and optimized")
+    baseline = best_time(run_source(CONSTANT_LOOP, main.Options()))
+    report("as parsed", baseline)
+    seconds = best_time(run_source(CONSTANT_LOOP, main.Options(optimize=True)))
+    report("optimized", seconds, baseline)
+
+
+INVARIANT_LOOP = """
+fun norm(x, y) { return x * x + y * y; }
+fun scaled(n, x, y) {
+    var total = 0;
+    for (var i = 0; i < n * 2; i = i + 1) total = total + i * norm(x, y) / n;
+    return total;
+}
+scaled(10000, 3, 4);
+"""
+
+
+@benchmark("hoist")
+def hoist_benchmark():
+    import main
+
+    print("hoist: a loop calling a pure function with the same arguments every time")
+    baseline = best_time(run_source(INVARIANT_LOOP, main.Options()))
+    report("as parsed", baseline)
+    seconds = best_time(run_source(INVARIANT_LOOP, main.Options(hoist=True)))
+    report("invariants hoisted", seconds, baseline)
+
+
+METHOD_CALLS = """
+class Counter {
+    init() { this.count = 0; }
+    add(n) { this.count = this.count + n; return this; }
+}
+var counter = Counter();
+var add = counter.add;
+for (var i = 0; i < 20000; i = i + 1) { counter.add(1); add(1); }
+"""
+
+
+def count_functions(function: Callable[[], object]) -> int:
+    from plox.functions import PLoxFunction
+
+    created = 0
+    original = PLoxFunction.__init__
+
+    def counting_init(self, *arguments):
+        nonlocal created
+        created += 1
+        original(self, *arguments)
+
+    PLoxFunction.__init__ = counting_init  # type: ignore
+    try:
+        function()
+    finally:
+        PLoxFunction.__init__ = original  # type: ignore
+    return created
+
+
+@benchmark("methods")
+def methods_benchmark():
+    import main
+
+    print("methods: 20000 calls of object.method() and of a method stored in a variable")
+    run = run_source(METHOD_CALLS, main.Options())
+    print(f"  {'functions allocated':<28} {count_functions(run):10d}")
+    report("tree-walker", best_time(run))
+
+
+INSTANCES = 20000
+INSTANCE_PROGRAM = f"""
+class Node {{
+    init(value, next) {{ this.value = value; this.next = next; this.weight = 1; }}
+}}
+var head = nil;
+for (var i = 0; i < {INSTANCES}; i = i + 1) head = Node(i, head);
+"""
+
+
+# Instances as they were laid out before shapes: a dict of fields each
+class DictInstance:
+
+    def __init__(self, plox_class: object) -> None:
+        self.plox_class = plox_class
+        self.fields: Dict[str, object] = {}
+
+
+@benchmark("shapes")
+def shapes_benchmark():
+    import gc
+    import main
+
+    print(f"shapes: {INSTANCES} instances with three fields, kept alive in a list")
+    run = run_source(INSTANCE_PROGRAM, main.Options())
+
+    def dict_instances() -> object:
+        head = None
+        for i in range(INSTANCES):
+            node = DictInstance(None)
+            node.fields["value"] = float(i)
+            node.fields["next"] = head
+            node.fields["weight"] = 1.0
+            head = node
+        return head
+
+    def retained(function: Callable[[], object]) -> int:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            held = function()
+            memory = tracemalloc.get_traced_memory()[0]
+            del held
+            return memory
+        finally:
+            tracemalloc.stop()
+
+    baseline = retained(dict_instances)
+    held = retained(run)
+    print(f"  {'per-instance dicts':<28} {baseline / 1024:10.0f} KiB ({baseline // INSTANCES} bytes per instance)")
+    print(f"  {'shapes':<28} {held / 1024:10.0f} KiB ({held // INSTANCES} bytes per instance)  ({baseline / held:.1f}x)")
+    report("tree-walker", best_time(run))
+
+
+HIERARCHY_PROGRAM = """
+class A {
+    init(value) { this.value = value; }
+    get() { return this.value; }
+}
+class B < A {}
+class C < B {}
+class D < C {}
+class E < D { get() { return super.get() + 1; } }
+var total = 0;
+for (var i = 0; i < 20000; i = i + 1) total = total + E(i).get();
+"""
+
+
+@benchmark("hierarchy")
+def hierarchy_benchmark():
+    import main
+
+    print("hierarchy: 20000 instances of a class four levels below its initializer")
+    report("tree-walker", best_time(run_source(HIERARCHY_PROGRAM, main.Options())))
+
+
+FIB_PROGRAM = """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fib(25);
+"""
+
+
+class ReturnException(Exception):
+
+    def __init__(self, value: object):
+        super().__init__()
+        self.value = value
+
+
+# The tree-walker as it was before `return` evaluated to a completion: the
+# statement raises and the call catches it
+def exception_returns():
+    from plox.interpreter import Interpreter
+
+    class RaisingInterpreter(Interpreter):
+
+        def visit_return_stmt(self, stmt):
+            raise ReturnException(self.evaluate(stmt.expr) if stmt.expr is not None else None)
+
+    def interpret(self, interpreter, arguments, receiver=None):
+        if receiver is None:
+            receiver = self.receiver
+        body = self.declaration.body
+        environment = self.enter(arguments, receiver)
+        try:
+            interpreter.execute_block(body, environment)
+        except ReturnException as e:
+            return receiver if self.is_initializer else e.value
+        finally:
+            self.release(environment)
+
+        return receiver if self.is_initializer else None
+
+    return RaisingInterpreter, interpret
+
+
+@benchmark("returns")
+def returns_benchmark():
+    import main
+    from plox.closure_compiler import ClosureInterpreter
+    from plox.functions import PLoxFunction
+    from plox.interpreter import Interpreter
+
+    print("returns: fib(25), 242785 calls each ending in a return")
+    engine, interpret = exception_returns()
+    run = run_source(FIB_PROGRAM, main.Options(interpreter=engine))
+    original = PLoxFunction.interpret
+    PLoxFunction.interpret = interpret  # type: ignore
+    try:
+        baseline = best_time(run)
+    finally:
+        PLoxFunction.interpret = original  # type: ignore
+
+    report("tree-walker, exceptions", baseline)
+    report("tree-walker, completions", best_time(run_source(FIB_PROGRAM, main.Options())), baseline)
+    report("closures", best_time(run_source(FIB_PROGRAM, main.Options(interpreter=ClosureInterpreter))))
+
+
+JIT_PROGRAM = """
+fun step(x) {
+    var i = 0;
+    while (i < 10) { x = x + i; i = i + 1; }
+    return x;
+}
+var total = 0;
+for (var i = 0; i < 5000; i = i + 1) total = step(total);
+"""
+
+
+@benchmark("jit")
+def jit_benchmark():
+    import functools
+    import main
+    from plox.interpreter import Interpreter
+    from plox.jit import JITInterpreter
+
+    # A fresh interpreter per run, so every run starts with cold profiles
+    def cold_run(engine):
+        options = main.Options(interpreter=engine)
+        return lambda: run_source(JIT_PROGRAM, options)()
+
+    print("jit: a hot function under the tree-walker and promoted at each call threshold")
+    baseline = best_time(cold_run(Interpreter))
+    report("tree-walker", baseline)
+    for threshold in (1, 100, 1000, 4000):
+        engine = functools.partial(JITInterpreter, threshold, threshold * 10)
+        report(f"promoted after {threshold} calls", best_time(cold_run(engine)), baseline)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="benchmarks")
+    arg_parser.add_argument("names", nargs="*", help=", ".join(BENCHMARKS))
+    args = arg_parser.parse_args()
+
+    for name in args.names or BENCHMARKS.keys():
+        if name not in BENCHMARKS:
+            arg_parser.error(f"unknown benchmark '{name}'")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Generator, List
+
 from plox.ast.expr_interface import Expr
 from plox.ast.expr_types import (
     Assign,
@@ -14,13 +16,77 @@ from plox.ast.expr_types import (
     Variable,
 )
 from plox.ast.expr_visitor import ExprVisitor
+from plox.ast.stmt_interface import Stmt
+from plox.ast.stmt_types import (
+    Block,
+    Class,
+    Expression,
+    Function,
+    If,
+    Print,
+    Return,
+    VariableDeclaration,
+    While,
+)
+from plox.ast.stmt_visitor import StmtVisitor
+from plox.utils import trampoline
 
 
-class ASTPrettyPrinter(ExprVisitor):
+class ASTPrettyPrinter(ExprVisitor, StmtVisitor):
 
     def print(self, expr: Expr) -> str:
         return expr.accept(self)
 
+    # One statement per line, with nested statements indented under the
+    # statement that holds them
+    def print_statements(self, statements: List[Stmt]) -> str:
+        return "\n".join(statement.accept(self) for statement in statements)
+
+    def nest(self, head: str, *statements: Stmt) -> str:
+        lines = [head]
+        for statement in statements:
+            lines.extend("  " + line for line in statement.accept(self).split("\n"))
+        lines[-1] += ")"
+        return "\n".join(lines)
+
+    def visit_block_stmt(self, stmt: Block):
+        return self.nest("(block", *stmt.statements)
+
+    def visit_class_stmt(self, stmt: Class):
+        head = f"(class {stmt.name.lexeme}"
+        if stmt.superclass is not None:
+            head += f" < {stmt.superclass.name.lexeme}"
+        return self.nest(head, *stmt.methods)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        return f"(; {stmt.expression.accept(self)})"
+
+    def visit_function_stmt(self, stmt: Function):
+        params = " ".join(param.lexeme for param in stmt.params)
+        return self.nest(f"(fun {stmt.name.lexeme} ({params})", *stmt.body)
+
+    def visit_if_stmt(self, stmt: If):
+        branches = [stmt.thenBranch]
+        if stmt.elseBranch is not None:
+            branches.append(stmt.elseBranch)
+        return self.nest(f"(if {stmt.condition.accept(self)}", *branches)
+
+    def visit_print_stmt(self, stmt: Print):
+        return f"(print {stmt.expression.accept(self)})"
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.expr is None:
+            return "(return)"
+        return f"(return {stmt.expr.accept(self)})"
+
+    def visit_variabledeclaration_stmt(self, stmt: VariableDeclaration):
+        if stmt.initializer is None:
+            return f"(var {stmt.name.lexeme})"
+        return f"(var {stmt.name.lexeme} {stmt.initializer.accept(self)})"
+
+    def visit_while_stmt(self, stmt: While):
+        return self.nest(f"(while {stmt.condition.accept(self)}", stmt.body)
+
     def parenthesize(self, name: str, *exprs: Expr) -> str:
         output = ""
         for expr in exprs:
@@ -41,41 +107,80 @@ class ASTPrettyPrinter(ExprVisitor):
         return self.parenthesize(expr.operator.lexeme, expr.right)
 
     def visit_assign_expr(self, expr: Assign):
-        raise Exception(
-            "ASTPrettyPrinter.visit_assign_expr(name: Token, expr: Expr) not implemented"
-        )
+        return self.parenthesize(f"= {expr.name.lexeme}", expr.value)
+
+    def visit_call_expr(self, expr: Call):
+        return self.parenthesize("call", expr.callee, *expr.params)
+
+    def visit_get_expr(self, expr: Get):
+        return self.parenthesize(f". {expr.name.lexeme}", expr.object)
+
+    def visit_logical_expr(self, expr: Logical):
+        return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
+
+    def visit_set_expr(self, expr: Set):
+        return self.parenthesize(f"set {expr.name.lexeme}", expr.object, expr.value)
+
+    def visit_super_expr(self, expr: Super):
+        return f"(super {expr.method.lexeme})"
+
+    def visit_this_expr(self, expr: This):
+        return "this"
+
+    def visit_variable_expr(self, expr: Variable):
+        return expr.name.lexeme
+
+
+# Printer whose nesting depth is bounded by memory instead of the Python
+# recursion limit. Visits are generators that emit pieces of the output and
+# yield `child.accept(self)` so `trampoline` can run them from an explicit
+# stack; the pieces are joined once at the end.
+class StacklessPrettyPrinter(ExprVisitor):
+
+    def print(self, expr: Expr) -> str:
+        self.pieces: List[str] = []
+        trampoline(expr.accept(self))
+        return "".join(self.pieces)
+
+    def parenthesize(self, name: str, *exprs: Expr) -> Generator:
+        self.pieces.append(f"({name}")
+        for expr in exprs:
+            self.pieces.append(" ")
+            yield expr.accept(self)
+        self.pieces.append(")")
+
+    def visit_literal_expr(self, expr: Literal):
+        self.pieces.append(str(expr.value))
+
+    def visit_binary_expr(self, expr: Binary):
+        return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self.parenthesize("group", expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        return self.parenthesize(expr.operator.lexeme, expr.right)
+
+    def visit_assign_expr(self, expr: Assign):
+        return self.parenthesize(f"= {expr.name.lexeme}", expr.value)
 
     def visit_call_expr(self, expr: Call):
-        raise Exception(
-            "ASTPrettyPrinter.visit_call_expr(callee: Expr, paren: Token, params: List[Expr]) not implemented"
-        )
+        return self.parenthesize("call", expr.callee, *expr.params)
 
     def visit_get_expr(self, expr: Get):
-        raise Exception(
-            "ASTPrettyPrinter.visit_get_expr(object: Expr, name: Token) not implemented"
-        )
+        return self.parenthesize(f". {expr.name.lexeme}", expr.object)
 
     def visit_logical_expr(self, expr: Logical):
-        raise Exception(
-            "ASTPrettyPrinter.visit_logical_expr(left: Expr, operator: Token, right: Expr) not implemented"
-        )
+        return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
 
     def visit_set_expr(self, expr: Set):
-        raise Exception(
-            "ASTPrettyPrinter.visit_set_expr(object: Expr, name: Token, expr: Expr) not implemented"
-        )
+        return self.parenthesize(f"set {expr.name.lexeme}", expr.object, expr.value)
 
     def visit_super_expr(self, expr: Super):
-        raise Exception(
-            "ASTPrettyPrinter.visit_super_expr(keyword: Token, method: Token) not implemented"
-        )
+        self.pieces.append(f"(super {expr.method.lexeme})")
 
     def visit_this_expr(self, expr: This):
-        raise Exception(
-            "ASTPrettyPrinter.visit_this_expr(keyword: Token) not implemented"
-        )
+        self.pieces.append("this")
 
     def visit_variable_expr(self, expr: Variable):
-        raise Exception(
-            "ASTPrettyPrinter.visit_variable_expr(name: Token) not implemented"
-        )
+        self.pieces.append(expr.name.lexeme)